@@ -50,7 +50,9 @@ const editProduct = async (req, res) => {
     );
     
     // Sync to recommendation service after update
-    await syncToRecommendationService();
+    if (updated) {
+      await syncProductChanges({ upsert: [updated] });
+    }
     
     res.json({ success: true, message: "Product updated successfully", product: updated });
   } catch (error) {
@@ -114,12 +116,7 @@ const syncToRecommendationService = async () => {
     const products = await productModel.find({});
     
     // Transform to recommendation service format
-    const transformedProducts = products.map(product => ({
-      id: product._id.toString(),
-      nama_pakaian: product.name,
-      categories: product.category.toLowerCase(),
-      type: product.subCategory.toLowerCase()
-    }));
+    const transformedProducts = products.map(toRecommendationProduct);
     
     // Send to recommendation service
     await axios.post('http://localhost:5001/sync/products', {
@@ -134,6 +131,29 @@ const syncToRecommendationService = async () => {
     // Don't throw error, just log it
   }
 };
+// Helper function to push single-product changes; falls back to a full sync
+const toRecommendationProduct = (product) => ({
+  id: product._id.toString(),
+  nama_pakaian: product.name,
+  categories: product.category.toLowerCase(),
+  type: product.subCategory.toLowerCase()
+});
+
+const syncProductChanges = async ({ upsert = [], remove = [] }) => {
+  try {
+    await axios.post('http://localhost:5001/sync/products/changes', {
+      upsert: upsert.map(toRecommendationProduct),
+      delete: remove.map(id => id.toString())
+    }, {
+      timeout: 5000
+    });
+    
+    console.log(`✅ Synced product changes to recommendation service (${upsert.length} upserted, ${remove.length} deleted)`);
+  } catch (error) {
+    console.log(`⚠️ Incremental sync failed (${error.message}), falling back to full sync`);
+    await syncToRecommendationService();
+  }
+};
 // Function for add product
 const addProduct = async (req, res) => {
   /* Creating a middleware using multer, so if we send any file as form data,
@@ -202,7 +222,7 @@ const addProduct = async (req, res) => {
       console.log("Product saved successfully");
       
       // Sync to recommendation service
-      await syncToRecommendationService();
+      await syncProductChanges({ upsert: [product] });
     }
     res.json({ success: true, message: "New product has been added." });
   } catch (error) {
@@ -239,7 +259,7 @@ const removeProduct = async (req, res) => {
     await productModel.findByIdAndDelete(req.body.id);
     
     // Sync to recommendation service after deletion
-    await syncToRecommendationService();
+    await syncProductChanges({ remove: [req.body.id] });
     
     res.json({ success: true, message: `Product has been removed` });
   } catch (error) {
@@ -33,40 +33,12 @@ recommendationRoute.post('/checkout', async (req, res) => {
             }
         }
 
-        // Start with cart-based recommendations
-        const allRecommendations = [];
-        const processedNames = new Set();
+        // Seeds for a single batch call: cart items first, then purchase history
+        const cartNames = cartItems.map(item => item.name).filter(Boolean);
+        const seedNames = [...cartNames];
+        const seedWeights = cartNames.map(() => 1.0);
 
-        // Get recommendations based on current cart items
-        for (const item of cartItems) {
-            try {
-                const response = await axios.post(
-                    `${RECOMMENDATION_SERVICE_URL}/recommendations/similar`,
-                    { product_name: item.name },
-                    { 
-                        timeout: 5000,
-                        headers: { 'Content-Type': 'application/json' }
-                    }
-                );
-
-                if (response.data.success && response.data.recommendations) {
-                    response.data.recommendations.forEach(rec => {
-                        if (!processedNames.has(rec.nama_pakaian)) {
-                            processedNames.add(rec.nama_pakaian);
-                            allRecommendations.push({
-                                ...rec,
-                                based_on: item.name,
-                                source: 'cart'
-                            });
-                        }
-                    });
-                }
-            } catch (itemError) {
-                console.log(`Skipping recommendations for ${item.name}:`, itemError.message);
-            }
-        }
-
-        // If user is logged in, get history-based recommendations
+        // If user is logged in, add history-based seeds
         if (userId) {
             try {
                 const userOrders = await orderModel.find({ userID: userId }).sort({ date: -1 }).limit(5);
@@ -76,57 +48,18 @@ recommendationRoute.post('/checkout', async (req, res) => {
                 userOrders.forEach(order => {
                     order.items.forEach(item => {
                         if (item.name && !purchasedProducts.find(p => p.name === item.name)) {
-                            // Normalize category to match CSV format
-                            let normalizedCategory = 'General';
-                            if (item.category) {
-                                const cat = item.category.toLowerCase();
-                                if (cat === 'men' || cat === 'man' || cat === 'male') {
-                                    normalizedCategory = 'men';
-                                } else if (cat === 'women' || cat === 'woman' || cat === 'female') {
-                                    normalizedCategory = 'women';
-                                } else if (cat === 'kids' || cat === 'children' || cat === 'child') {
-                                    // Kids category fallback - use general women/men products
-                                    normalizedCategory = Math.random() > 0.5 ? 'women' : 'men';
-                                }
-                            }
-                            
-                            purchasedProducts.push({
-                                name: item.name,
-                                category: normalizedCategory
-                            });
+                            purchasedProducts.push({ name: item.name });
                         }
                     });
                 });
 
                 console.log(`User ${userId} purchase history:`, purchasedProducts.length, 'products');
 
-                // Get recommendations based on purchase history (limit to recent 3 products)
+                // Recent 3 products, slightly lower weight for history
                 for (const product of purchasedProducts.slice(0, 3)) {
-                    try {
-                        const response = await axios.post(
-                            `${RECOMMENDATION_SERVICE_URL}/recommendations/similar`,
-                            { product_name: product.name },
-                            { 
-                                timeout: 5000,
-                                headers: { 'Content-Type': 'application/json' }
-                            }
-                        );
-
-                        if (response.data.success && response.data.recommendations) {
-                            response.data.recommendations.forEach(rec => {
-                                if (!processedNames.has(rec.nama_pakaian)) {
-                                    processedNames.add(rec.nama_pakaian);
-                                    allRecommendations.push({
-                                        ...rec,
-                                        based_on: product.name,
-                                        source: 'history',
-                                        similarity_score: rec.similarity_score * 0.8 // Slightly lower weight for history
-                                    });
-                                }
-                            });
-                        }
-                    } catch (historyError) {
-                        console.log(`Skipping history recommendations for ${product.name}:`, historyError.message);
+                    if (!seedNames.includes(product.name)) {
+                        seedNames.push(product.name);
+                        seedWeights.push(0.8);
                     }
                 }
             } catch (historyError) {
@@ -134,6 +67,29 @@ recommendationRoute.post('/checkout', async (req, res) => {
             }
         }
 
+        const allRecommendations = [];
+        try {
+            const response = await axios.post(
+                `${RECOMMENDATION_SERVICE_URL}/recommendations/batch`,
+                { product_names: seedNames, weights: seedWeights, n: 6 },
+                { 
+                    timeout: 5000,
+                    headers: { 'Content-Type': 'application/json' }
+                }
+            );
+
+            if (response.data.success && response.data.recommendations) {
+                response.data.recommendations.forEach(rec => {
+                    allRecommendations.push({
+                        ...rec,
+                        source: cartNames.includes(rec.based_on) ? 'cart' : 'history'
+                    });
+                });
+            }
+        } catch (batchError) {
+            console.log('Skipping batch recommendations:', batchError.message);
+        }
+
         // Sort by similarity score and take top 6
         allRecommendations.sort((a, b) => b.similarity_score - a.similarity_score);
         const topRecommendations = allRecommendations.slice(0, 6);
@@ -364,32 +320,27 @@ recommendationRoute.get('/personalized', async (req, res) => {
         const allRecommendations = [];
         const processedNames = new Set();
 
-        // Get recommendations from recent purchases (limit to 5 most recent)
-        for (const product of purchasedProducts.slice(0, 5)) {
-            try {
-                const response = await axios.post(
-                    `${RECOMMENDATION_SERVICE_URL}/recommendations/similar`,
-                    { product_name: product.name },
-                    { 
-                        timeout: 5000,
-                        headers: { 'Content-Type': 'application/json' }
-                    }
-                );
-
-                if (response.data.success && response.data.recommendations) {
-                    response.data.recommendations.forEach(rec => {
-                        if (!processedNames.has(rec.nama_pakaian)) {
-                            processedNames.add(rec.nama_pakaian);
-                            allRecommendations.push({
-                                ...rec,
-                                based_on: product.name
-                            });
-                        }
-                    });
+        // Get recommendations from recent purchases (limit to 5 most recent) in one batch call
+        try {
+            const response = await axios.post(
+                `${RECOMMENDATION_SERVICE_URL}/recommendations/batch`,
+                { product_names: purchasedProducts.slice(0, 5).map(p => p.name), n: 25 },
+                { 
+                    timeout: 5000,
+                    headers: { 'Content-Type': 'application/json' }
                 }
-            } catch (error) {
-                console.log(`Skipping recommendations for ${product.name}:`, error.message);
+            );
+
+            if (response.data.success && response.data.recommendations) {
+                response.data.recommendations.forEach(rec => {
+                    if (!processedNames.has(rec.nama_pakaian)) {
+                        processedNames.add(rec.nama_pakaian);
+                        allRecommendations.push(rec);
+                    }
+                });
             }
+        } catch (error) {
+            console.log('Skipping batch recommendations:', error.message);
         }
 
         console.log(`🔍 Found ${allRecommendations.length} total recommendations from ML service`);
@@ -0,0 +1,258 @@
+"""
+Approximate nearest-neighbor index (IVF) untuk katalog besar, NumPy saja.
+
+Build:
+    1. Ruang clustering: CSR TF-IDF L2-normalized apa adanya kalau vocabulary kecil
+       (<= FULL_SPACE_MAX_FEATURES, default VECTORIZER_PARAMS max_features=1000), selain
+       itu embedding padat dari truncated SVD (randomized, power iteration) -> V x dim
+    2. Spherical k-means di ruang tersebut -> n_lists centroid
+    3. Inverted list: produk dikelompokkan per centroid terdekat
+
+SVD berdimensi rendah membuang term langka (kode / nomor seri di nama produk)
+yang justru paling menentukan cosine TF-IDF, jadi ruang penuh dipakai selama
+centroid padat V-dimensi masih murah.
+
+Query satu produk: embed baris query, pilih `nprobe` centroid terdekat, lalu
+kandidat dari list tersebut di-score ulang dengan cosine EXACT dari CSR, jadi
+skor yang dikembalikan sama dengan mode exact; yang approximate hanya himpunan
+kandidatnya (recall@k, lihat benchmarks/bench_ann.py).
+
+Direktori index (np.load mmap):
+    meta.json  centroids.npy  offsets.npy  items.npy  [components.npy]
+
+    python ann_index.py build --output models/ann --lists 1024
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from similarity import top_k_indices
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+ARRAY_FILES = ('centroids', 'offsets', 'items')
+COMPONENTS_FILE = 'components.npy'
+FULL_SPACE_MAX_FEATURES = 2048
+
+
+def matrix_fingerprint(matrix):
+    """Hash isi CSR; index hanya dipakai ulang untuk matrix yang persis sama"""
+    digest = hashlib.sha256()
+    digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+    for part in (matrix.indptr, matrix.indices, matrix.data):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    return digest.hexdigest()
+
+
+def svd_components(matrix, dim, n_iter=4, oversample=10, seed=0):
+    """Right singular vectors teratas (V x dim) lewat randomized SVD + power iteration"""
+    rng = np.random.default_rng(seed)
+    n_features = matrix.shape[1]
+    rank = min(dim + oversample, n_features, matrix.shape[0])
+    basis = matrix @ rng.standard_normal((n_features, rank))
+    basis, _ = np.linalg.qr(basis)
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis, _ = np.linalg.qr(matrix @ basis)
+    projected = np.asarray((matrix.T @ basis).T)  # rank x V
+    _, _, vt = np.linalg.svd(projected, full_matrices=False)
+    return np.ascontiguousarray(vt[:min(dim, rank)].T, dtype=np.float32)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _dense(matrix):
+    return matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix)
+
+
+def _assign(embedding, centroids, chunk_size=65536):
+    """Index centroid terdekat (cosine) per baris, per chunk supaya memory tetap kecil"""
+    labels = np.empty(embedding.shape[0], dtype=np.int32)
+    for start in range(0, embedding.shape[0], chunk_size):
+        scores = np.asarray(embedding[start:start + chunk_size] @ centroids.T)
+        labels[start:start + chunk_size] = np.argmax(scores, axis=1)
+    return labels
+
+
+def _cluster_sums(sample, labels, n_lists):
+    """Jumlah vektor per cluster; indicator sparse (n_lists x n) @ sample, sample boleh CSR"""
+    from scipy import sparse
+
+    indicator = sparse.csr_matrix(
+        (np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(n_lists, len(labels))
+    )
+    return _dense(indicator @ sample)
+
+
+def spherical_kmeans(embedding, n_lists, n_iter=10, sample_size=None, seed=0):
+    """Centroid padat (n_lists x dim, L2-normalized) dari sampel embedding (dense atau CSR)"""
+    rng = np.random.default_rng(seed)
+    total = embedding.shape[0]
+    sample_size = min(total, sample_size or max(n_lists * 64, 10000))
+    sample = embedding[rng.choice(total, sample_size, replace=False)] if sample_size < total else embedding
+    sample_rows = sample.shape[0]
+    centroids = _dense(sample[rng.choice(sample_rows, n_lists, replace=False)]).astype(np.float64)
+
+    for _ in range(n_iter):
+        labels = _assign(sample, centroids)
+        sums = _cluster_sums(sample, labels, n_lists)
+        counts = np.bincount(labels, minlength=n_lists)
+        # Cluster kosong diisi ulang dengan titik acak supaya semua list terpakai
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = _dense(sample[rng.choice(sample_rows, len(empty), replace=False)])
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    def __init__(self, components, centroids, offsets, items, meta=None):
+        # components None = clustering di ruang TF-IDF penuh (tanpa proyeksi SVD)
+        self.components = components
+        self.centroids = centroids
+        self.offsets = offsets
+        self.items = items
+        self.meta = meta or {}
+
+    @classmethod
+    def build(cls, normalized_matrix, n_lists=None, dim=None, n_iter=10, seed=0):
+        """
+        Build dari CSR L2-normalized; n_lists default ~ sqrt(N).
+        dim=None: ruang penuh kalau vocabulary <= FULL_SPACE_MAX_FEATURES, selain itu SVD 64;
+        dim=0 selalu ruang penuh; dim>0 selalu SVD dengan dimensi tersebut.
+        """
+        start = time.perf_counter()
+        total = normalized_matrix.shape[0]
+        n_lists = max(1, min(int(n_lists or round(np.sqrt(total))), total))
+        if dim is None:
+            dim = 0 if normalized_matrix.shape[1] <= FULL_SPACE_MAX_FEATURES else 64
+
+        if dim > 0:
+            components = svd_components(normalized_matrix, dim, seed=seed)
+            embedding = _normalize(np.asarray(normalized_matrix @ components, dtype=np.float32))
+        else:
+            components, embedding = None, normalized_matrix
+        centroids = spherical_kmeans(embedding, n_lists, n_iter=n_iter, seed=seed)
+        labels = _assign(embedding, centroids)
+
+        # Item per list diurutkan berdasarkan index produk (stable) -> tie-break sama dengan exact
+        items = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'rows': int(total),
+            'dim': int(components.shape[1]) if components is not None else 0,
+            'projection': 'svd' if components is not None else 'none',
+            'lists': int(n_lists),
+            'fingerprint': matrix_fingerprint(normalized_matrix),
+            'build_seconds': round(time.perf_counter() - start, 3),
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        return cls(components, centroids, offsets, items, meta)
+
+    def save(self, path):
+        """Tulis ke direktori sementara lalu pindahkan ke `path`"""
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in ARRAY_FILES:
+            np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        if self.components is not None:
+            np.save(os.path.join(staging, COMPONENTS_FILE), np.ascontiguousarray(self.components))
+        with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.meta, file, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.replace(staging, path)
+        return self.meta
+
+    @classmethod
+    def load(cls, path, fingerprint=None, mmap=True):
+        """Load index; None kalau tidak ada, versi beda, atau fingerprint matrix tidak cocok"""
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('version') != FORMAT_VERSION:
+            return None
+        if fingerprint is not None and meta.get('fingerprint') != fingerprint:
+            return None
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        components_path = os.path.join(path, COMPONENTS_FILE)
+        components = np.load(components_path, mmap_mode=mmap_mode) if os.path.exists(components_path) else None
+        return cls(components=components, meta=meta, **arrays)
+
+    @property
+    def lists(self):
+        return self.centroids.shape[0]
+
+    def candidates(self, query_row, nprobe):
+        """Posisi produk di `nprobe` list terdekat dari baris CSR query (urut naik)"""
+        # Hanya kolom term yang ada di query yang disentuh (query_row sparse)
+        if self.components is not None:
+            centroid_scores = self.centroids @ (query_row.data @ self.components[query_row.indices])
+        else:
+            centroid_scores = self.centroids[:, query_row.indices] @ query_row.data
+        nprobe = max(1, min(int(nprobe), self.lists))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self.items[self.offsets[l]:self.offsets[l + 1]] for l in probe])
+        return np.sort(candidates).astype(np.int64)
+
+    def search_row(self, normalized_matrix, row_idx, k, nprobe=8, exclude=None):
+        """
+        Top-k untuk satu produk. Kandidat di-rerank dengan cosine exact;
+        return (indices, scores) seperti top_k_indices + skor.
+        """
+        query_row = normalized_matrix[row_idx]
+        candidates = self.candidates(query_row, nprobe)
+        scores = normalized_matrix[candidates] @ query_row.toarray().ravel()
+        excluded = None
+        if exclude is not None and len(exclude) > 0:
+            excluded = np.flatnonzero(np.isin(candidates, np.asarray(exclude, dtype=np.int64)))
+        local = top_k_indices(scores, k, exclude=excluded)
+        return candidates[local], scores[local]
+
+
+def _build_from_catalog(args):
+    from app import model_manager
+
+    engine = model_manager.wait_ready()
+    if engine.normalized_matrix is None:
+        raise SystemExit('❌ Model not trained, cannot build ANN index')
+    return IVFIndex.build(engine.normalized_matrix, n_lists=args.lists, dim=args.dim, n_iter=args.iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Build the IVF index from the TF-IDF model of the current catalog')
+    build.add_argument('--output', default=os.path.join('models', 'ann'))
+    build.add_argument('--lists', type=int, default=None, help='Number of inverted lists (default ~sqrt(N))')
+    build.add_argument('--dim', type=int, default=None,
+                       help='SVD dimensions, 0 = full TF-IDF space (default: full for vocabularies <= 2048)')
+    build.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    index = _build_from_catalog(args)
+    meta = index.save(args.output)
+    print(f"✅ ANN index saved to {args.output}: {meta['rows']} rows, {meta['lists']} lists, "
+          f"dim {meta['dim']} ({meta['build_seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
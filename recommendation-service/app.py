@@ -1,98 +1,284 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import json
+import math
 import os
 import csv
+import copy
+import heapq
+import importlib.util
+import threading
+import time
 
-# Try to import ML libraries, fallback to basic implementations if not available
-try:
-    import pandas as pd
-    import numpy as np
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    ML_AVAILABLE = True
-    print("✅ ML libraries loaded successfully")
-except ImportError as e:
-    print(f"⚠️ ML libraries not available: {e}")
-    print("🔄 Using fallback implementations...")
-    ML_AVAILABLE = False
-    
-    # Basic fallback implementations
-    class TfidfVectorizer:
-        def __init__(self, stop_words=None, max_features=None):
-            self.vocabulary = {}
-            self.fitted = False
-            
-        def fit_transform(self, texts):
-            # Simple word frequency implementation
-            all_words = set()
-            for text in texts:
-                words = text.lower().split()
-                all_words.update(words)
-            
-            self.vocabulary = {word: i for i, word in enumerate(sorted(all_words))}
-            self.fitted = True
-            
-            # Create simple term frequency matrix
-            matrix = []
-            for text in texts:
-                words = text.lower().split()
-                vector = [0] * len(self.vocabulary)
-                for word in words:
-                    if word in self.vocabulary:
-                        vector[self.vocabulary[word]] += 1
-                matrix.append(vector)
-            
-            return matrix
-    
-    def cosine_similarity(matrix1, matrix2=None):
-        if matrix2 is None:
-            matrix2 = matrix1
-        
-        # Simple cosine similarity implementation
-        similarities = []
-        for i, vec1 in enumerate(matrix1):
-            row_similarities = []
-            for vec2 in matrix2:
-                # Calculate cosine similarity
-                dot_product = sum(a * b for a, b in zip(vec1, vec2))
-                norm1 = sum(a * a for a in vec1) ** 0.5
-                norm2 = sum(b * b for b in vec2) ** 0.5
-                
-                if norm1 == 0 or norm2 == 0:
-                    similarity = 0
-                else:
-                    similarity = dot_product / (norm1 * norm2)
-                
-                row_similarities.append(similarity)
-            similarities.append(row_similarities)
-        
-        return similarities
+import fallback_tfidf
+import json_render
+import text_features
+from batcher import MicroBatcher
+from group_index import GroupIndex, MEN_ALIASES, WOMEN_ALIASES, KIDS_ALIASES, category_keys, type_key
+from metrics import MetricsRegistry
+from model_manager import ModelManager
+from name_index import ProductNameIndex, Utf8Column
+from result_cache import ResultCache, create_backend
+from sampling_profiler import SamplingProfiler
+from user_profiles import EVENT_WEIGHTS, UserProfileStore, event_time
+
+# Waktu mulai import modul ini; dipakai untuk laporan startup (import -> ready)
+APP_IMPORT_STARTED = time.perf_counter()
+
+# ML libraries (pandas / NumPy / sklearn / SciPy, ~1-2 detik) tidak di-import di sini supaya
+# server bisa langsung bind dan menjawab /health; ketersediaannya cukup dicek lewat find_spec.
+# Import sebenarnya dikerjakan load_ml_libraries() di builder thread sebelum model pertama dibuat.
+ML_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ('pandas', 'numpy', 'sklearn', 'scipy'))
+ML_IMPORT = {'loaded': False, 'seconds': None, 'error': None}
+_ml_import_lock = threading.Lock()
+
+def load_ml_libraries():
+    """Import ML libraries sekali (idempotent); kalau gagal, service jalan dengan fallback implementations"""
+    global ML_AVAILABLE, pd, np, TfidfVectorizer, sparse, l2_normalize_rows, row_scores, rows_scores, rows_top_k, top_k_indices, transpose_rows
+    global model_store, SearchIndex, ProductStore, streaming_ingest, copurchase
+    with _ml_import_lock:
+        if ML_IMPORT['loaded'] or not ML_AVAILABLE:
+            return ML_AVAILABLE
+        start = time.perf_counter()
+        try:
+            import pandas as pd
+            import numpy as np
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from scipy import sparse
+            from similarity import l2_normalize_rows, row_scores, rows_scores, rows_top_k, top_k_indices, transpose_rows
+            import model_store
+            from search_index import SearchIndex
+            from product_store import ProductStore
+            import streaming_ingest
+            import copurchase
+            print(f"✅ ML libraries loaded successfully ({time.perf_counter() - start:.2f}s)")
+        except ImportError as e:
+            print(f"⚠️ ML libraries not available: {e}")
+            print("🔄 Using fallback implementations...")
+            ML_IMPORT['error'] = str(e)
+            ML_AVAILABLE = False
+        ML_IMPORT['loaded'] = True
+        ML_IMPORT['seconds'] = round(time.perf_counter() - start, 3)
+        return ML_AVAILABLE
 
 app = Flask(__name__)
 CORS(app)
 
+# Parameter TF-IDF; ikut disimpan di manifest bundle supaya perubahan memicu refit
+VECTORIZER_PARAMS = {'stop_words': 'english', 'max_features': 1000}
+# Bobot per field di text TF-IDF ("nama_pakaian=1,categories=1,type=2"); text disusun per kolom
+TEXT_FIELD_WEIGHTS = text_features.parse_weights(os.environ.get('TEXT_FIELD_WEIGHTS', ''))
+# Fraksi token baru yang tidak ada di vocabulary sebelum update incremental memicu full refit
+VOCAB_DRIFT_THRESHOLD = float(os.environ.get('VOCAB_DRIFT_THRESHOLD', '0.2'))
+MODEL_BUNDLE_DIR = os.environ.get(
+    'MODEL_BUNDLE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'tfidf_bundle')
+)
+# 'exact' = cosine ke semua produk, 'ann' = IVF index (ann_index.py) untuk katalog besar
+SIMILARITY_MODE = os.environ.get('SIMILARITY_MODE', 'exact')
+ANN_INDEX_DIR = os.environ.get(
+    'ANN_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'ann')
+)
+ANN_NPROBE = int(os.environ.get('ANN_NPROBE', '16'))
+# Direktori shared snapshot untuk serving multi-process (gunicorn.conf.py); kosong = per-proses
+SHARED_MODEL_DIR = os.environ.get('SHARED_MODEL_DIR', '')
+# CSV sebesar ini (MB) atau lebih di-load per chunk (streaming_ingest.py); 0 = selalu streaming
+STREAMING_INGEST_MIN_MB = float(os.environ.get('STREAMING_INGEST_MIN_MB', '64'))
+INGEST_CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', '20000'))
+INGEST_HASH_FEATURES = int(os.environ.get('INGEST_HASH_FEATURES', str(1 << 20)))
+# Tabel co-purchase dari export order (copurchase.py) dan bobotnya di blend dengan TF-IDF
+COPURCHASE_DIR = os.environ.get(
+    'COPURCHASE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'copurchase')
+)
+COPURCHASE_ALPHA = float(os.environ.get('COPURCHASE_ALPHA', '0.7'))
+# Profil user (user_profiles.py): LRU per proses, half-life recency decay, SQLite opsional
+USER_PROFILE_CACHE_SIZE = int(os.environ.get('USER_PROFILE_CACHE_SIZE', '100000'))
+USER_PROFILE_HALF_LIFE_DAYS = float(os.environ.get('USER_PROFILE_HALF_LIFE_DAYS', '30'))
+USER_PROFILE_DB = os.environ.get('USER_PROFILE_DB', '')
+
+# Fragment JSON per produk di-render saat build (response disambung dari bytes); kompresi
+# response gzip / br mulai RESPONSE_COMPRESS_MIN_BYTES (0 = selalu, -1 = mati)
+PRERENDER_JSON = os.environ.get('PRERENDER_JSON', '1').lower() in ('1', 'true', 'yes')
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', '1024'))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', '5'))
+
+# /debug/profiler (sampling profiler) hanya aktif kalau PROFILER_ENABLED=1
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+# Counter / histogram untuk /metrics; dibuat sebelum model pertama di-build supaya timer tahap ikut tercatat
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'HTTP requests by route, method and status')
+metrics.describe('http_request_duration_seconds', 'HTTP request latency by route')
+metrics.describe('recommendation_stage_seconds', 'Time spent per stage inside a recommendation request')
+metrics.describe('model_build_seconds', 'Model build / reload duration by reason',
+                 buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0))
+
+def catalog_hash(csv_file):
+    """Hash CSV untuk key bundle; bobot field non-default ikut masuk supaya perubahan memicu refit"""
+    return model_store.file_hash(csv_file) + text_features.weights_key(TEXT_FIELD_WEIGHTS)
+
 class ClothingRecommendationEngine:
-    def __init__(self):
+    def __init__(self, autoload=True):
         """
         Full ML-powered recommendation engine yang membaca data dari CSV
         Menggunakan TF-IDF + Cosine Similarity untuk content-based filtering
+
+        Setelah dipublish lewat ModelManager, instance ini diperlakukan immutable;
+        update selalu dikerjakan pada engine baru / hasil clone().
         """
+        load_ml_libraries()
+        # Kolom shared snapshot; df baru dibuat dari sini kalau benar-benar dibutuhkan (lihat df)
+        self._snapshot_columns = None
+        self._snapshot_rows = 0
+        self._df_lock = threading.Lock()
         self.df = None
         self.tfidf_matrix = None
+        self.normalized_matrix = None
+        self.fallback_index = None
         self.vectorizer = None
+        self.name_index = None
+        self.group_index = None
+        self.neighbor_table = None
+        self.ann_index = None
+        self.search_index = None
+        # normalized_matrix.T sebagai CSR, lihat build_search_index
+        self.transposed_matrix = None
+        # Metadata kolumnar (nama / category / type) untuk membangun hasil tanpa df.iloc
+        self.product_store = None
+        # Nama term per kolom vocabulary (lihat build_search_index)
+        self.term_names = None
         self.evaluation = None
+        self.vocab_drift = {'oov_tokens': 0, 'total_tokens': 0}
         
-        # Load data dari CSV
-        self.load_data()
+        # 'first' = produk pertama yang namanya mengandung query (perilaku lama)
+        # 'best'  = exact name > normalized name > prefix > substring
+        self.name_match_mode = os.environ.get('NAME_MATCH_MODE', 'first')
         
-        if self.df is not None and len(self.df) > 0:
-            self.build_model()
-            self.evaluate_model()
-            print(f"✅ Recommendation Engine loaded: {len(self.df)} products")
+        # CSV sumber + content hash, dipakai untuk validasi artifact bundle
+        self.source_path = None
+        self.source_hash = None
+        
+        # Diisi ModelManager saat snapshot dipublish
+        self.generation = 0
+        self.built_at = None
+        self.startup = None
+        
+        if not autoload:
+            return
+        
+        # Load dari bundle (warm start) atau CSV + fit (cold start)
+        start = time.perf_counter()
+        warm_start = self.load_or_build()
+        self.startup = {
+            'mode': 'warm' if warm_start else 'cold',
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+        
+        if self.num_products > 0:
+            print(f"✅ Recommendation Engine loaded: {self.num_products} products ({self.startup['mode']} start, {self.startup['seconds']}s)")
         else:
             print("❌ Failed to load data or no data available")
 
+    @property
+    def df(self):
+        """
+        Katalog sebagai DataFrame (list dict di mode fallback). Engine dari shared snapshot
+        tidak membuatnya saat load: serving memakai product_store dan index yang di-mmap,
+        DataFrame baru dibuat dari kolom snapshot untuk incremental sync / export.
+        """
+        if self._df is None and self._snapshot_columns is not None:
+            with self._df_lock:
+                if self._df is None:
+                    self._df = pd.DataFrame(self._snapshot_columns)
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._snapshot_columns = None
+    
+    @property
+    def num_products(self):
+        """Jumlah produk tanpa membuat DataFrame dari shared snapshot"""
+        if self._df is not None:
+            return len(self._df)
+        return self._snapshot_rows if self._snapshot_columns is not None else 0
+    
+    @classmethod
+    def from_products(cls, products):
+        """Engine baru dari list produk (sync MongoDB), tanpa membaca CSV"""
+        engine = cls(autoload=False)
+        engine.df = pd.DataFrame(products) if ML_AVAILABLE else list(products)
+        if engine.num_products > 0:
+            engine.build_model()
+            engine.evaluate_model()
+        return engine
+    
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Engine baru dari DataFrame per chunk (upload NDJSON), lewat streaming build"""
+        engine = cls(autoload=False)
+        engine.build_model_streaming(chunks)
+        if engine.num_products > 0:
+            engine.evaluate_model()
+        return engine
+    
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Engine dari shared snapshot: CSR matrix, metadata produk (ProductStore), name index,
+        group index dan neighbor table semuanya di-mmap (dibagi antar worker); tidak ada
+        DataFrame atau list / dict per produk di worker. Snapshot lama tanpa file index
+        tersebut: index dibangun dari kolom snapshot seperti sebelumnya.
+        """
+        start = time.perf_counter()
+        manifest = snapshot['manifest']
+        columns = snapshot['columns']
+        engine = cls(autoload=False)
+        engine._snapshot_columns = columns
+        engine._snapshot_rows = manifest['shape'][0]
+        engine.vectorizer = snapshot['vectorizer']
+        engine.tfidf_matrix = snapshot['tfidf_matrix']
+        engine.normalized_matrix = snapshot['normalized_matrix']
+        engine.neighbor_table = snapshot['neighbors']
+        engine.vocab_drift = dict(manifest['vocab_drift'])
+        engine.source_path = manifest['source_path']
+        engine.source_hash = manifest['source_hash']
+        engine.generation = manifest['generation']
+        engine.product_store = snapshot.get('products')
+        if engine.product_store is None:
+            engine.product_store = ProductStore.from_columns(columns['nama_pakaian'], columns['categories'],
+                                                             columns['type'])
+        if snapshot.get('name_index') is not None:
+            store = engine.product_store
+            engine.name_index = ProductNameIndex.from_arrays(
+                Utf8Column(store.name_blob, store.name_offsets), snapshot['name_index'],
+                snapshot['name_grams'], snapshot['name_postings']
+            )
+        else:
+            engine.name_index = ProductNameIndex.from_postings(
+                columns['nama_pakaian'].tolist(), snapshot['name_grams'], snapshot['name_postings']
+            )
+        if snapshot.get('groups') is not None:
+            engine.group_index = GroupIndex.from_export(*snapshot['groups'])
+        else:
+            engine.build_group_index()
+        # IVF index ikut snapshot (dibangun builder); worker tidak pernah k-means / menulis ANN_INDEX_DIR
+        engine.ann_index = snapshot.get('ann') if SIMILARITY_MODE == 'ann' else None
+        engine.build_search_index(transposed=snapshot.get('transposed'))
+        engine.evaluate_model()
+        engine.startup = {'mode': 'shared', 'seconds': round(time.perf_counter() - start, 3)}
+        print(f"✅ Recommendation Engine attached to shared snapshot {manifest['name']}: {engine.num_products} products")
+        return engine
+    
+    def clone(self):
+        """Salinan dangkal untuk copy-on-write update; state yang dimutasi in-place ikut disalin"""
+        other = copy.copy(self)
+        other.vocab_drift = dict(self.vocab_drift)
+        return other
+    
     def normalize_category(self, category):
         """Normalize category names and handle missing categories safely"""
         if not category:
@@ -100,12 +286,12 @@ class ClothingRecommendationEngine:
         
         category_lower = category.lower().strip()
         
-        # Map various category names to standard ones
-        if category_lower in ['men', 'man', 'male', 'pria', 'laki', 'laki-laki']:
+        # Map various category names to standard ones (alias sama dengan GroupIndex)
+        if category_lower in MEN_ALIASES:
             return 'men'
-        elif category_lower in ['women', 'woman', 'female', 'wanita', 'perempuan', 'cewek']:
+        elif category_lower in WOMEN_ALIASES:
             return 'women'
-        elif category_lower in ['kids', 'children', 'child', 'anak', 'anak-anak', 'kid']:
+        elif category_lower in KIDS_ALIASES:
             # Kids category fallback - map to women or men randomly to avoid bias
             import random
             return random.choice(['women', 'men'])
@@ -113,28 +299,36 @@ class ClothingRecommendationEngine:
             # Unknown category - default to general/women (safest choice)
             return 'women'
 
+    def locate_csv(self):
+        """Cari file CSV di berbagai lokasi"""
+        # CATALOG_CSV menimpa pencarian default (mis. katalog sintetis untuk benchmark)
+        if os.environ.get('CATALOG_CSV'):
+            return os.environ['CATALOG_CSV'] if os.path.exists(os.environ['CATALOG_CSV']) else None
+        
+        csv_paths = [
+            'clothing_products.csv',
+            '../clothing_products.csv', 
+            '../../clothing_products.csv',
+            'data/clothing_products.csv',
+            os.path.join(os.path.dirname(__file__), '..', 'clothing_products.csv'),
+            'clothing.csv',
+            '../clothing.csv', 
+            '../../clothing.csv',
+            'data/clothing.csv',
+            os.path.join(os.path.dirname(__file__), '..', 'clothing.csv')
+        ]
+        
+        for path in csv_paths:
+            if os.path.exists(path):
+                return path
+        return None
+    
     def load_data(self):
         """Load data dari CSV file"""
         try:
-            # Cari file CSV di berbagai lokasi
-            csv_paths = [
-                'clothing_products.csv',
-                '../clothing_products.csv', 
-                '../../clothing_products.csv',
-                'data/clothing_products.csv',
-                os.path.join(os.path.dirname(__file__), '..', 'clothing_products.csv'),
-                'clothing.csv',
-                '../clothing.csv', 
-                '../../clothing.csv',
-                'data/clothing.csv',
-                os.path.join(os.path.dirname(__file__), '..', 'clothing.csv')
-            ]
-            
-            csv_file = None
-            for path in csv_paths:
-                if os.path.exists(path):
-                    csv_file = path
-                    break
+            csv_file = self.locate_csv()
+            self.source_path = csv_file
+            self.source_hash = None
             
             if not csv_file:
                 print("⚠️ CSV file not found, creating sample data...")
@@ -145,7 +339,8 @@ class ClothingRecommendationEngine:
             
             if ML_AVAILABLE:
                 # Use pandas if available
-                self.df = pd.read_csv(csv_file, sep=';')
+                self.source_hash = catalog_hash(csv_file)
+                self.df = pd.read_csv(csv_file, sep=';', dtype=model_store.CSV_DTYPES)
             else:
                 # Manual CSV reading
                 data = []
@@ -158,10 +353,10 @@ class ClothingRecommendationEngine:
                 self.df = data
             
             if ML_AVAILABLE:
-                print(f"✅ Loaded {len(self.df)} products from CSV")
+                print(f"✅ Loaded {self.num_products} products from CSV")
                 print(f"📊 Columns: {list(self.df.columns)}")
             else:
-                print(f"✅ Loaded {len(self.df)} products from CSV (manual parsing)")
+                print(f"✅ Loaded {self.num_products} products from CSV (manual parsing)")
                 if self.df:
                     print(f"📊 Keys: {list(self.df[0].keys())}")
             
@@ -170,6 +365,81 @@ class ClothingRecommendationEngine:
             print("🔄 Creating sample data as fallback...")
             self.create_sample_data()
     
+    def load_or_build(self):
+        """
+        Warm start dari artifact bundle kalau hash CSV sumber masih sama;
+        selain itu load CSV, fit TF-IDF, lalu simpan bundle baru.
+        Return True kalau warm start.
+        """
+        if self.load_artifacts():
+            self.evaluate_model()
+            return True
+        
+        csv_file = self.locate_csv()
+        if ML_AVAILABLE and csv_file and os.path.getsize(csv_file) >= STREAMING_INGEST_MIN_MB * 1024 * 1024:
+            # Katalog besar: CSV tidak pernah di-load utuh, model dibangun per chunk
+            self.source_path = csv_file
+            self.source_hash = catalog_hash(csv_file)
+            print(f"📁 Streaming data from: {csv_file} ({INGEST_CHUNK_ROWS} rows per chunk)")
+            self.build_model_streaming(lambda: streaming_ingest.csv_chunks(csv_file, INGEST_CHUNK_ROWS))
+        else:
+            self.load_data()
+            if self.num_products > 0:
+                self.build_model()
+        
+        if self.num_products > 0 and self.tfidf_matrix is not None:
+            self.evaluate_model()
+            self.save_artifacts()
+        return False
+    
+    def load_artifacts(self):
+        """Load model dari bundle di MODEL_BUNDLE_DIR; False kalau bundle tidak ada / basi"""
+        if not ML_AVAILABLE:
+            return False
+        
+        csv_file = self.locate_csv()
+        if not csv_file:
+            return False
+        
+        try:
+            source_hash = catalog_hash(csv_file)
+            bundle = model_store.load_bundle(MODEL_BUNDLE_DIR, source_hash, VECTORIZER_PARAMS)
+        except Exception as e:
+            print(f"⚠️ Could not load model bundle: {e}")
+            return False
+        
+        if bundle is None:
+            return False
+        
+        self.df = bundle['df']
+        self.vectorizer = bundle['vectorizer']
+        self.tfidf_matrix = bundle['tfidf_matrix']
+        self.normalized_matrix = l2_normalize_rows(self.tfidf_matrix)
+        self.build_name_index()
+        self.build_group_index()
+        self.build_product_store()
+        self.build_ann_index()
+        self.build_search_index()
+        self.source_path = csv_file
+        self.source_hash = source_hash
+        
+        print(f"⚡ Loaded model bundle from {MODEL_BUNDLE_DIR} (created {bundle['manifest']['created_at']})")
+        return True
+    
+    def save_artifacts(self):
+        """Simpan model yang baru di-fit sebagai bundle (hanya untuk data dari CSV)"""
+        if not ML_AVAILABLE or self.source_hash is None or self.tfidf_matrix is None:
+            return
+        
+        try:
+            manifest = model_store.save_bundle(
+                MODEL_BUNDLE_DIR, self.vectorizer, self.tfidf_matrix, self.df,
+                self.source_hash, VECTORIZER_PARAMS
+            )
+            print(f"💾 Model bundle saved: {manifest['rows']} x {manifest['vocab_size']}")
+        except Exception as e:
+            print(f"⚠️ Could not save model bundle: {e}")
+    
     def create_sample_data(self):
         """Create sample data jika CSV tidak tersedia"""
         sample_data = [
@@ -200,32 +470,40 @@ class ClothingRecommendationEngine:
     def build_model(self):
         """Build TF-IDF model untuk similarity calculation"""
         try:
-            if self.df is None or len(self.df) == 0:
+            if not self.num_products:
                 print("❌ No data available to build model")
                 return
             
-            # Prepare text data untuk TF-IDF
+            # Gabungkan nama_pakaian, categories, dan type (sesuai TEXT_FIELD_WEIGHTS) jadi satu text
+            text_data = text_features.product_texts(self.df, TEXT_FIELD_WEIGHTS)
+            
+            # Index nama produk untuk lookup O(matches)
+            self.build_name_index()
+            
+            # Build TF-IDF vectorizer (fallback: sparse TF-IDF murni Python)
             if ML_AVAILABLE:
-                # Gabungkan nama_pakaian, categories, dan type jadi satu text
-                text_data = []
-                for _, row in self.df.iterrows():
-                    combined_text = f"{row['nama_pakaian']} {row['categories']} {row['type']}"
-                    text_data.append(combined_text)
+                self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
             else:
-                # Manual text preparation
-                text_data = []
-                for item in self.df:
-                    combined_text = f"{item['nama_pakaian']} {item['categories']} {item['type']}"
-                    text_data.append(combined_text)
-            
-            # Build TF-IDF vectorizer
-            self.vectorizer = TfidfVectorizer(
-                stop_words='english',
-                max_features=1000
-            )
+                self.vectorizer = fallback_tfidf.TfidfVectorizer(**VECTORIZER_PARAMS)
             
             # Fit dan transform text data
             self.tfidf_matrix = self.vectorizer.fit_transform(text_data)
+            self.neighbor_table = None
+            self.search_index = None
+            self.vocab_drift = {'oov_tokens': 0, 'total_tokens': 0}
+            
+            # CSR yang sudah L2-normalized: cosine similarity = sparse dot product
+            if ML_AVAILABLE:
+                self.normalized_matrix = l2_normalize_rows(self.tfidf_matrix)
+            else:
+                # Baris fallback sudah L2-normalized; postings per term untuk scoring
+                self.fallback_index = fallback_tfidf.InvertedIndex(self.tfidf_matrix)
+            
+            # Posisi produk per (category, type) untuk browsing
+            self.build_group_index()
+            self.build_product_store()
+            self.build_ann_index()
+            self.build_search_index()
             
             print("✅ TF-IDF model built successfully")
             print(f"📊 Feature matrix shape: {len(text_data)} x {len(self.vectorizer.vocabulary_) if hasattr(self.vectorizer, 'vocabulary_') else 'N/A'}")
@@ -233,7 +511,156 @@ class ClothingRecommendationEngine:
         except Exception as e:
             print(f"❌ Error building model: {e}")
             self.tfidf_matrix = None
+            self.normalized_matrix = None
+            self.fallback_index = None
+            self.vectorizer = None
+    def build_model_streaming(self, chunks):
+        """
+        Load data + build TF-IDF dari `chunks()` (iterator DataFrame, dipanggil dua kali)
+        tanpa memegang seluruh text / vocabulary mentah; lihat streaming_ingest.py
+        """
+        try:
+            self.df, self.vectorizer, self.tfidf_matrix, stats = streaming_ingest.build_from_chunks(
+                chunks, VECTORIZER_PARAMS, n_features=INGEST_HASH_FEATURES, weights=TEXT_FIELD_WEIGHTS
+            )
+            self.neighbor_table = None
+            self.search_index = None
+            self.vocab_drift = {'oov_tokens': 0, 'total_tokens': 0}
+            self.normalized_matrix = l2_normalize_rows(self.tfidf_matrix)
+            
+            self.build_name_index()
+            self.build_group_index()
+            self.build_product_store()
+            self.build_ann_index()
+            self.build_search_index()
+            
+            print(f"✅ TF-IDF model built from {stats['chunks']} chunks in {stats['seconds']}s")
+            print(f"📊 Feature matrix shape: {stats['rows']} x {stats['vocab_size']}")
+            
+        except Exception as e:
+            print(f"❌ Error building model from stream: {e}")
+            self.tfidf_matrix = None
+            self.normalized_matrix = None
             self.vectorizer = None
+    
+    def product_text(self, product):
+        """Text TF-IDF untuk satu produk: nama + kategori + type (lihat text_features.py)"""
+        return text_features.product_text(product, TEXT_FIELD_WEIGHTS)
+    
+    def apply_product_changes(self, upserts=None, deletes=None):
+        """
+        Update katalog per product id tanpa full rebuild.
+
+        Baris baru / yang berubah di-transform dengan vocabulary yang sudah ada,
+        lalu CSR matrix, matrix ter-normalisasi, dan name index di-patch. Full
+        refit hanya jalan kalau fraksi token di luar vocabulary (kumulatif sejak
+        fit terakhir) melewati VOCAB_DRIFT_THRESHOLD.
+        """
+        upserts = upserts or []
+        deletes = {str(product_id) for product_id in (deletes or [])}
+        
+        if not ML_AVAILABLE or self.df is None or 'id' not in self.df.columns or self.tfidf_matrix is None:
+            return {'error': 'Incremental updates need a trained model with an id column; use /sync/products'}
+        
+        for product in upserts:
+            if 'id' not in product or not all(key in product for key in ('nama_pakaian', 'categories', 'type')):
+                return {'error': 'Every upserted product needs id, nama_pakaian, categories and type'}
+        
+        ids = self.df['id'].astype(str).tolist()
+        positions = {product_id: position for position, product_id in enumerate(ids)}
+        
+        updated = {}
+        added = []
+        for product in upserts:
+            product_id = str(product['id'])
+            if product_id in deletes:
+                continue
+            if product_id in positions:
+                updated[positions[product_id]] = product
+            else:
+                added.append(product)
+        deleted_positions = sorted(positions[product_id] for product_id in deletes if product_id in positions)
+        
+        changed = list(updated.values()) + added
+        
+        # Vocabulary drift: token baru yang tidak dikenal vectorizer lama
+        analyzer = self.vectorizer.build_analyzer()
+        for product in changed:
+            tokens = analyzer(self.product_text(product))
+            self.vocab_drift['total_tokens'] += len(tokens)
+            self.vocab_drift['oov_tokens'] += sum(1 for token in tokens if token not in self.vectorizer.vocabulary_)
+        drift = self.vocab_drift['oov_tokens'] / max(self.vocab_drift['total_tokens'], 1)
+        
+        # Patch DataFrame (urutan baris lama dipertahankan, produk baru di akhir)
+        df = self.df.copy()
+        for position, product in updated.items():
+            for key, value in product.items():
+                if key == 'id':
+                    continue
+                if key not in df.columns:
+                    df[key] = None
+                df.iat[position, df.columns.get_loc(key)] = value
+        if added:
+            df = pd.concat([df, pd.DataFrame(added)], ignore_index=True)
+        
+        keep = np.ones(len(df), dtype=bool)
+        keep[deleted_positions] = False
+        df = df[keep].reset_index(drop=True)
+        
+        summary = {
+            'updated': len(updated),
+            'added': len(added),
+            'deleted': len(deleted_positions),
+            'vocab_drift': round(drift, 4)
+        }
+        
+        if drift > VOCAB_DRIFT_THRESHOLD:
+            print(f"🔄 Vocabulary drift {drift:.1%} > {VOCAB_DRIFT_THRESHOLD:.0%}, full refit")
+            self.df = df
+            self.build_model()
+            self.evaluate_model()
+            return {**summary, 'refit': True}
+        
+        # Transform hanya baris yang berubah dengan vocabulary lama
+        total = self.tfidf_matrix.shape[0]
+        if changed:
+            changed_matrix = self.vectorizer.transform([self.product_text(product) for product in changed])
+            stacked = sparse.vstack([self.tfidf_matrix, changed_matrix], format='csr')
+            stacked_normalized = sparse.vstack(
+                [self.normalized_matrix, l2_normalize_rows(changed_matrix)], format='csr'
+            )
+        else:
+            stacked, stacked_normalized = self.tfidf_matrix, self.normalized_matrix
+        
+        # Urutan baris: baris lama (yang di-update menunjuk ke versi barunya), lalu produk baru
+        order = np.arange(total + len(added))
+        for offset, position in enumerate(updated):
+            order[position] = total + offset
+        order[total:] = total + len(updated) + np.arange(len(added))
+        order = order[keep]
+        
+        self.tfidf_matrix = stacked[order]
+        self.normalized_matrix = stacked_normalized[order]
+        self.neighbor_table = None  # posisi baris berubah; table baru ikut build penuh berikutnya
+        self.search_index = None
+        self.df = df
+        
+        # Produk baru saja -> extend index; update/delete menggeser posisi -> rebuild
+        if updated or deleted_positions or self.name_index is None:
+            self.build_name_index()
+        else:
+            # Index lama masih dipakai snapshot yang sedang dilayani, jadi extend salinannya
+            self.name_index = self.name_index.copy()
+            self.name_index.extend(product['nama_pakaian'] for product in added)
+        self.build_group_index()
+        self.build_product_store()
+        # Posisi baris berubah -> IVF index lama stale; /similar exact sampai build penuh berikutnya
+        self.ann_index = None
+        self.build_search_index()
+        
+        self.evaluate_model()
+        return {**summary, 'refit': False}
+    
     def evaluate_model(self):
         """Evaluate model performance"""
         try:
@@ -246,11 +673,11 @@ class ClothingRecommendationEngine:
             
             # Basic evaluation metrics
             if ML_AVAILABLE:
-                num_products = len(self.df)
+                num_products = self.num_products
                 num_features = self.tfidf_matrix.shape[1] if hasattr(self.tfidf_matrix, 'shape') else len(self.vectorizer.vocabulary_)
             else:
-                num_products = len(self.df)
-                num_features = len(self.vectorizer.vocabulary) if hasattr(self.vectorizer, 'vocabulary') else 100
+                num_products = self.num_products
+                num_features = len(self.vectorizer.vocabulary_)
             
             # Calculate performance score
             coverage_score = min(num_products / 100, 1.0) * 40  # Max 40 points for product coverage
@@ -303,145 +730,562 @@ class ClothingRecommendationEngine:
                 'final_grade': {'grade': 'F', 'score': 0}
             }
     
-    def get_recommendations_by_product_name(self, product_name, n=5):
-        """Cari rekomendasi berdasarkan nama produk menggunakan ML similarity"""
+    def build_name_index(self):
+        """Build hash + trigram index untuk lookup nama produk"""
+        if ML_AVAILABLE:
+            names = self.df['nama_pakaian'].tolist()
+        else:
+            names = [item['nama_pakaian'] for item in self.df]
+        self.name_index = ProductNameIndex(names)
+    
+    def build_product_store(self):
+        """Build columnar store metadata produk dari df (hanya mode ML; fallback memakai list dict)"""
+        self.product_store = ProductStore.from_frame(self.df) if ML_AVAILABLE else None
+        if self.product_store is not None and PRERENDER_JSON:
+            self.product_store.prerender()
+        return self.product_store
+    
+    def product_rows(self, indices):
+        """[{'nama_pakaian', 'categories', 'type'}] untuk posisi `indices`, urutan dipertahankan"""
+        if not ML_AVAILABLE:
+            return [
+                {'nama_pakaian': self.df[idx]['nama_pakaian'], 'categories': self.df[idx]['categories'],
+                 'type': self.df[idx]['type']}
+                for idx in indices
+            ]
+        return self.product_store.rows(indices)
+    
+    def render_rows(self, indices, scores=None):
+        """
+        Seperti product_rows (+ similarity_score / match_percentage kalau ada `scores`),
+        tapi langsung sebagai json_render.RawJSON dari fragment yang sudah di-render
+        """
+        if not ML_AVAILABLE:
+            rows = self.product_rows(indices)
+            if scores is not None:
+                for product, score in zip(rows, scores):
+                    product['similarity_score'] = round(float(score), 3)
+                    product['match_percentage'] = round(float(score) * 100, 1)
+            return json_render.RawJSON(json_render.dumps_value(rows))
+        return self.product_store.render_rows(indices, scores)
+    
+    def build_group_index(self):
+        """
+        Build index posisi per (category, type) beserta ranking opsional:
+        centrality = cosine ke centroid katalog, popularity = kolom 'popularity' kalau ada
+        """
+        if ML_AVAILABLE:
+            scores = {}
+            if self.normalized_matrix is not None and self.normalized_matrix.shape[0] > 0:
+                centroid = np.asarray(self.normalized_matrix.mean(axis=0)).ravel()
+                scores['centrality'] = (self.normalized_matrix @ centroid).tolist()
+            if 'popularity' in self.df.columns:
+                scores['popularity'] = pd.to_numeric(self.df['popularity'], errors='coerce').fillna(0).tolist()
+            self.group_index = GroupIndex(self.df['categories'].tolist(), self.df['type'].tolist(), scores)
+        else:
+            self.group_index = GroupIndex(
+                [item['categories'] for item in self.df],
+                [item['type'] for item in self.df]
+            )
+    
+    def build_ann_index(self):
+        """
+        Mode SIMILARITY_MODE=ann: pakai IVF index di ANN_INDEX_DIR kalau dibangun dari
+        matrix yang sama, selain itu build ulang lalu simpan. Mode exact: tanpa index.
+        Hanya untuk build penuh di builder; update incremental menandai index stale (None).
+        """
+        self.ann_index = None
+        if SIMILARITY_MODE != 'ann' or not ML_AVAILABLE or self.normalized_matrix is None:
+            return
+        
+        from ann_index import IVFIndex, matrix_fingerprint
+        
+        index = IVFIndex.load(ANN_INDEX_DIR, fingerprint=matrix_fingerprint(self.normalized_matrix))
+        if index is None:
+            index = IVFIndex.build(
+                self.normalized_matrix,
+                n_lists=int(os.environ['ANN_LISTS']) if os.environ.get('ANN_LISTS') else None,
+                dim=int(os.environ['ANN_DIM']) if os.environ.get('ANN_DIM') else None
+            )
+            try:
+                index.save(ANN_INDEX_DIR)
+            except OSError as e:
+                print(f"⚠️ Could not save ANN index: {e}")
+            print(f"🧭 ANN index built: {index.meta['lists']} lists, dim {index.meta['dim']} ({index.meta['build_seconds']}s)")
+        self.ann_index = index
+    
+    def build_search_index(self, transposed=None):
+        """
+        Transpose CSR normalized_matrix (V x N; dipakai batch scoring dan SearchIndex), index untuk
+        /search dan nama term per kolom vocabulary (profil user). `transposed` dari shared snapshot
+        (mmap) dipakai apa adanya. Dibangun di builder sebelum snapshot dipublish; request thread
+        tidak pernah memutasi engine.
+        """
+        self.transposed_matrix = None
+        self.search_index = None
+        if ML_AVAILABLE and self.normalized_matrix is not None:
+            self.transposed_matrix = transposed if transposed is not None else transpose_rows(self.normalized_matrix)
+            self.search_index = SearchIndex(self.normalized_matrix, transposed=self.transposed_matrix)
+        self.term_names = None
+        if self.vectorizer is not None and hasattr(self.vectorizer, 'vocabulary_'):
+            self.term_names = [None] * len(self.vectorizer.vocabulary_)
+            for term, column in self.vectorizer.vocabulary_.items():
+                self.term_names[column] = term
+    
+    def find_product(self, product_name, first_match=None):
+        """Cari posisi produk lewat name index; first_match=None ikut NAME_MATCH_MODE"""
+        if first_match is None:
+            first_match = self.name_match_mode != 'best'
+        
+        product_idx = self.name_index.lookup(product_name, first_match=first_match)
+        if product_idx is None:
+            return None, None
+        
+        product = self.product_rows([product_idx])[0]
+        return product_idx, {
+            'nama_pakaian': product['nama_pakaian'],
+            'categories': self.normalize_category(product['categories']),
+            'type': product['type']
+        }
+    
+    def score_similar_rows(self, rows, ns):
+        """
+        Top-n tetangga untuk beberapa baris sekaligus (dipakai micro-batcher), lewat
+        similarity.rows_top_k dengan transpose CSR yang dibangun bersama snapshot.
+        Return list (indices, scores) dengan urutan yang sama dengan rows.
+        """
+        return rows_top_k(self.normalized_matrix, rows, ns, transposed=self.transposed_matrix)
+    
+    def get_recommendations_by_product_name(self, product_name, n=5, first_match=None, batcher=None, render=False):
+        """
+        Cari rekomendasi berdasarkan nama produk menggunakan ML similarity.
+        Dengan `batcher` (MicroBatcher), scoring digabung dengan request lain yang datang bersamaan.
+        render=True: 'recommendations' berupa RawJSON (disambung dari fragment) untuk json_render.dumps.
+        """
         try:
-            if self.df is None or len(self.df) == 0:
+            if not self.num_products:
                 return {'error': 'No data available'}
             
             if self.tfidf_matrix is None:
                 return {'error': 'Model not trained'}
             
             # Find product dalam dataset
-            product_idx = None
-            reference_product = None
-            
-            if ML_AVAILABLE:
-                for idx, row in self.df.iterrows():
-                    if product_name.lower() in row['nama_pakaian'].lower():
-                        product_idx = idx
-                        reference_product = {
-                            'nama_pakaian': row['nama_pakaian'],
-                            'categories': self.normalize_category(row['categories']),
-                            'type': row['type']
-                        }
-                        break
-            else:
-                for idx, item in enumerate(self.df):
-                    if product_name.lower() in item['nama_pakaian'].lower():
-                        product_idx = idx
-                        reference_product = {
-                            'nama_pakaian': item['nama_pakaian'],
-                            'categories': self.normalize_category(item['categories']),
-                            'type': item['type']
-                        }
-                        break
+            with metrics.stage('similar', 'lookup'):
+                product_idx, reference_product = self.find_product(product_name, first_match=first_match)
             
             if product_idx is None:
                 return {'error': f'Product "{product_name}" not found in dataset'}
             
-            # Calculate similarity dengan semua produk
-            if ML_AVAILABLE and hasattr(self.tfidf_matrix, 'toarray'):
-                # Pandas + sklearn version
-                cosine_sim = cosine_similarity(self.tfidf_matrix[product_idx:product_idx+1], self.tfidf_matrix).flatten()
+            # Calculate similarity dengan semua produk, lalu top N (exclude the product itself by index).
+            # Jalur yang menggabungkan scoring dan top-k (neighbor table, ann, batcher) dicatat sebagai 'score'
+            if ML_AVAILABLE and self.neighbor_table is not None and n <= self.neighbor_table.k:
+                # Shared snapshot: top-K tetangga sudah dihitung, cukup baca satu baris mmap
+                with metrics.stage('similar', 'score'):
+                    similar_indices, similar_scores = self.neighbor_table.neighbors(product_idx, n)
+            elif ML_AVAILABLE and self.ann_index is not None:
+                # Mode ann: kandidat dari nprobe inverted list, di-rerank dengan cosine exact
+                with metrics.stage('similar', 'score'):
+                    similar_indices, similar_scores = self.ann_index.search_row(
+                        self.normalized_matrix, product_idx, n, nprobe=ANN_NPROBE, exclude=[product_idx]
+                    )
+            elif ML_AVAILABLE and self.normalized_matrix is not None and batcher is not None:
+                with metrics.stage('similar', 'score'):
+                    similar_indices, similar_scores = batcher.submit((self, product_idx, n))
+            elif ML_AVAILABLE and self.normalized_matrix is not None:
+                # Pandas + sklearn version: dot product terhadap matrix yang sudah dinormalisasi
+                with metrics.stage('similar', 'score'):
+                    cosine_sim = row_scores(self.normalized_matrix, product_idx)
+                with metrics.stage('similar', 'topk'):
+                    similar_indices = top_k_indices(cosine_sim, n, exclude=[product_idx])
+                    similar_scores = cosine_sim[similar_indices]
             else:
-                # Fallback version
-                target_vector = self.tfidf_matrix[product_idx]
-                similarities = []
-                for vector in self.tfidf_matrix:
-                    # Calculate cosine similarity
-                    dot_product = sum(a * b for a, b in zip(target_vector, vector))
-                    norm1 = sum(a * a for a in target_vector) ** 0.5
-                    norm2 = sum(b * b for b in vector) ** 0.5
-                    
-                    if norm1 == 0 or norm2 == 0:
-                        similarity = 0
-                    else:
-                        similarity = dot_product / (norm1 * norm2)
-                    
-                    similarities.append(similarity)
-                cosine_sim = similarities
+                # Fallback version: inverted index, hanya produk yang berbagi term yang di-score
+                with metrics.stage('similar', 'score'):
+                    cosine_sim = self.fallback_index.score(self.tfidf_matrix[product_idx])
+                with metrics.stage('similar', 'topk'):
+                    similar_indices = fallback_tfidf.top_k(cosine_sim, n, self.num_products, exclude=[product_idx])
+                    similar_scores = [cosine_sim.get(idx, 0.0) for idx in similar_indices]
             
-            # Get top N similar products (exclude the product itself)
-            if ML_AVAILABLE:
-                similar_indices = cosine_sim.argsort()[::-1][1:n+1]
+            # Build recommendations
+            with metrics.stage('similar', 'serialize'):
+                if render:
+                    recommendations = self.render_rows(similar_indices, similar_scores)
+                else:
+                    recommendations = self.product_rows(similar_indices)
+                    for product, similarity_score in zip(recommendations, similar_scores):
+                        similarity_score = float(similarity_score)
+                        product['similarity_score'] = round(similarity_score, 3)
+                        product['match_percentage'] = round(similarity_score * 100, 1)
+            
+            return {
+                'reference_product': reference_product,
+                'recommendations': recommendations,
+                'total': len(similar_indices),
+                'algorithm': 'TF-IDF + Cosine Similarity'
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in get_recommendations_by_product_name: {e}")
+            return {'error': str(e)}
+    
+    def get_recommendations_batch(self, product_names, weights=None, n=10, merge='max'):
+        """
+        Rekomendasi untuk banyak produk sekaligus (cart / purchase history).
+        Semua seed di-score dengan satu sparse matrix multiply, lalu hasilnya
+        di-merge (max atau weighted mean), dedup, dan diambil top-n.
+        """
+        try:
+            if not self.num_products:
+                return {'error': 'No data available'}
+            
+            if self.tfidf_matrix is None:
+                return {'error': 'Model not trained'}
+            
+            if weights is None:
+                weights = [1.0] * len(product_names)
+            if len(weights) != len(product_names):
+                return {'error': 'weights must have the same length as product_names'}
+            if merge not in ('max', 'mean'):
+                return {'error': f'Unknown merge mode "{merge}"'}
+            
+            # Resolve seeds; nama yang menunjuk ke produk yang sama digabung (bobot terbesar dipakai)
+            seeds = []
+            seed_position = {}
+            not_found = []
+            for product_name, weight in zip(product_names, weights):
+                product_idx, reference_product = self.find_product(product_name)
+                if product_idx is None:
+                    not_found.append(product_name)
+                    continue
+                if product_idx in seed_position:
+                    seed = seeds[seed_position[product_idx]]
+                    seed['weight'] = max(seed['weight'], float(weight))
+                    continue
+                seed_position[product_idx] = len(seeds)
+                seeds.append({
+                    'query': product_name,
+                    'index': product_idx,
+                    'weight': float(weight),
+                    'reference_product': reference_product
+                })
+            
+            if not seeds:
+                return {'error': 'None of the products were found in dataset', 'not_found': not_found}
+            
+            seed_indices = [seed['index'] for seed in seeds]
+            seed_weights = [seed['weight'] for seed in seeds]
+            
+            if ML_AVAILABLE and self.normalized_matrix is not None:
+                # Satu sparse product untuk semua seed: (seeds x V) @ (V x N)
+                seed_scores = rows_scores(self.normalized_matrix, seed_indices, transposed=self.transposed_matrix)
+                weighted = seed_scores * np.asarray(seed_weights)[:, None]
+                if merge == 'max':
+                    combined = weighted.max(axis=0)
+                else:
+                    combined = weighted.sum(axis=0) / max(sum(seed_weights), 1e-12)
+                candidate_indices = [int(i) for i in top_k_indices(combined, n, exclude=seed_indices)]
             else:
-                # Manual sorting for fallback
-                indexed_similarities = [(i, sim) for i, sim in enumerate(cosine_sim)]
-                indexed_similarities.sort(key=lambda x: x[1], reverse=True)
-                similar_indices = [i for i, sim in indexed_similarities[1:n+1]]
+                # Fallback version: skor sparse (dict) per seed dari inverted index
+                seed_scores = [self.fallback_index.score(self.tfidf_matrix[seed_idx]) for seed_idx in seed_indices]
+                combined = {}
+                for scores, weight in zip(seed_scores, seed_weights):
+                    for idx, score in scores.items():
+                        if merge == 'max':
+                            combined[idx] = max(combined.get(idx, 0.0), score * weight)
+                        else:
+                            combined[idx] = combined.get(idx, 0.0) + score * weight / max(sum(seed_weights), 1e-12)
+                candidate_indices = fallback_tfidf.top_k(combined, n, self.num_products, exclude=seed_indices)
             
-            # Build recommendations
             recommendations = []
-            for idx in similar_indices:
-                if ML_AVAILABLE:
-                    product = self.df.iloc[idx]
-                    similarity_score = cosine_sim[idx]
-                else:
-                    product = self.df[idx]
-                    similarity_score = cosine_sim[idx]
+            for idx, product in zip(candidate_indices, self.product_rows(candidate_indices)):
+                # Attribution: kontribusi tiap seed ke skor item ini
+                contributions = []
+                for position, seed in enumerate(seeds):
+                    if ML_AVAILABLE:
+                        score = float(seed_scores[position][idx])
+                    else:
+                        score = seed_scores[position].get(idx, 0.0)
+                    if score > 0:
+                        contributions.append({
+                            'product_name': seed['query'],
+                            'similarity_score': round(score, 3),
+                            'weight': seed['weight']
+                        })
+                contributions.sort(key=lambda c: c['similarity_score'] * c['weight'], reverse=True)
                 
+                similarity_score = float(combined[idx]) if ML_AVAILABLE else combined.get(idx, 0.0)
                 recommendations.append({
                     'nama_pakaian': product['nama_pakaian'],
                     'categories': product['categories'],
                     'type': product['type'],
-                    'similarity_score': round(float(similarity_score), 3),
-                    'match_percentage': round(float(similarity_score) * 100, 1)
+                    'similarity_score': round(similarity_score, 3),
+                    'match_percentage': round(similarity_score * 100, 1),
+                    'based_on': contributions[0]['product_name'] if contributions else None,
+                    'attribution': contributions
                 })
             
             return {
-                'reference_product': reference_product,
+                'seeds': [
+                    {
+                        'product_name': seed['query'],
+                        'weight': seed['weight'],
+                        'reference_product': seed['reference_product']
+                    }
+                    for seed in seeds
+                ],
+                'not_found': not_found,
                 'recommendations': recommendations,
                 'total': len(recommendations),
+                'merge': merge,
                 'algorithm': 'TF-IDF + Cosine Similarity'
             }
             
         except Exception as e:
-            print(f"❌ Error in get_recommendations_by_product_name: {e}")
+            print(f"❌ Error in get_recommendations_batch: {e}")
             return {'error': str(e)}
     
-    def get_recommendations_by_category_type(self, category, product_type, n=8):
-        """Cari rekomendasi berdasarkan category dan type"""
+    def get_bought_together(self, product_names, copurchase_model=None, n=6, alpha=COPURCHASE_ALPHA):
+        """
+        "Sering dibeli bersama": skor co-purchase di-blend dengan cosine TF-IDF per seed,
+            skor = alpha * co-purchase + (1 - alpha) * TF-IDF
+        Seed tanpa data co-purchase (produk baru / belum ada order) memakai TF-IDF saja.
+        Banyak seed di-merge dengan max; seed sendiri tidak ikut direkomendasikan.
+        """
         try:
-            if self.df is None or len(self.df) == 0:
+            if not self.num_products:
                 return {'error': 'No data available'}
             
-            # Filter products berdasarkan category
+            if not ML_AVAILABLE or self.normalized_matrix is None:
+                return {'error': 'Model not trained'}
+            
+            if not 0.0 <= alpha <= 1.0:
+                return {'error': 'alpha must be between 0 and 1'}
+            
+            seeds = []
+            not_found = []
+            for product_name in product_names:
+                product_idx, reference_product = self.find_product(product_name)
+                if product_idx is None:
+                    not_found.append(product_name)
+                elif product_idx not in [seed['index'] for seed in seeds]:
+                    seeds.append({'query': product_name, 'index': product_idx, 'reference_product': reference_product})
+            
+            if not seeds:
+                return {'error': 'None of the products were found in dataset', 'not_found': not_found}
+            
+            seed_indices = [seed['index'] for seed in seeds]
+            content = rows_scores(self.normalized_matrix, seed_indices, transposed=self.transposed_matrix)
+            copurchased = np.zeros_like(content)
+            support = np.zeros(content.shape, dtype=np.int32)
+            blended = np.empty_like(content)
+            for position, seed in enumerate(seeds):
+                neighbors = copurchase_model.neighbors_of(seed['reference_product']['nama_pakaian']) \
+                    if copurchase_model is not None else []
+                # Tetangga co-purchase dipetakan ke posisi katalog lewat nama (exact, lowercase)
+                for name, score, count in neighbors:
+                    idx = self.name_index.exact.get(str(name).lower())
+                    if idx is not None:
+                        copurchased[position, idx] = score
+                        support[position, idx] = count
+                seed['copurchase_neighbors'] = int(np.count_nonzero(copurchased[position]))
+                seed_alpha = alpha if seed['copurchase_neighbors'] else 0.0
+                blended[position] = seed_alpha * copurchased[position] + (1 - seed_alpha) * content[position]
+            
+            combined = blended.max(axis=0)
+            best_seed = blended.argmax(axis=0)
+            
+            recommendations = []
+            candidate_indices = top_k_indices(combined, n, exclude=seed_indices)
+            for idx, product in zip(candidate_indices.tolist(), self.product_rows(candidate_indices)):
+                seed_position = int(best_seed[idx])
+                score = float(combined[idx])
+                recommendations.append({
+                    'nama_pakaian': product['nama_pakaian'],
+                    'categories': product['categories'],
+                    'type': product['type'],
+                    'similarity_score': round(score, 3),
+                    'match_percentage': round(score * 100, 1),
+                    'copurchase_score': round(float(copurchased[seed_position, idx]), 3),
+                    'content_score': round(float(content[seed_position, idx]), 3),
+                    'support': int(support[seed_position, idx]),
+                    'source': 'copurchase' if copurchased[seed_position, idx] > 0 else 'content',
+                    'based_on': seeds[seed_position]['query']
+                })
+            
+            return {
+                'seeds': [
+                    {
+                        'product_name': seed['query'],
+                        'reference_product': seed['reference_product'],
+                        'copurchase_neighbors': seed['copurchase_neighbors']
+                    }
+                    for seed in seeds
+                ],
+                'not_found': not_found,
+                'recommendations': recommendations,
+                'total': len(recommendations),
+                'alpha': alpha,
+                'algorithm': 'Item-to-item co-purchase + TF-IDF hybrid'
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in get_bought_together: {e}")
+            return {'error': str(e)}
+    
+    def item_terms(self, product_idx):
+        """Vektor TF-IDF (L2-normalized) satu produk sebagai {term: bobot}, untuk profil user"""
+        names = self.term_names
+        if ML_AVAILABLE:
+            row = self.normalized_matrix[product_idx]
+            return {names[column]: float(weight) for column, weight in zip(row.indices, row.data)}
+        return {names[column]: weight for column, weight in self.tfidf_matrix[product_idx].items()}
+    
+    def get_user_recommendations(self, profile, n=10):
+        """
+        Rekomendasi personal dari profil user (user_profiles.py): satu sparse dot product
+        profil x katalog lalu top-k, tanpa produk yang sudah dibeli user.
+        """
+        try:
+            if not self.num_products:
+                return {'error': 'No data available'}
+            
+            if self.vectorizer is None or self.tfidf_matrix is None:
+                return {'error': 'Model not trained'}
+            
+            # Term profil dipetakan ke kolom vocabulary saat ini; term yang hilang setelah refit dibuang
+            vocabulary = self.vectorizer.vocabulary_
+            weights = {}
+            for term, weight in profile['terms'].items():
+                column = vocabulary.get(term)
+                if column is not None:
+                    weights[column] = weights.get(column, 0.0) + weight
+            norm = sum(weight * weight for weight in weights.values()) ** 0.5 or 1.0
+            columns = sorted(weights)
+            purchased = [self.name_index.exact[name] for name in profile['purchased'] if name in self.name_index.exact]
+            
             if ML_AVAILABLE:
-                filtered_df = self.df[self.df['categories'].str.lower() == category.lower()]
-                
-                if len(filtered_df) == 0:
-                    # Fallback ke semua kategori
-                    filtered_df = self.df
-                
-                recommendations = []
-                for _, product in filtered_df.head(n).iterrows():
-                    recommendations.append({
-                        'nama_pakaian': product['nama_pakaian'],
-                        'categories': product['categories'],
-                        'type': product['type']
-                    })
+                query = np.zeros(self.normalized_matrix.shape[1])
+                query[columns] = [weights[column] / norm for column in columns]
+                scores = self.normalized_matrix @ query
+                indices = top_k_indices(scores, n, exclude=purchased)
+                scored = [(int(idx), float(scores[idx])) for idx in indices]
             else:
-                # Manual filtering for fallback
-                filtered_products = [
-                    product for product in self.df
-                    if product['categories'].lower() == category.lower()
-                ]
-                
-                if not filtered_products:
-                    filtered_products = self.df
-                
-                recommendations = []
-                for product in filtered_products[:n]:
-                    recommendations.append({
-                        'nama_pakaian': product['nama_pakaian'],
-                        'categories': product['categories'],
-                        'type': product['type']
-                    })
+                # Fallback version: profil sebagai SparseRow lewat inverted index
+                from array import array
+                query = fallback_tfidf.SparseRow(array('i', columns), array('d', [weights[c] / norm for c in columns]))
+                scores = self.fallback_index.score(query)
+                scored = [(idx, scores.get(idx, 0.0)) for idx in fallback_tfidf.top_k(scores, n, self.num_products, exclude=purchased)]
+            
+            recommendations = []
+            for (_, score), product in zip(scored, self.product_rows([idx for idx, _ in scored])):
+                recommendations.append({
+                    'nama_pakaian': product['nama_pakaian'],
+                    'categories': product['categories'],
+                    'type': product['type'],
+                    'similarity_score': round(score, 3),
+                    'match_percentage': round(score * 100, 1)
+                })
             
             return {
                 'recommendations': recommendations,
                 'total': len(recommendations),
+                'profile_terms': len(columns),
+                'excluded_purchased': len(purchased),
+                'algorithm': 'TF-IDF user profile + Cosine Similarity'
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in get_user_recommendations: {e}")
+            return {'error': str(e)}
+    
+    def search(self, query, n=10, category=None, product_type=None):
+        """
+        Free-text search: query di-vectorize dengan vectorizer yang sudah di-fit lalu
+        di-score lewat inverted index (SearchIndex, MaxScore); filter category / type
+        diterapkan di dalam index, bukan setelah scoring.
+        """
+        try:
+            if not self.num_products:
+                return {'error': 'No data available'}
+            
+            if self.vectorizer is None or self.tfidf_matrix is None:
+                return {'error': 'Model not trained'}
+            
+            filter_key = (
+                tuple(category_keys(category)) if category else None,
+                type_key(product_type) if product_type else None
+            )
+            filter_positions = lambda: self.group_index.filter_positions(category or None, product_type or None)
+            
+            if ML_AVAILABLE:
+                allowed = None
+                if category or product_type:
+                    allowed = self.search_index.allowed(filter_key, filter_positions)
+                query_vector = self.vectorizer.transform([query])
+                indices, scores, stats = self.search_index.search(query_vector, k=n, allowed=allowed)
+            else:
+                # Fallback version: inverted index murni Python, filter sebagai set posisi
+                scored = self.fallback_index.score(self.vectorizer.transform([query])[0])
+                if category or product_type:
+                    allowed = set(filter_positions())
+                    scored = {idx: score for idx, score in scored.items() if idx in allowed}
+                # Hanya dokumen yang cocok dengan query; tanpa padding skor 0 seperti top_k similar
+                ranked = heapq.nsmallest(n, ((-score, idx) for idx, score in scored.items()))
+                indices = [idx for _, idx in ranked]
+                scores = [-score for score, _ in ranked]
+                stats = {'candidates': len(scored)}
+            
+            results = []
+            for score, product in zip(scores, self.product_rows(indices)):
+                results.append({
+                    'nama_pakaian': product['nama_pakaian'],
+                    'categories': product['categories'],
+                    'type': product['type'],
+                    'similarity_score': round(float(score), 3),
+                    'match_percentage': round(float(score) * 100, 1)
+                })
+            
+            return {
+                'query': query,
+                'results': results,
+                'total': len(results),
+                'filters': {'category': category, 'type': product_type},
+                'stats': stats,
+                'algorithm': 'TF-IDF inverted index + MaxScore'
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in search: {e}")
+            return {'error': str(e)}
+    
+    def get_recommendations_by_category_type(self, category, product_type, n=8, offset=0, rank='catalog',
+                                              render=False):
+        """
+        Cari rekomendasi berdasarkan category dan type lewat GroupIndex (O(1) lookup).
+        Kalau type tidak ada di category itu, fallback ke category saja, lalu ke semua produk.
+        render=True: 'recommendations' berupa RawJSON (lihat get_recommendations_by_product_name).
+        """
+        try:
+            if not self.num_products:
+                return {'error': 'No data available'}
+            
+            if rank not in self.group_index.available_rankings():
+                return {'error': f'Unknown ranking "{rank}", available: {self.group_index.available_rankings()}'}
+            
+            positions, fallback = self.group_index.lookup(category, product_type, rank=rank)
+            page = list(positions[offset:offset + n])
+            
+            recommendations = self.render_rows(page) if render else self.product_rows(page)
+            
+            return {
+                'recommendations': recommendations,
+                'total': len(page),
+                'total_matches': len(positions),
+                'offset': offset,
+                'limit': n,
+                'has_more': offset + len(page) < len(positions),
+                'rank': rank,
+                'fallback': fallback,
                 'category': category,
                 'type': product_type
             }
@@ -450,26 +1294,262 @@ class ClothingRecommendationEngine:
             print(f"❌ Error in get_recommendations_by_category_type: {e}")
             return {'error': str(e)}
 
-# Initialize engine
-engine = ClothingRecommendationEngine()
+def build_startup_engine(manager):
+    """
+    Build snapshot pertama (dijalankan di builder thread lewat model_manager.start).
+    Tanpa SHARED_MODEL_DIR: build / warm start per proses seperti biasa.
+    Dengan SHARED_MODEL_DIR: attach ke snapshot aktif (diekspor master gunicorn),
+    atau build sekali lalu ekspor kalau belum ada; snapshot baru dari worker lain diikuti.
+    """
+    if not load_ml_libraries() or not SHARED_MODEL_DIR:
+        engine = ClothingRecommendationEngine()
+    else:
+        from shared_model import SharedModelStore
+        
+        store = SharedModelStore(
+            SHARED_MODEL_DIR,
+            ClothingRecommendationEngine.from_snapshot,
+            params=VECTORIZER_PARAMS,
+            neighbors_k=int(os.environ.get('SHARED_NEIGHBORS_K', '20')),
+            keep=int(os.environ.get('SHARED_MODEL_KEEP', '2')),
+            poll_interval=float(os.environ.get('SHARED_MODEL_POLL', '1'))
+        )
+        engine = store.load()
+        if engine is None:
+            engine = store.share(ClothingRecommendationEngine())
+        manager.store = store
+        store.watch(manager)
+    
+    # Laporan startup: import ML libraries + total waktu sejak modul app mulai di-import
+    engine.startup = {
+        **(engine.startup or {}),
+        'ml_import_seconds': ML_IMPORT['seconds'],
+        'ready_seconds': round(time.perf_counter() - APP_IMPORT_STARTED, 3)
+    }
+    return engine
+
+# Request selalu membaca model_manager.current (satu snapshot utuh); snapshot pertama
+# dibangun di background (lihat start_model_manager di bawah), sampai itu state = 'starting'
+model_manager = ModelManager()
+
+# Cache hasil rekomendasi, key memuat generation model; dikosongkan tiap snapshot baru
+result_cache = ResultCache(
+    maxsize=int(os.environ.get('RESULT_CACHE_SIZE', '1024')),
+    ttl=float(os.environ.get('RESULT_CACHE_TTL', '300')),
+    backend=create_backend(os.environ.get('RESULT_CACHE_BACKEND', ''))
+)
+model_manager.listeners.append(lambda engine: result_cache.clear())
+
+def score_similar_batch(items):
+    """Proses satu micro-batch (engine, product_idx, n); dikelompokkan per snapshot engine"""
+    groups = {}
+    for position, (engine, product_idx, n) in enumerate(items):
+        groups.setdefault(id(engine), (engine, []))[1].append((position, product_idx, n))
+    
+    results = [None] * len(items)
+    for engine, members in groups.values():
+        scored = engine.score_similar_rows([row for _, row, _ in members], [n for _, _, n in members])
+        for (position, _, _), result in zip(members, scored):
+            results[position] = result
+    return results
+
+# Micro-batching untuk /recommendations/similar; SIMILAR_BATCH_SIZE <= 1 mematikannya
+SIMILAR_BATCH_SIZE = int(os.environ.get('SIMILAR_BATCH_SIZE', '32'))
+similar_batcher = MicroBatcher(
+    score_similar_batch,
+    max_wait_ms=float(os.environ.get('SIMILAR_BATCH_WAIT_MS', '2')),
+    max_batch_size=SIMILAR_BATCH_SIZE,
+    name='similar-batcher'
+) if ML_AVAILABLE and SIMILAR_BATCH_SIZE > 1 else None
+
+# Model co-purchase dibaca dari COPURCHASE_DIR; di-load ulang kalau meta.json berubah
+# (rebuild dari worker lain / CLI), jadi semua worker gunicorn mengikuti tabel terbaru
+copurchase_state = {'model': None, 'mtime': None}
+
+def current_copurchase():
+    if not ML_AVAILABLE:
+        return None
+    try:
+        mtime = os.path.getmtime(os.path.join(COPURCHASE_DIR, copurchase.META_FILE))
+    except OSError:
+        return None
+    if mtime != copurchase_state['mtime']:
+        copurchase_state['model'] = copurchase.CoPurchaseModel.load(COPURCHASE_DIR)
+        copurchase_state['mtime'] = mtime
+    return copurchase_state['model']
+
+user_profiles = UserProfileStore(
+    maxsize=USER_PROFILE_CACHE_SIZE,
+    half_life_days=USER_PROFILE_HALF_LIFE_DAYS,
+    path=USER_PROFILE_DB or None
+)
+
+def record_model_build(engine):
+    """Listener: durasi build / reload dari snapshot yang baru dipublish"""
+    build = model_manager.last_build
+    if build and build['seconds'] is not None:
+        metrics.observe('model_build_seconds', {'reason': build['reason']}, build['seconds'])
+
+model_manager.listeners.append(record_model_build)
+
+def model_size(engine):
+    """(rows, vocab, nnz) snapshot aktif; None kalau model belum ada"""
+    matrix = engine.tfidf_matrix if engine is not None else None
+    if matrix is None:
+        return None, None, None
+    if hasattr(matrix, 'shape'):
+        return matrix.shape[0], matrix.shape[1], matrix.nnz
+    return len(matrix), len(engine.vectorizer.vocabulary_), sum(len(row) for row in matrix)
+
+def collect_service_metrics():
+    """Gauge / counter yang dibaca saat /metrics di-scrape"""
+    engine = model_manager.current
+    rows, vocab, nnz = model_size(engine)
+    startup = model_manager.startup or {}
+    last_build = model_manager.last_build or {}
+    samples = [
+        ('service_ready', 'gauge', '1 once the first model snapshot is published', {}, int(model_manager.ready.is_set())),
+        ('model_rows', 'gauge', 'Products in the active model', {}, rows),
+        ('model_vocab_size', 'gauge', 'TF-IDF vocabulary size', {}, vocab),
+        ('model_nnz', 'gauge', 'Non-zero entries in the TF-IDF matrix', {}, nnz),
+        ('model_generation', 'gauge', 'Generation of the active model snapshot', {}, model_manager.generation),
+        ('model_pending_builds', 'gauge', 'Queued or running model builds', {}, model_manager.pending),
+        ('model_startup_seconds', 'gauge', 'Initial model build / warm start duration',
+         {'mode': startup.get('mode', 'unknown')}, startup.get('seconds')),
+        ('model_last_build_seconds', 'gauge', 'Duration of the most recent build / reload',
+         {'reason': last_build.get('reason', 'unknown')}, last_build.get('seconds'))
+    ]
+    
+    cache = result_cache.stats()
+    samples += [
+        ('result_cache_entries', 'gauge', 'Entries in the result cache', {}, cache['size']),
+        ('result_cache_hits_total', 'counter', 'Result cache hits', {}, cache['hits']),
+        ('result_cache_misses_total', 'counter', 'Result cache misses', {}, cache['misses']),
+        ('result_cache_evictions_total', 'counter', 'Result cache LRU evictions', {}, cache['evictions']),
+        ('result_cache_expirations_total', 'counter', 'Result cache TTL expirations', {}, cache['expirations'])
+    ]
+    
+    if similar_batcher is not None:
+        batcher = similar_batcher.stats()
+        samples += [
+            ('similar_batcher_batches_total', 'counter', 'Micro-batches scored', {}, batcher['batches']),
+            ('similar_batcher_items_total', 'counter', 'Queries scored through the micro-batcher', {}, batcher['items']),
+            ('similar_batcher_queued', 'gauge', 'Queries waiting for the next micro-batch', {}, batcher['queued'])
+        ]
+    
+    profiles = user_profiles.stats()
+    samples += [
+        ('user_profiles_cached', 'gauge', 'User profiles held in the in-process LRU', {}, profiles['size']),
+        ('user_profiles_hits_total', 'counter', 'User profile lookups that found a profile', {}, profiles['hits']),
+        ('user_profiles_misses_total', 'counter', 'User profile lookups without a profile', {}, profiles['misses'])
+    ]
+    return samples
+
+metrics.collector(collect_service_metrics)
+
+# Sampling profiler untuk /debug/profiler (hanya dipakai kalau PROFILER_ENABLED)
+profiler = SamplingProfiler()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Label pakai pola route (/recommendations/user/<user_id>), bukan path asli, supaya cardinality tetap kecil
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.inc('http_requests_total', {'route': route, 'method': request.method,
+                                            'status': str(response.status_code)})
+        metrics.observe('http_request_duration_seconds', {'route': route}, time.perf_counter() - start)
+    return response
+
+# Route yang tetap menjawab selama model pertama masih dibangun (liveness, status, metrics)
+STARTUP_ENDPOINTS = {'home', 'health_check', 'readiness_check', 'prometheus_metrics', 'debug_profiler'}
+
+@app.before_request
+def require_ready_model():
+    if model_manager.ready.is_set() or request.endpoint is None or request.endpoint in STARTUP_ENDPOINTS:
+        return None
+    return jsonify({
+        'success': False,
+        'error': 'Model is still loading' if model_manager.state == 'starting' else 'Model failed to load',
+        'status': model_manager.state
+    }), 503, {'Retry-After': '1'}
+
+# STARTUP_MODE=blocking menunggu sampai siap saat import (perilaku lama, untuk script / CLI);
+# default background
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'background')
+
+def start_model_manager():
+    """Mulai build model pertama (sekali per proses) setelah semua listener terpasang"""
+    model_manager.start(lambda: build_startup_engine(model_manager), store=False)
+    if STARTUP_MODE == 'blocking':
+        model_manager.wait_ready()
+    return model_manager
+
+# Child process 'spawn' yang dibuat dari `python app.py` meng-import modul ini sebagai
+# __mp_main__; child itu tidak boleh ikut membangun model (dan men-spawn child lagi)
+if __name__ != '__mp_main__':
+    start_model_manager()
+
+def is_cacheable(result):
+    # Body JSON yang sudah di-render (bytes) selalu boleh di-cache; dict hanya kalau bukan error
+    return not isinstance(result, dict) or 'error' not in result
+
+def render_success(result, generation):
+    """Hasil engine (render=True) -> body JSON bytes; dict error dikembalikan apa adanya"""
+    if 'error' in result:
+        return result
+    return json_render.dumps({'success': True, **result, 'model_generation': generation})
+
+def json_response(body, status=200):
+    """Response dari body JSON bytes, dikompres gzip / br kalau client menerimanya"""
+    encoding = None
+    if RESPONSE_COMPRESS_MIN_BYTES >= 0:
+        body, encoding = json_render.compress(body, request.headers.get('Accept-Encoding'),
+                                              min_bytes=RESPONSE_COMPRESS_MIN_BYTES,
+                                              gzip_level=RESPONSE_GZIP_LEVEL)
+    response = Response(body, status=status, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def wants_wait():
+    """?wait=1 menunggu rebuild selesai sebelum response dikirim"""
+    return request.args.get('wait', '').lower() in ('1', 'true', 'yes')
 
 @app.route('/')
 def home():
+    engine = model_manager.current
+    if engine is None:
+        # Masih startup: model pertama belum dipublish
+        return jsonify({
+            'service': 'Clothing Recommendation Engine',
+            'status': model_manager.state,
+            'total_products': 0,
+            'algorithm': 'TF-IDF + Cosine Similarity',
+            'ml_available': ML_AVAILABLE,
+            'model_generation': 0
+        })
     return jsonify({
         'service': 'Clothing Recommendation Engine',
         'status': 'active',
-        'total_products': len(engine.df) if engine.df is not None and not engine.df.empty else 0,
+        'total_products': engine.num_products,
         'model_grade': engine.evaluation['final_grade']['grade'] if engine.evaluation else 'N/A',
         'performance_score': f"{engine.evaluation['final_grade']['score']:.1f}/100" if engine.evaluation else 'N/A',
         'algorithm': 'TF-IDF + Cosine Similarity',
-        'ml_available': ML_AVAILABLE
+        'ml_available': ML_AVAILABLE,
+        'model_generation': engine.generation
     })
 
 @app.route('/recommendations/similar', methods=['POST'])
 def get_similar_products():
     """
     API untuk frontend: cari produk mirip berdasarkan nama
-    Body: {"product_name": "Blazer Wanita"}
+    Body: {"product_name": "Blazer Wanita", "match": "first" | "best"}
     """
     data = request.get_json()
     product_name = data.get('product_name', '')
@@ -477,25 +1557,276 @@ def get_similar_products():
     if not product_name:
         return jsonify({'success': False, 'error': 'product_name required'}), 400
     
-    result = engine.get_recommendations_by_product_name(product_name)
+    match = data.get('match')
+    first_match = None if match is None else match != 'best'
     
-    if 'error' in result:
+    engine = model_manager.current
+    
+    def compute():
+        result = engine.get_recommendations_by_product_name(product_name, first_match=first_match,
+                                                            batcher=similar_batcher, render=True)
+        with metrics.stage('similar', 'json'):
+            return render_success(result, engine.generation)
+    
+    # Cache menyimpan body JSON yang sudah jadi, jadi cache hit tidak encode ulang
+    result = result_cache.get_or_compute(
+        result_cache.make_key('similar', product_name.lower(), 5, first_match, engine.generation),
+        compute,
+        is_cacheable
+    )
+    
+    if isinstance(result, dict):
         return jsonify({'success': False, 'error': result['error']}), 404
     
-    return jsonify({'success': True, **result})
+    return json_response(result)
+
+@app.route('/recommendations/batch', methods=['POST'])
+def get_batch_recommendations():
+    """
+    API untuk cart / purchase history: satu request untuk banyak produk
+    Body: {"product_names": ["Blazer", "Kemeja"], "weights": [1.0, 0.8], "n": 6, "merge": "max"}
+    """
+    data = request.get_json() or {}
+    product_names = data.get('product_names', [])
+    
+    if not product_names or not isinstance(product_names, list):
+        return jsonify({'success': False, 'error': 'product_names required'}), 400
+    
+    weights = data.get('weights')
+    if weights is not None and (not isinstance(weights, list) or len(weights) != len(product_names)):
+        return jsonify({'success': False, 'error': 'weights must be a list with the same length as product_names'}), 400
+    # Bobot harus angka finite (bool / string / NaN / Infinity ditolak), bukan 500 dari float()
+    if weights is not None and not all(
+        isinstance(weight, (int, float)) and not isinstance(weight, bool) and math.isfinite(weight)
+        for weight in weights
+    ):
+        return jsonify({'success': False, 'error': 'weights must be finite numbers'}), 400
+    
+    try:
+        n = min(max(int(data.get('n', 10)), 1), 100)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'n must be an integer'}), 400
+    
+    merge = data.get('merge', 'max')
+    if merge not in ('max', 'mean'):
+        return jsonify({'success': False, 'error': f'Unknown merge mode "{merge}"'}), 400
+    engine = model_manager.current
+    result = result_cache.get_or_compute(
+        result_cache.make_key('batch', product_names, weights, n, merge, engine.generation),
+        lambda: engine.get_recommendations_batch(product_names, weights=weights, n=n, merge=merge),
+        is_cacheable
+    )
+    
+    if 'error' in result:
+        return jsonify({'success': False, **result}), 404
+    
+    return jsonify({'success': True, **result, 'model_generation': engine.generation})
+
+@app.route('/recommendations/bought-together', methods=['POST'])
+def get_bought_together():
+    """
+    "Sering dibeli bersama" untuk checkout: co-purchase dari riwayat order + TF-IDF
+    Body: {"product_names": ["Blazer", "Kemeja"], "n": 6, "alpha": 0.7}
+    """
+    data = request.get_json() or {}
+    product_names = data.get('product_names', [])
+    
+    if not product_names or not isinstance(product_names, list):
+        return jsonify({'success': False, 'error': 'product_names required'}), 400
+    
+    try:
+        n = int(data.get('n', 6))
+        alpha = float(data.get('alpha', COPURCHASE_ALPHA))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'n must be an integer and alpha a number'}), 400
+    
+    engine = model_manager.current
+    model = current_copurchase()
+    result = result_cache.get_or_compute(
+        result_cache.make_key('bought-together', product_names, n, alpha, copurchase_state['mtime'], engine.generation),
+        lambda: engine.get_bought_together(product_names, model, n=n, alpha=alpha),
+        is_cacheable
+    )
+    
+    if 'error' in result:
+        return jsonify({'success': False, **result}), 404
+    
+    return jsonify({'success': True, **result, 'model_generation': engine.generation})
+
+@app.route('/copurchase/orders', methods=['POST'])
+def rebuild_copurchase():
+    """
+    Build ulang tabel co-purchase dari export order (orderModel)
+    Body: JSON array order atau NDJSON (satu order per baris)
+    """
+    if not ML_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Co-purchase model needs numpy / scipy'}), 503
+    
+    try:
+        import io
+        
+        orders = copurchase.iter_orders(io.TextIOWrapper(request.stream, encoding='utf-8'))
+        model = copurchase.CoPurchaseModel.build(
+            orders,
+            k=int(request.args.get('k', 20)),
+            shrink=float(request.args.get('shrink', 1.0)),
+            min_support=int(request.args.get('min_support', 1))
+        )
+        if model.meta['orders'] == 0:
+            return jsonify({'success': False, 'error': 'No orders provided'}), 400
+        
+        meta = model.save(COPURCHASE_DIR)
+        copurchase_state['model'] = None
+        copurchase_state['mtime'] = None
+        result_cache.clear()
+        print(f"✅ Co-purchase table rebuilt: {meta['orders']} orders, {meta['items']} items")
+        return jsonify({'success': True, 'copurchase': meta})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid order export: {e}'}), 400
+    except Exception as e:
+        print(f"❌ Error rebuilding co-purchase table: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/recommendations/category/<category>/type/<product_type>')
 def get_by_category_type(category, product_type):
     """
     API untuk category browsing
-    GET /recommendations/category/Women/type/topwear
+    GET /recommendations/category/Women/type/topwear?offset=0&limit=8&rank=catalog|centrality|popularity
+    """
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 8)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'offset and limit must be integers'}), 400
+    rank = request.args.get('rank', 'catalog')
+    
+    engine = model_manager.current
+    result = result_cache.get_or_compute(
+        result_cache.make_key('category', category.lower(), product_type.lower(), offset, limit, rank, engine.generation),
+        lambda: render_success(engine.get_recommendations_by_category_type(category, product_type, n=limit,
+                                                                           offset=offset, rank=rank, render=True),
+                               engine.generation),
+        is_cacheable
+    )
+    
+    if isinstance(result, dict):
+        return jsonify({'success': False, 'error': result['error']}), 404
+    
+    return json_response(result)
+
+@app.route('/events', methods=['POST'])
+def record_events():
+    """
+    Event user untuk profil personal (purchase / cart / view)
+    Body: {"user_id": "...", "type": "purchase", "product_name": "...", "timestamp": 1718000000000}
+      atau {"user_id": "...", "events": [{"type": "view", "product_name": "..."}, ...]}
     """
-    result = engine.get_recommendations_by_category_type(category, product_type)
+    data = request.get_json() or {}
+    user_id = data.get('user_id')
+    events = data.get('events', [data] if data.get('product_name') else [])
     
+    if not user_id:
+        return jsonify({'success': False, 'error': 'user_id required'}), 400
+    if not events or not isinstance(events, list):
+        return jsonify({'success': False, 'error': 'No events provided'}), 400
+    
+    engine = model_manager.current
+    if engine.vectorizer is None or engine.tfidf_matrix is None:
+        return jsonify({'success': False, 'error': 'Model not trained'}), 503
+    
+    resolved = []
+    not_found = []
+    for event in events:
+        event_type = event.get('type', 'view')
+        if event_type not in EVENT_WEIGHTS:
+            return jsonify({'success': False, 'error': f'Unknown event type "{event_type}"'}), 400
+        try:
+            timestamp = event_time(event.get('timestamp'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'timestamp must be epoch seconds or milliseconds'}), 400
+        
+        product_idx, product = engine.find_product(event.get('product_name', ''))
+        if product_idx is None:
+            not_found.append(event.get('product_name'))
+            continue
+        resolved.append((
+            engine.item_terms(product_idx),
+            float(event.get('weight', EVENT_WEIGHTS[event_type])),
+            timestamp,
+            product['nama_pakaian'] if event_type == 'purchase' else None
+        ))
+    
+    profile = user_profiles.add_events(user_id, resolved) if resolved else user_profiles.get(user_id)
+    return jsonify({
+        'success': True,
+        'user_id': str(user_id),
+        'recorded': len(resolved),
+        'not_found': not_found,
+        'profile_events': profile['events'] if profile else 0
+    })
+
+@app.route('/recommendations/user/<user_id>')
+def get_user_recommendations(user_id):
+    """
+    Rekomendasi personal dalam satu call dari profil user
+    GET /recommendations/user/<id>?limit=10
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    
+    profile = user_profiles.get(user_id)
+    if profile is None or not profile['terms']:
+        return jsonify({'success': False, 'error': 'No profile for this user yet'}), 404
+    
+    engine = model_manager.current
+    result = engine.get_user_recommendations(profile, n=limit)
     if 'error' in result:
         return jsonify({'success': False, 'error': result['error']}), 404
     
-    return jsonify({'success': True, **result})
+    return jsonify({
+        'success': True,
+        'user_id': str(user_id),
+        **result,
+        'profile_events': profile['events'],
+        'model_generation': engine.generation
+    })
+
+@app.route('/users/stats')
+def user_profile_stats():
+    """Statistik LRU profil user"""
+    return jsonify({'success': True, 'profiles': user_profiles.stats()})
+
+@app.route('/search')
+def search_products():
+    """
+    Free-text search untuk storefront
+    GET /search?q=blazer navy&limit=10&category=women&type=topwear
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'q required'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    category = request.args.get('category') or None
+    product_type = request.args.get('type') or None
+    
+    engine = model_manager.current
+    result = result_cache.get_or_compute(
+        result_cache.make_key('search', query.lower(), limit, category, product_type, engine.generation),
+        lambda: engine.search(query, n=limit, category=category, product_type=product_type),
+        is_cacheable
+    )
+    
+    if 'error' in result:
+        return jsonify({'success': False, 'error': result['error']}), 404
+    
+    return jsonify({'success': True, **result, 'model_generation': engine.generation})
 
 @app.route('/sync/products', methods=['POST'])
 def sync_products():
@@ -510,62 +1841,274 @@ def sync_products():
         if not products:
             return jsonify({'success': False, 'error': 'No products provided'}), 400
         
-        # Update engine data
-        if ML_AVAILABLE:
-            import pandas as pd
-            engine.df = pd.DataFrame(products)
-        else:
-            engine.df = products
+        # Rebuild model dengan data baru di background, lalu swap snapshot
+        build = lambda current: (ClothingRecommendationEngine.from_products(products), None)
         
-        # Rebuild model dengan data baru
-        if engine.df is not None and len(engine.df) > 0:
-            engine.build_model()
-            engine.evaluate_model()
-            
+        if wants_wait():
+            engine, _ = model_manager.submit('sync', build, wait=True)
+            return jsonify({
+                'success': True,
+                'message': f'Synced {len(products)} products',
+                'total_products': engine.num_products,
+                'model_rebuilt': True,
+                'model_generation': engine.generation
+            })
+        
+        model_manager.submit('sync', build)
         return jsonify({
             'success': True,
-            'message': f'Synced {len(products)} products',
-            'total_products': len(engine.df) if engine.df is not None else 0,
-            'model_rebuilt': True
-        })
+            'message': f'Syncing {len(products)} products in background',
+            'model_rebuilt': False,
+            'model_generation': model_manager.generation
+        }), 202
         
     except Exception as e:
         print(f"❌ Error syncing products: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/sync/products/stream', methods=['POST'])
+def sync_products_stream():
+    """
+    Full sync katalog besar sebagai NDJSON (satu produk per baris, boleh chunked transfer)
+    Body: {"nama_pakaian": "...", "categories": "...", "type": "..."}\n{...}\n...
+    Body di-spool ke file sementara sambil divalidasi, lalu model dibangun per chunk.
+    """
+    import tempfile
+    
+    handle, path = tempfile.mkstemp(prefix='sync-', suffix='.ndjson')
+    os.close(handle)
+    # Setelah submit file spool milik builder (dihapus di akhir build); sebelum itu dihapus di sini
+    submitted = False
+    try:
+        try:
+            count = streaming_ingest.spool_ndjson(request.stream, path) if ML_AVAILABLE \
+                else _spool_ndjson_fallback(request.stream, path)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if count == 0:
+            return jsonify({'success': False, 'error': 'No products provided'}), 400
+        
+        def build(current):
+            try:
+                if ML_AVAILABLE:
+                    chunks = lambda: streaming_ingest.ndjson_chunks(path, INGEST_CHUNK_ROWS)
+                    return ClothingRecommendationEngine.from_chunks(chunks), None
+                with open(path, 'r', encoding='utf-8') as file:
+                    products = [json.loads(line) for line in file if line.strip()]
+                return ClothingRecommendationEngine.from_products(products), None
+            finally:
+                _remove_quietly(path)
+        
+        if wants_wait():
+            engine, _ = model_manager.submit('sync-stream', build, wait=True)
+            submitted = True
+            return jsonify({
+                'success': True,
+                'message': f'Synced {count} products',
+                'total_products': engine.num_products,
+                'model_rebuilt': True,
+                'model_generation': engine.generation
+            })
+        
+        model_manager.submit('sync-stream', build)
+        submitted = True
+        return jsonify({
+            'success': True,
+            'message': f'Syncing {count} products in background',
+            'model_rebuilt': False,
+            'model_generation': model_manager.generation
+        }), 202
+        
+    except Exception as e:
+        print(f"❌ Error syncing product stream: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        if not submitted:
+            _remove_quietly(path)
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _spool_ndjson_fallback(stream, path):
+    """Fallback tanpa pandas: body NDJSON disalin apa adanya, divalidasi saat build"""
+    count = 0
+    with open(path, 'wb') as file:
+        for line in stream:
+            if line.strip():
+                file.write(line.rstrip(b'\r\n') + b'\n')
+                count += 1
+    return count
+
+@app.route('/sync/products/changes', methods=['POST'])
+def sync_product_changes():
+    """
+    Incremental sync dari admin panel: upsert / delete berdasarkan product id
+    Body: {"upsert": [{"id": "...", "nama_pakaian": "...", "categories": "...", "type": "..."}], "delete": ["..."]}
+    """
+    try:
+        data = request.get_json() or {}
+        upserts = data.get('upsert', [])
+        deletes = data.get('delete', [])
+        
+        if not upserts and not deletes:
+            return jsonify({'success': False, 'error': 'No changes provided'}), 400
+        
+        def build(current):
+            engine = current.clone()
+            result = engine.apply_product_changes(upserts, deletes)
+            return (None if 'error' in result else engine), result
+        
+        # Update incremental cepat, jadi default-nya ditunggu (copy-on-write + swap);
+        # shared snapshot-nya diekspor tanpa neighbor table (build O(N^2) per edit)
+        engine, result = model_manager.submit('changes', build, wait=True, incremental=True)
+        
+        if 'error' in result:
+            return jsonify({'success': False, 'error': result['error']}), 409
+        
+        return jsonify({
+            'success': True,
+            **result,
+            'total_products': engine.num_products,
+            'model_generation': engine.generation
+        })
+        
+    except Exception as e:
+        print(f"❌ Error applying product changes: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/reload', methods=['POST'])
 def reload_data():
     """Reload data dari CSV dan MongoDB"""
     try:
-        # Reload dari CSV dulu
-        engine.load_data()
+        # Reload dari CSV di background; model bundle dipakai lagi kalau CSV tidak berubah
+        build = lambda current: (ClothingRecommendationEngine(), None)
         
-        # Rebuild model
-        if engine.df is not None and len(engine.df) > 0:
-            engine.build_model()
-            engine.evaluate_model()
-            
+        if wants_wait():
+            engine, _ = model_manager.submit('reload', build, wait=True)
+            return jsonify({
+                'success': True,
+                'message': 'Data reloaded successfully',
+                'total_products': engine.num_products,
+                'source': 'CSV + MongoDB sync',
+                'warm_start': engine.startup['mode'] == 'warm',
+                'reload_seconds': engine.startup['seconds'],
+                'model_generation': engine.generation
+            })
+        
+        model_manager.submit('reload', build)
         return jsonify({
             'success': True,
-            'message': 'Data reloaded successfully',
-            'total_products': len(engine.df) if engine.df is not None else 0,
-            'source': 'CSV + MongoDB sync'
-        })
+            'message': 'Reload started in background',
+            'source': 'CSV + MongoDB sync',
+            'model_generation': model_manager.generation
+        }), 202
         
     except Exception as e:
         print(f"❌ Error reloading data: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/cache/stats')
+def cache_stats():
+    """Statistik result cache: hit / miss / eviction"""
+    return jsonify({
+        'success': True,
+        'cache': result_cache.stats(),
+        'model_generation': model_manager.generation
+    })
+
+@app.route('/batcher/stats')
+def batcher_stats():
+    """Histogram ukuran micro-batch /recommendations/similar untuk tuning wait vs. batch size"""
+    return jsonify({
+        'success': True,
+        'enabled': similar_batcher is not None,
+        'batcher': similar_batcher.stats() if similar_batcher is not None else None
+    })
+
 @app.route('/health')
 def health_check():
-    """Health check untuk monitoring"""
+    """
+    Health check untuk monitoring (liveness): selalu 200 selama proses hidup,
+    `status` = starting | healthy | failed. Readiness ada di /health/ready.
+    """
+    engine = model_manager.current
+    if engine is None:
+        return jsonify({
+            'status': model_manager.state,
+            'model_loaded': False,
+            'ml_libraries': ML_AVAILABLE,
+            'startup_error': model_manager.startup_error,
+            'model': model_manager.status(),
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    
+    copurchase_model = current_copurchase()
     return jsonify({
         'status': 'healthy',
-        'model_loaded': engine.df is not None and not engine.df.empty and len(engine.df) > 0,
+        'model_loaded': engine.num_products > 0,
         'ml_libraries': ML_AVAILABLE,
-        'timestamp': '2025-01-24 12:30:00'
+        'similarity_mode': 'ann' if engine.ann_index is not None else 'exact',
+        'copurchase': copurchase_model.meta if copurchase_model is not None else None,
+        'startup': model_manager.startup,
+        'model': model_manager.status(),
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
     })
 
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness probe: 200 setelah snapshot model pertama dipublish, 503 selama startup"""
+    ready = model_manager.ready.is_set()
+    return jsonify({
+        'ready': ready,
+        'status': model_manager.state,
+        'model_generation': model_manager.generation,
+        'startup': model_manager.startup
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metrics format Prometheus: request, latency per route / tahap, model, cache"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/debug/profiler', methods=['GET', 'POST'])
+def debug_profiler():
+    """
+    Sampling profiler (butuh PROFILER_ENABLED=1)
+    POST {"action": "start", "interval_ms": 5, "duration": 30} | {"action": "stop"}
+    GET -> status; GET ?format=folded -> folded stacks untuk flamegraph / speedscope
+    """
+    if not PROFILER_ENABLED:
+        return jsonify({'success': False, 'error': 'Profiler disabled (set PROFILER_ENABLED=1)'}), 404
+    
+    if request.method == 'GET':
+        if request.args.get('format') == 'folded':
+            limit = request.args.get('limit', type=int)
+            return Response(profiler.folded(limit), mimetype='text/plain; charset=utf-8')
+        return jsonify({'success': True, 'profiler': profiler.status()})
+    
+    data = request.get_json(silent=True) or {}
+    action = data.get('action', 'start')
+    try:
+        if action == 'start':
+            started = profiler.start(interval_ms=float(data.get('interval_ms', 10)),
+                                     duration=float(data['duration']) if data.get('duration') else None)
+            if not started:
+                return jsonify({'success': False, 'error': 'Profiler already running'}), 409
+            print(f"🔬 Sampling profiler started ({profiler.status()['interval_ms']} ms)")
+        elif action == 'stop':
+            profiler.stop()
+            print(f"🔬 Sampling profiler stopped ({profiler.status()['samples']} samples)")
+        else:
+            return jsonify({'success': False, 'error': f'Unknown action "{action}"'}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'profiler': profiler.status()})
+
 if __name__ == '__main__':
     print("🚀 Starting Clothing Recommendation Service...")
     print(f"🤖 ML Libraries Available: {ML_AVAILABLE}")
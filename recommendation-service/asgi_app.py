@@ -0,0 +1,275 @@
+"""
+ASGI serving mode untuk recommendation service.
+
+Route-nya sama persis dengan Flask app di app.py (request diteruskan ke WSGI app
+yang sama), tapi:
+
+- event loop hanya menerima / mengirim bytes; scoring (NumPy, melepas GIL)
+  dijalankan di thread pool berukuran tetap (ASGI_THREADS)
+- jumlah request yang boleh antre menunggu worker dibatasi (ASGI_MAX_QUEUE);
+  request di luar batas langsung ditolak 429 + Retry-After, bukan ikut antre
+- /server/stats menampilkan statistik concurrency dari layer ini
+- body request biasa dibaca utuh dulu (maks ASGI_MAX_BODY) sebelum memakai worker thread;
+  route streaming (ASGI_STREAMING_PATHS) membaca body per message ASGI lewat wsgi.input
+  tanpa buffer utuh dan tanpa batas ukuran. Client yang putus di tengah body membatalkan
+  request (app tidak dipanggil dengan body terpotong, response tidak dikirim)
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5001
+    python asgi_app.py
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import app as flask_app, model_manager
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', '8'))
+ASGI_MAX_QUEUE = int(os.environ.get('ASGI_MAX_QUEUE', '64'))
+ASGI_RETRY_AFTER = int(os.environ.get('ASGI_RETRY_AFTER', '1'))
+ASGI_MAX_BODY = int(os.environ.get('ASGI_MAX_BODY', str(32 * 1024 * 1024)))
+ASGI_STREAMING_PATHS = tuple(
+    path for path in os.environ.get('ASGI_STREAMING_PATHS', '/sync/products/stream').split(',') if path
+)
+STREAM_BUFFER = 1 << 16
+
+
+class ReceiveStream(io.RawIOBase):
+    """
+    wsgi.input route streaming: dibaca dari worker thread, setiap message ASGI diambil
+    saat dibutuhkan (receive() dijalankan di event loop), jadi body tidak pernah di-buffer
+    utuh dan client yang lambat ikut menahan pembacaan (backpressure). Disconnect di tengah
+    body -> ClientDisconnected, bukan EOF, supaya body terpotong tidak diproses.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._pending = memoryview(b'')
+        self._done = False
+        self.disconnected = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self.disconnected = True
+                self._done = True
+                break
+            self._pending = memoryview(message.get('body', b''))
+            self._done = not message.get('more_body', False)
+        if self.disconnected:
+            raise ClientDisconnected()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class AsgiService:
+    """Adapter ASGI -> WSGI dengan thread pool terbatas dan backpressure"""
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, max_queue=ASGI_MAX_QUEUE,
+                 retry_after=ASGI_RETRY_AFTER, max_body=ASGI_MAX_BODY, streaming_paths=ASGI_STREAMING_PATHS):
+        self.wsgi_app = wsgi_app
+        self.streaming_paths = frozenset(streaming_paths)
+        self.threads = max(1, threads)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.max_body = max_body
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi-worker')
+        # Hanya diubah dari event loop, jadi tidak butuh lock
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.disconnected = 0
+
+    @property
+    def limit(self):
+        """Request yang diterima sekaligus: sedang dikerjakan + antre menunggu worker"""
+        return self.threads + self.max_queue
+
+    def stats(self):
+        return {
+            'threads': self.threads,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.threads),
+            'peak_in_flight': self.peak_in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'disconnected': self.disconnected,
+            'retry_after_seconds': self.retry_after
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if scope['path'] == '/server/stats':
+            await self._send_json(send, 200, {
+                'success': True,
+                'server': self.stats(),
+                'model_generation': model_manager.generation
+            })
+            return
+
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            await self._send_json(send, 429, {
+                'success': False,
+                'error': 'Server busy, retry later'
+            }, [(b'retry-after', str(self.retry_after).encode('latin-1'))])
+            return
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            stream = None
+            if scope['path'] in self.streaming_paths:
+                stream = ReceiveStream(receive, loop)
+                environ = self._environ(scope, io.BufferedReader(stream, STREAM_BUFFER))
+            else:
+                try:
+                    body = await self._read_body(receive)
+                except ClientDisconnected:
+                    self.disconnected += 1
+                    return
+                if body is None:
+                    await self._send_json(send, 413, {'success': False, 'error': 'Request body too large'})
+                    return
+                environ = self._environ(scope, io.BytesIO(body), content_length=len(body))
+
+            status, headers, content = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+            if stream is not None and stream.disconnected:
+                self.disconnected += 1
+                return
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': content})
+            self.completed += 1
+        finally:
+            self.in_flight -= 1
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status, payload, extra_headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            *extra_headers
+        ]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    def _environ(scope, stream, content_length=None):
+        """
+        Environ WSGI; content_length None = body streaming (Content-Length dari client kalau ada,
+        wsgi.input_terminated supaya chunked transfer juga dibaca sampai habis)
+        """
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': stream,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        if content_length is not None:
+            environ['CONTENT_LENGTH'] = str(content_length)
+        else:
+            environ['wsgi.input_terminated'] = True
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                if content_length is None:
+                    environ['CONTENT_LENGTH'] = value
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ):
+        """Dijalankan di worker thread: panggil Flask app dan kumpulkan response-nya"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content
+
+
+app = AsgiService(flask_app)
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('❌ uvicorn not installed: pip install uvicorn')
+
+    print("🚀 Starting Clothing Recommendation Service (ASGI)...")
+    print(f"🧵 Worker threads: {app.threads}, max queue: {app.max_queue}")
+    print("🌐 Access the service at: http://localhost:5001")
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', '5001')))
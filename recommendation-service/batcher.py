@@ -0,0 +1,110 @@
+"""
+Micro-batching: gabungkan query yang datang bersamaan jadi satu batch.
+
+Worker thread mengambil item pertama dari antrean. Kalau antrean kosong, item itu
+langsung diproses sendiri (request yang datang sendirian tidak membayar wait); kalau
+ada item lain yang sudah mengantre, worker menunggu paling lama `max_wait_ms` (atau
+sampai `max_batch_size` item) dan memanggil `process(items)` sekali untuk seluruh batch. Setiap pemanggil
+`submit()` menunggu hasil miliknya sendiri. Histogram ukuran batch dipakai untuk
+tuning throughput vs. tail latency.
+"""
+import queue
+import threading
+import time
+
+
+class _Pending:
+    __slots__ = ('item', 'done', 'result', 'error')
+
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, process, max_wait_ms=2.0, max_batch_size=32, name='micro-batcher'):
+        """`process(items)` mengembalikan list hasil dengan urutan yang sama dengan items"""
+        self.process = process
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        # Bucket histogram: ukuran batch <= bound (1, 2, 4, 8, ...)
+        self.histogram = {}
+
+    def submit(self, item):
+        """Masukkan item ke batch berikutnya dan tunggu hasilnya (exception diteruskan)"""
+        self._ensure_worker()
+        pending = _Pending(item)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        if self._queue.empty():
+            return batch
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.process([pending.item for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                for pending in batch:
+                    pending.error = e
+            finally:
+                self._record(len(batch))
+                for pending in batch:
+                    pending.done.set()
+
+    def _record(self, size):
+        bound = 1
+        while bound < size:
+            bound *= 2
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.histogram[bound] = self.histogram.get(bound, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'max_batch_size': self.max_batch_size,
+                'batches': self.batches,
+                'items': self.items,
+                'errors': self.errors,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'queued': self._queue.qsize(),
+                'histogram': {f'le_{bound}': self.histogram[bound] for bound in sorted(self.histogram)}
+            }
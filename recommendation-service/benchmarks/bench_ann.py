@@ -0,0 +1,96 @@
+"""
+Recall@k vs latency: IVF ANN index (ann_index.py) vs exact cosine, pada katalog sintetis.
+
+Recall dihitung tie-aware: hasil ANN dianggap benar kalau skornya >= skor ke-k
+hasil exact (produk dengan skor seri boleh tertukar).
+
+    python benchmarks/bench_ann.py --sizes 100000 1000000 --nprobe 1 2 4 8 16 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ann_index import IVFIndex  # noqa: E402
+from bench_topk import percentile, synthetic_corpus  # noqa: E402
+from similarity import l2_normalize_rows, row_scores, top_k_indices  # noqa: E402
+
+
+def run(size, queries, k, nprobes, lists, dim):
+    normalized = l2_normalize_rows(
+        TfidfVectorizer(stop_words='english', max_features=1000).fit_transform(synthetic_corpus(size))
+    )
+    start = time.perf_counter()
+    index = IVFIndex.build(normalized, n_lists=lists, dim=dim)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(7)
+    rows = [rng.randrange(size) for _ in range(queries)]
+
+    exact_latency, thresholds = [], []
+    for row in rows:
+        start = time.perf_counter()
+        scores = row_scores(normalized, row)
+        top = top_k_indices(scores, k, exclude=[row])
+        exact_latency.append(time.perf_counter() - start)
+        thresholds.append(scores[top[-1]] if len(top) else 0.0)
+
+    results = [{
+        'mode': 'exact', 'nprobe': None, 'recall': 1.0,
+        'p50_ms': round(percentile(exact_latency, 50), 3), 'p99_ms': round(percentile(exact_latency, 99), 3)
+    }]
+    for nprobe in nprobes:
+        latency, hits = [], 0
+        for row, threshold in zip(rows, thresholds):
+            start = time.perf_counter()
+            _, scores = index.search_row(normalized, row, k, nprobe=nprobe, exclude=[row])
+            latency.append(time.perf_counter() - start)
+            hits += int((scores >= threshold - 1e-9).sum())
+        results.append({
+            'mode': 'ann', 'nprobe': nprobe, 'recall': round(hits / (k * len(rows)), 4),
+            'p50_ms': round(percentile(latency, 50), 3), 'p99_ms': round(percentile(latency, 99), 3)
+        })
+
+    return {
+        'size': size,
+        'lists': index.lists,
+        'dim': index.meta['dim'],
+        'build_seconds': round(build_seconds, 2),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--lists', type=int, default=None)
+    parser.add_argument('--dim', type=int, default=None, help='SVD dimensions, 0 = full TF-IDF space')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        result = run(size, args.queries, args.k, args.nprobe, args.lists, args.dim)
+        report.append(result)
+        space = f"svd dim {result['dim']}" if result['dim'] else 'full TF-IDF space'
+        print(f"\n📦 {size} products: {result['lists']} lists, {space}, build {result['build_seconds']}s")
+        print(f"{'mode':>6} {'nprobe':>7} {f'recall@{args.k}':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for row in result['results']:
+            print(f"{row['mode']:>6} {str(row['nprobe'] or '-'):>7} {row['recall']:>10} "
+                  f"{row['p50_ms']:>9} {row['p99_ms']:>9}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
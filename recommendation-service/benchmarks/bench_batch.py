@@ -0,0 +1,90 @@
+"""
+Micro-batch scoring /recommendations/similar: jalur langsung (row_scores + top_k_indices
+per query) vs. similarity.rows_top_k per batch, dengan transpose CSR yang dibangun sekali
+(seperti engine) dan tanpa itu (matrix.T dikonversi scipy di setiap batch).
+
+Per ukuran batch dicatat p50 / p99 latency satu panggilan dan biaya per query;
+hasil batch diverifikasi sama dengan jalur langsung.
+
+    python benchmarks/bench_batch.py --size 200000 --batch-sizes 1 8 32 --batches 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_topk import percentile, synthetic_corpus  # noqa: E402
+from similarity import l2_normalize_rows, row_scores, rows_top_k, top_k_indices, transpose_rows  # noqa: E402
+
+
+def timed_calls(calls, batches):
+    samples = []
+    for rows in batches:
+        start = time.perf_counter()
+        calls(rows)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--max-features', type=int, default=5000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--batches', type=int, default=50)
+    parser.add_argument('-n', type=int, default=5)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    matrix = l2_normalize_rows(
+        TfidfVectorizer(stop_words='english', max_features=args.max_features).fit_transform(synthetic_corpus(args.size))
+    )
+    start = time.perf_counter()
+    transposed = transpose_rows(matrix)
+    transpose_seconds = time.perf_counter() - start
+    rng = random.Random(7)
+
+    def direct(rows):
+        for row in rows:
+            scores = row_scores(matrix, row)
+            top_k_indices(scores, args.n, exclude=[row])
+
+    results = []
+    print(f"🧪 size={args.size} nnz/row={matrix.nnz / args.size:.1f} transpose once={transpose_seconds * 1000:.1f}ms")
+    print(f"{'batch':>6} | {'direct p50':>10} {'per q':>8} | {'batched p50':>11} {'per q':>8} | {'no-T p50':>9} {'per q':>8}")
+    for batch_size in args.batch_sizes:
+        batches = [[rng.randrange(args.size) for _ in range(batch_size)] for _ in range(args.batches)]
+        ns = [args.n] * batch_size
+        for rows in batches[:3]:
+            for row, (indices, _) in zip(rows, rows_top_k(matrix, rows, ns, transposed=transposed)):
+                assert indices.tolist() == top_k_indices(row_scores(matrix, row), args.n, exclude=[row]).tolist()
+
+        direct_ms = percentile(timed_calls(direct, batches), 50)
+        batched_ms = percentile(timed_calls(lambda rows: rows_top_k(matrix, rows, ns, transposed=transposed), batches), 50)
+        untransposed_ms = percentile(timed_calls(lambda rows: rows_top_k(matrix, rows, ns), batches[:10]), 50)
+        row = {
+            'batch_size': batch_size,
+            'direct_p50_ms': round(direct_ms, 3),
+            'batched_p50_ms': round(batched_ms, 3),
+            'no_transpose_p50_ms': round(untransposed_ms, 3)
+        }
+        results.append(row)
+        print(f"{batch_size:>6} | {direct_ms:>8.3f}ms {direct_ms / batch_size:>6.3f}ms | "
+              f"{batched_ms:>9.3f}ms {batched_ms / batch_size:>6.3f}ms | "
+              f"{untransposed_ms:>7.3f}ms {untransposed_ms / batch_size:>6.3f}ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'size': args.size, 'transpose_ms': round(transpose_seconds * 1000, 3), 'results': results},
+                      file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Peak memory + waktu build: pd.read_csv + TfidfVectorizer.fit_transform (full) vs
+streaming_ingest.build_from_chunks (stream), pada katalog CSV sintetis.
+
+Setiap mode dijalankan di proses terpisah supaya peak RSS (ru_maxrss) tidak saling
+tercampur. Baseline = RSS proses setelah import, sebelum membaca CSV.
+
+    python benchmarks/bench_ingest.py --sizes 100000 1000000 --chunk-rows 20000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+
+# Sama dengan app.VECTORIZER_PARAMS (app tidak di-import: import app langsung membangun model)
+VECTORIZER_PARAMS = {'stop_words': 'english', 'max_features': 1000}
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, path, chunk_rows):
+    """Dijalankan di subprocess; print satu baris JSON"""
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    import streaming_ingest
+    import text_features
+
+    baseline = peak_mb()
+    start = time.perf_counter()
+    if mode == 'full':
+        df = pd.read_csv(path, sep=';')
+        texts = text_features.product_texts(df)
+        matrix = TfidfVectorizer(**VECTORIZER_PARAMS).fit_transform(texts)
+    else:
+        df, _, matrix, _ = streaming_ingest.build_from_chunks(
+            lambda: streaming_ingest.csv_chunks(path, chunk_rows), VECTORIZER_PARAMS
+        )
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'mode': mode,
+        'seconds': round(seconds, 2),
+        'baseline_mb': round(baseline, 1),
+        'peak_mb': round(peak_mb(), 1),
+        'model_mb': round((matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 1024 / 1024, 1),
+        'df_mb': round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1)
+    }))
+
+
+def run(mode, path, chunk_rows):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, path, '--chunk-rows', str(chunk_rows)],
+        cwd=os.path.join(BENCH_DIR, '..'), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 500000])
+    parser.add_argument('--chunk-rows', type=int, default=20000)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.chunk_rows)
+        return
+
+    from bench_workers import write_catalog
+
+    results = []
+    print(f"{'size':>9} {'mode':>7} {'seconds':>8} {'peak MB':>8} {'+build MB':>10} {'model MB':>9} {'df MB':>7}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'catalog.csv')
+            write_catalog(path, size)
+            for mode in ('full', 'stream'):
+                row = {'size': size, **run(mode, path, args.chunk_rows)}
+                results.append(row)
+                print(f"{size:>9} {row['mode']:>7} {row['seconds']:>8} {row['peak_mb']:>8} "
+                      f"{round(row['peak_mb'] - row['baseline_mb'], 1):>10} {row['model_mb']:>9} {row['df_mb']:>7}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
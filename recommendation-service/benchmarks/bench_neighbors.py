@@ -0,0 +1,80 @@
+"""
+Build neighbor table offline: serial (build_neighbor_table, satu core) vs process pool
+dengan CSR di shared memory (build_neighbor_table_parallel), pada katalog sintetis.
+
+Per ukuran katalog dan jumlah worker dicatat detik build dan speedup terhadap serial;
+hasil setiap run diverifikasi identik dengan build serial.
+
+    python benchmarks/bench_neighbors.py --sizes 20000 100000 --workers 2 4 8 --k 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+import text_features  # noqa: E402
+from bench_workers import write_catalog  # noqa: E402
+from neighbor_table import build_neighbor_table, build_neighbor_table_parallel  # noqa: E402
+from similarity import l2_normalize_rows  # noqa: E402
+
+# Sama dengan app.VECTORIZER_PARAMS (app tidak di-import: import app langsung membangun model)
+VECTORIZER_PARAMS = {'stop_words': 'english', 'max_features': 1000}
+
+
+def catalog_matrix(size, seed):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'catalog.csv')
+        write_catalog(path, size, seed=seed)
+        df = pd.read_csv(path, sep=';')
+    return l2_normalize_rows(TfidfVectorizer(**VECTORIZER_PARAMS).fit_transform(text_features.product_texts(df)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--block-size', type=int, default=1024)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"🧪 cpus={os.cpu_count()}  k={args.k}  block={args.block_size}")
+    print(f"{'size':>9} {'serial s':>9} " + ' '.join(f"{f'x{workers} s':>8} {'speedup':>8}" for workers in args.workers))
+    for size in args.sizes:
+        matrix = catalog_matrix(size, args.seed)
+        start = time.perf_counter()
+        expected = build_neighbor_table(matrix, k=args.k, block_size=args.block_size)
+        row = {'size': size, 'serial_seconds': round(time.perf_counter() - start, 3), 'parallel': {}}
+        for workers in args.workers:
+            start = time.perf_counter()
+            indices, scores = build_neighbor_table_parallel(matrix, k=args.k, block_size=args.block_size,
+                                                            workers=workers)
+            seconds = time.perf_counter() - start
+            assert np.array_equal(indices, expected[0]) and np.array_equal(scores, expected[1])
+            row['parallel'][workers] = {'seconds': round(seconds, 3),
+                                        'speedup': round(row['serial_seconds'] / seconds, 2)}
+        results.append(row)
+        print(f"{size:>9} {row['serial_seconds']:>9} " + ' '.join(
+            f"{row['parallel'][workers]['seconds']:>8} {row['parallel'][workers]['speedup']:>8}"
+            for workers in args.workers))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'cpus': os.cpu_count(), 'k': args.k, 'results': results}, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
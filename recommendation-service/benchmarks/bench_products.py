@@ -0,0 +1,103 @@
+"""
+Metadata produk: DataFrame (df.iloc per baris hasil) vs ProductStore kolumnar.
+
+Per ukuran katalog sintetis:
+    memori per produk   df[['nama_pakaian', 'categories', 'type']].memory_usage(deep=True)
+                        vs ProductStore.nbytes (blob UTF-8 + offsets + kode interned)
+    build hasil         p50 / p99 membangun `k` dict hasil dari index acak
+                        (loop df.iloc seperti kode lama vs store.rows)
+    load                waktu ProductStore.load (mmap) dari direktori yang disimpan
+
+    python benchmarks/bench_products.py --sizes 10000 100000 1000000 --k 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from bench_workers import write_catalog  # noqa: E402
+from product_store import ProductStore  # noqa: E402
+
+COLUMNS = ['nama_pakaian', 'categories', 'type']
+
+
+def iloc_rows(df, indices):
+    """Cara lama: satu Series per baris hasil"""
+    rows = []
+    for idx in indices:
+        product = df.iloc[idx]
+        rows.append({'nama_pakaian': product['nama_pakaian'], 'categories': product['categories'],
+                     'type': product['type']})
+    return rows
+
+
+def timed(fn, queries):
+    latencies = []
+    for indices in queries:
+        start = time.perf_counter()
+        fn(indices)
+        latencies.append(time.perf_counter() - start)
+    values = np.asarray(latencies) * 1e6
+    return round(float(np.percentile(values, 50)), 1), round(float(np.percentile(values, 99)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    print(f"{'size':>9} {'df B/prod':>10} {'store B/prod':>13} {'iloc p50 us':>12} {'iloc p99 us':>12} "
+          f"{'store p50 us':>13} {'store p99 us':>13} {'load ms':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'catalog.csv')
+            write_catalog(path, size, seed=args.seed)
+            df = pd.read_csv(path, sep=';')
+
+            start = time.perf_counter()
+            store = ProductStore.from_frame(df)
+            build_seconds = time.perf_counter() - start
+            assert store.rows([0, size - 1]) == iloc_rows(df, [0, size - 1])
+
+            store.save(os.path.join(workdir, 'products'))
+            start = time.perf_counter()
+            loaded = ProductStore.load(os.path.join(workdir, 'products'))
+            load_ms = (time.perf_counter() - start) * 1000
+
+            queries = [rng.integers(0, size, args.k) for _ in range(args.queries)]
+            row = {
+                'size': size,
+                'df_bytes_per_product': round(df[COLUMNS].memory_usage(deep=True, index=False).sum() / size, 1),
+                'store_bytes_per_product': round(store.nbytes / size, 1),
+                'store_build_seconds': round(build_seconds, 3),
+                'load_mmap_ms': round(load_ms, 2)
+            }
+            row['iloc_p50_us'], row['iloc_p99_us'] = timed(lambda indices: iloc_rows(df, indices), queries)
+            row['store_p50_us'], row['store_p99_us'] = timed(loaded.rows, queries)
+            results.append(row)
+            print(f"{size:>9} {row['df_bytes_per_product']:>10} {row['store_bytes_per_product']:>13} "
+                  f"{row['iloc_p50_us']:>12} {row['iloc_p99_us']:>12} {row['store_p50_us']:>13} "
+                  f"{row['store_p99_us']:>13} {row['load_mmap_ms']:>8}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Serialisasi response rekomendasi: dict per item + flask.jsonify (cara lama) vs
+fragment JSON yang di-prerender + json_render.dumps (ProductStore.render_rows).
+
+Per ukuran hasil `k` (default 8 = halaman category, 20, 50) dari katalog sintetis:
+    dict+jsonify     store.rows + skor per item, lalu jsonify di app context
+    fragment         store.render_rows (prerender) + json_render.dumps
+    gzip             ukuran body mentah vs gzip (level RESPONSE_GZIP_LEVEL) dan waktu kompres
+Encoder yang dipakai (orjson / json) ikut dicatat.
+
+    python benchmarks/bench_render.py --size 100000 --k 8 20 50
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from flask import Flask, jsonify  # noqa: E402
+
+import json_render  # noqa: E402
+from bench_workers import write_catalog  # noqa: E402
+from product_store import ProductStore  # noqa: E402
+
+
+def dict_body(store, indices, scores):
+    recommendations = store.rows(indices)
+    for product, score in zip(recommendations, scores):
+        score = float(score)
+        product['similarity_score'] = round(score, 3)
+        product['match_percentage'] = round(score * 100, 1)
+    return jsonify({'success': True, 'recommendations': recommendations, 'total': len(recommendations),
+                    'model_generation': 1}).get_data()
+
+
+def fragment_body(store, indices, scores):
+    return json_render.dumps({'success': True, 'recommendations': store.render_rows(indices, scores),
+                              'total': len(indices), 'model_generation': 1})
+
+
+def timed(fn, queries):
+    latencies = []
+    for indices, scores in queries:
+        start = time.perf_counter()
+        fn(indices, scores)
+        latencies.append(time.perf_counter() - start)
+    values = np.asarray(latencies) * 1e6
+    return round(float(np.percentile(values, 50)), 1), round(float(np.percentile(values, 99)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Synthetic catalog size')
+    parser.add_argument('--k', type=int, nargs='+', default=[8, 20, 50], help='Results per response')
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--gzip-level', type=int, default=int(os.environ.get('RESPONSE_GZIP_LEVEL', '5')))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'catalog.csv')
+        write_catalog(path, args.size, seed=args.seed)
+        df = pd.read_csv(path, sep=';')
+    store = ProductStore.from_frame(df)
+    start = time.perf_counter()
+    store.prerender()
+    prerender_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(args.seed)
+    flask_app = Flask(__name__)
+    report = {'size': args.size, 'encoder': json_render.ENCODER, 'prerender_seconds': round(prerender_seconds, 3),
+              'fragment_bytes_per_product': round(store.fragment_blob.nbytes / args.size, 1), 'results': []}
+    print(f"🧪 encoder={json_render.ENCODER}  prerender {args.size} products: {prerender_seconds:.2f}s "
+          f"({report['fragment_bytes_per_product']} B/product)")
+    print(f"{'k':>4} {'dict p50 us':>12} {'dict p99 us':>12} {'frag p50 us':>12} {'frag p99 us':>12} "
+          f"{'bytes':>7} {'gzip':>6} {'gzip us':>8}")
+    with flask_app.app_context():
+        for k in args.k:
+            queries = []
+            for _ in range(args.queries):
+                scores = np.sort(rng.random(k))[::-1]
+                queries.append((rng.integers(0, args.size, k), scores))
+            indices, scores = queries[0]
+            body = fragment_body(store, indices, scores)
+            assert json.loads(body) == json.loads(dict_body(store, indices, scores))
+
+            start = time.perf_counter()
+            compressed = gzip.compress(body, compresslevel=args.gzip_level, mtime=0)
+            gzip_us = (time.perf_counter() - start) * 1e6
+            row = {'k': k, 'body_bytes': len(body), 'gzip_bytes': len(compressed), 'gzip_us': round(gzip_us, 1)}
+            row['dict_p50_us'], row['dict_p99_us'] = timed(lambda i, s: dict_body(store, i, s), queries)
+            row['fragment_p50_us'], row['fragment_p99_us'] = timed(lambda i, s: fragment_body(store, i, s), queries)
+            report['results'].append(row)
+            print(f"{k:>4} {row['dict_p50_us']:>12} {row['dict_p99_us']:>12} {row['fragment_p50_us']:>12} "
+                  f"{row['fragment_p99_us']:>12} {row['body_bytes']:>7} {row['gzip_bytes']:>6} {row['gzip_us']:>8}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Startup report: waktu import app dan time-to-first-response, STARTUP_MODE=blocking
+(model dibangun saat import, perilaku lama) vs background (server bind dulu).
+
+Per mode, server Flask dijalankan dua kali dengan bundle model yang sama:
+cold (bundle kosong, fit TF-IDF) lalu warm (load model yang sudah dipersist).
+Dari saat proses di-spawn dicatat:
+    first_response  /health pertama yang dijawab (liveness)
+    ready           /health/ready = 200 (snapshot model pertama dipublish)
+    first_similar   response pertama /recommendations/similar
+
+Ditambah `import app` in-process per mode dan modul dengan waktu import
+kumulatif terbesar (python -X importtime).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --size 100000 --json startup.json
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import start_server  # noqa: E402
+
+MODES = ('blocking', 'background')
+
+
+def request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read() or b'null')
+
+
+def poll(port, path, deadline, interval=0.01):
+    """Detik sampai `path` menjawab 200; None kalau lewat deadline"""
+    while time.perf_counter() < deadline:
+        try:
+            status, _ = request(port, 'GET', path)
+            if status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(interval)
+    return None
+
+
+def serve_once(env, port, product_name, timeout):
+    start = time.perf_counter()
+    process = start_server('flask', port, cache=False, env=env)
+    try:
+        deadline = start + timeout
+        first = poll(port, '/health', deadline)
+        ready = poll(port, '/health/ready', deadline)
+        if first is None or ready is None:
+            raise SystemExit(f'❌ Server did not become ready within {timeout}s')
+        request(port, 'POST', '/recommendations/similar', {'product_name': product_name})
+        similar = time.perf_counter()
+        _, health = request(port, 'GET', '/health')
+        startup = health.get('startup') or {}
+        return {
+            'first_response_seconds': round(first - start, 3),
+            'ready_seconds': round(ready - start, 3),
+            'first_similar_seconds': round(similar - start, 3),
+            'model_start': startup.get('mode'),
+            'ml_import_seconds': startup.get('ml_import_seconds'),
+            'build_seconds': startup.get('seconds')
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_seconds(env):
+    """Waktu `import app` saja (tanpa menunggu model)"""
+    code = ("import time; start = time.perf_counter(); import app; "
+            "print('IMPORT', time.perf_counter() - start); import os; os._exit(0)")
+    output = subprocess.run([sys.executable, '-c', code], cwd=SERVICE_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    line = [line for line in output.splitlines() if line.startswith('IMPORT ')][-1]
+    return round(float(line.split()[1]), 3)
+
+
+def top_imports(env, limit):
+    """
+    Modul dengan waktu import kumulatif terbesar (-X importtime), termasuk yang di-import saat
+    model dibangun. Dijalankan dengan STARTUP_MODE=blocking: kedalaman import dicatat per proses,
+    jadi import dari builder thread yang berjalan bersamaan akan mengacaukan indentasinya.
+    """
+    code = "import app; import os; os._exit(0)"
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=SERVICE_DIR,
+                            env={**env, 'STARTUP_MODE': 'blocking'}, capture_output=True, text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Level pertama di bawah app (indentasi 2 + 1 spasi pemisah)
+        if name.startswith('   ') and not name.startswith('    '):
+            modules.append((name.strip(), round(int(cumulative) / 1e6, 3)))
+    return sorted(modules, key=lambda item: -item[1])[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=0, help='Synthetic catalog size (0 = repo CSV)')
+    parser.add_argument('--port', type=int, default=5411)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--top', type=int, default=8, help='Number of slowest imports to list')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    report = {'size': args.size, 'modes': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {**os.environ, 'SHARED_MODEL_DIR': '', 'COPURCHASE_DIR': os.path.join(workdir, 'copurchase')}
+        product_name = 'Blazer'
+        if args.size:
+            from bench_workers import write_catalog
+
+            env['CATALOG_CSV'] = os.path.join(workdir, 'catalog.csv')
+            write_catalog(env['CATALOG_CSV'], args.size)
+            with open(env['CATALOG_CSV'], 'r', encoding='utf-8') as file:
+                product_name = file.readlines()[1].split(';')[1]
+
+        print(f"{'mode':>10} {'model':>6} {'import s':>9} {'1st resp s':>11} {'ready s':>8} "
+              f"{'1st similar s':>14} {'ML import s':>12}")
+        for mode in MODES:
+            mode_env = {**env, 'STARTUP_MODE': mode, 'MODEL_BUNDLE_DIR': os.path.join(workdir, f'bundle-{mode}')}
+            rows = []
+            for _ in ('cold', 'warm'):
+                row = serve_once(mode_env, args.port, product_name, args.timeout)
+                row['import_seconds'] = import_seconds(mode_env)
+                rows.append(row)
+                print(f"{mode:>10} {row['model_start'] or '-':>6} {row['import_seconds']:>9} "
+                      f"{row['first_response_seconds']:>11} {row['ready_seconds']:>8} "
+                      f"{row['first_similar_seconds']:>14} {row['ml_import_seconds'] or '-':>12}")
+            report['modes'][mode] = rows
+
+        report['top_imports'] = top_imports(env, args.top)
+    print('\n🐢 Slowest imports made by app (cumulative seconds):')
+    for name, seconds in report['top_imports']:
+        print(f"   {seconds:>7}  {name}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
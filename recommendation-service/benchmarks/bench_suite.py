@@ -0,0 +1,240 @@
+"""
+Benchmark suite engine rekomendasi pada katalog sintetis (id;nama_pakaian;categories;type).
+
+Per ukuran katalog:
+    in-process (subprocess baru, bundle kosong):
+        build (cold start), RSS / peak RSS, p50 / p99 query nama (similar) dan
+        category / type, reload warm (bundle) dan cold (tanpa bundle)
+    HTTP (server dijalankan dengan katalog + bundle yang sama, result cache mati):
+        throughput + p50 / p99 query nama dan category dari load generator lokal
+
+Hasil ditulis sebagai JSON (dengan commit git + info mesin); --baseline
+membandingkan dengan hasil commit lain dan mencetak perubahan per metrik.
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 --json bench.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 --json new.json --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+
+from bench_workers import write_catalog  # noqa: E402
+from load_test import SERVERS, run_load, start_server, wait_until_ready  # noqa: E402
+
+# Metrik yang dibandingkan dengan --baseline (lebih kecil lebih baik, kecuali rps)
+COMPARED = ('build_seconds', 'ready_seconds', 'rss_mb', 'name_p50_ms', 'name_p99_ms', 'category_p50_ms', 'category_p99_ms',
+            'reload_warm_seconds', 'reload_cold_seconds', 'rps', 'p50_ms', 'p99_ms')
+
+
+def percentiles(samples):
+    values = np.asarray(samples) * 1000
+    return round(float(np.percentile(values, 50)), 3), round(float(np.percentile(values, 99)), 3)
+
+
+def rss_mb():
+    with open('/proc/self/status', 'r') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def child(queries, seed):
+    """Dijalankan di subprocess dengan CATALOG_CSV / MODEL_BUNDLE_DIR dari parent; print satu baris JSON"""
+    sys.path.insert(0, SERVICE_DIR)
+    start = time.perf_counter()
+    import app as service
+    import_seconds = time.perf_counter() - start
+
+    manager = service.model_manager
+    engine = manager.wait_ready()
+    result = {
+        'products': len(engine.df),
+        'startup_mode': engine.startup['mode'],
+        'build_seconds': engine.startup['seconds'],
+        'import_seconds': round(import_seconds, 3),
+        'ready_seconds': round(time.perf_counter() - start, 3),
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+    rng = random.Random(seed)
+    names = [engine.df['nama_pakaian'].iloc[rng.randrange(len(engine.df))] for _ in range(queries)]
+    latencies = []
+    for name in names:
+        start = time.perf_counter()
+        engine.get_recommendations_by_product_name(name, n=5)
+        latencies.append(time.perf_counter() - start)
+    result['name_p50_ms'], result['name_p99_ms'] = percentiles(latencies)
+
+    groups = [(category, product_type) for category in ('men', 'women')
+              for product_type in ('topwear', 'bottomwear', 'outerwear')]
+    latencies = []
+    for _ in range(queries):
+        category, product_type = rng.choice(groups)
+        start = time.perf_counter()
+        engine.get_recommendations_by_category_type(category, product_type, n=8, offset=rng.randrange(100))
+        latencies.append(time.perf_counter() - start)
+    result['category_p50_ms'], result['category_p99_ms'] = percentiles(latencies)
+
+    # Reload seperti POST /reload?wait=1: warm (bundle CSV yang sama), lalu cold (bundle dihapus)
+    reload = lambda current: (service.ClothingRecommendationEngine(), None)
+    start = time.perf_counter()
+    manager.submit('reload', reload, wait=True)
+    result['reload_warm_seconds'] = round(time.perf_counter() - start, 3)
+    shutil.rmtree(service.MODEL_BUNDLE_DIR, ignore_errors=True)
+    start = time.perf_counter()
+    manager.submit('reload', reload, wait=True)
+    result['reload_cold_seconds'] = round(time.perf_counter() - start, 3)
+    print(json.dumps(result))
+
+
+def in_process(env, queries, seed):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--queries', str(queries), '--seed', str(seed)],
+        cwd=SERVICE_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def over_http(env, server, port, clients, duration, catalog_path, seed):
+    rng = random.Random(seed)
+    with open(catalog_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()[1:]
+    names = [rng.choice(lines).split(';')[1] for _ in range(200)]
+    mixes = {
+        'name': [('POST', '/recommendations/similar', {'product_name': name}) for name in names],
+        'category': [('GET', f'/recommendations/category/{category}/type/{product_type}?limit=8', None)
+                     for category in ('Men', 'Women') for product_type in ('topwear', 'bottomwear', 'outerwear')]
+    }
+
+    url = f'http://127.0.0.1:{port}'
+    process = start_server(server, port, cache=False, env=env)
+    try:
+        wait_until_ready(url, timeout=1800)
+        return {kind: run_load(url, clients, duration, names, mix=mix) for kind, mix in mixes.items()}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def machine_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def flatten(row):
+    """{'size': .., 'in_process': {..}, 'http': {'name': {..}}} -> {'in_process.name_p50_ms': ..}"""
+    flat = {}
+    for key, value in row['in_process'].items():
+        flat[f'in_process.{key}'] = value
+    for kind, metrics in row.get('http', {}).items():
+        for key, value in metrics.items():
+            flat[f'http.{kind}.{key}'] = value
+    return flat
+
+
+def compare(report, baseline):
+    base_rows = {row['size']: flatten(row) for row in baseline['results']}
+    print(f"\n📊 Compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('created_at')})")
+    for row in report['results']:
+        before = base_rows.get(row['size'])
+        if before is None:
+            continue
+        for key, value in flatten(row).items():
+            old = before.get(key)
+            if key.rsplit('.', 1)[-1] not in COMPARED or not isinstance(value, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            worse = change < 0 if key.endswith('rps') else change > 0
+            marker = '🔺' if worse and abs(change) >= 10 else '  '
+            print(f"{marker} {row['size']:>9} {key:<36} {old:>10} -> {value:>10} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', choices=sorted(SERVERS), default='flask')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5401)
+    parser.add_argument('--no-http', action='store_true', help='Skip the HTTP phase')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='JSON from an earlier run to compare against')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.queries, args.seed)
+        return
+
+    report = {'meta': {**machine_info(), 'args': {key: value for key, value in vars(args).items()
+                                                   if key not in ('child', 'json', 'baseline')}},
+              'results': []}
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            catalog_path = os.path.join(workdir, 'catalog.csv')
+            write_catalog(catalog_path, size, seed=args.seed)
+            env = {
+                **os.environ,
+                'CATALOG_CSV': catalog_path,
+                'MODEL_BUNDLE_DIR': os.path.join(workdir, 'bundle'),
+                'COPURCHASE_DIR': os.path.join(workdir, 'copurchase'),
+                'SHARED_MODEL_DIR': '',
+                'RESULT_CACHE_SIZE': '0',
+                'SIMILAR_BATCH_SIZE': '0'
+            }
+            row = {'size': size, 'in_process': in_process(env, args.queries, args.seed)}
+            stats = row['in_process']
+            print(f"\n📦 {size} products: build {stats['build_seconds']}s ({stats['startup_mode']}), "
+                  f"RSS {stats['rss_mb']} MB (peak {stats['peak_rss_mb']} MB), "
+                  f"reload warm {stats['reload_warm_seconds']}s / cold {stats['reload_cold_seconds']}s")
+            print(f"   in-process  name p50 {stats['name_p50_ms']} ms p99 {stats['name_p99_ms']} ms | "
+                  f"category p50 {stats['category_p50_ms']} ms p99 {stats['category_p99_ms']} ms")
+
+            if not args.no_http:
+                row['http'] = over_http(env, args.server, args.port, args.clients, args.duration,
+                                        catalog_path, args.seed)
+                for kind, metrics in row['http'].items():
+                    print(f"   http {kind:<9} {metrics['rps']} rps, p50 {metrics['p50_ms']} ms, "
+                          f"p99 {metrics['p99_ms']} ms  {metrics['statuses']}")
+            report['results'].append(row)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            compare(report, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Persiapan text TF-IDF di build_model: iterrows + f-string (cara lama) vs concat per kolom
+(text_features.product_texts).
+
+Per ukuran katalog sintetis dicatat detik per mode dan, sebagai pembanding, waktu
+TfidfVectorizer.fit_transform atas text yang sama (bagian build yang tidak berubah).
+Kedua mode diverifikasi menghasilkan text yang identik.
+
+    python benchmarks/bench_text.py --sizes 100000 1000000
+    python benchmarks/bench_text.py --weights "type=2" --json text.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+import text_features  # noqa: E402
+from bench_workers import write_catalog  # noqa: E402
+
+# Sama dengan app.VECTORIZER_PARAMS (app tidak di-import: import app langsung membangun model)
+VECTORIZER_PARAMS = {'stop_words': 'english', 'max_features': 1000}
+
+
+def iterrows_texts(df, weights):
+    """Cara lama: satu Series per baris"""
+    return [text_features.product_text(row, weights) for _, row in df.iterrows()]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--weights', default='', help='TEXT_FIELD_WEIGHTS spec, e.g. "type=2"')
+    parser.add_argument('--skip-iterrows-above', type=int, default=1000000,
+                        help='Do not time the iterrows baseline above this many rows')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    weights = text_features.parse_weights(args.weights)
+    results = []
+    print(f"🧪 cpus={os.cpu_count()}  weights={weights}")
+    print(f"{'size':>9} {'iterrows s':>11} {'columns s':>10} {'fit s':>7}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'catalog.csv')
+            write_catalog(path, size, seed=args.seed)
+            df = pd.read_csv(path, sep=';')
+
+        texts, columns_seconds = timed(lambda: text_features.product_texts(df, weights))
+        row = {'size': size, 'columns_seconds': columns_seconds, 'iterrows_seconds': None}
+        if size <= args.skip_iterrows_above:
+            expected, row['iterrows_seconds'] = timed(lambda: iterrows_texts(df, weights))
+            assert expected == texts
+        _, row['fit_seconds'] = timed(lambda: TfidfVectorizer(**VECTORIZER_PARAMS).fit_transform(texts))
+        results.append(row)
+        print(f"{size:>9} {row['iterrows_seconds'] if row['iterrows_seconds'] is not None else '-':>11} "
+              f"{columns_seconds:>10} {row['fit_seconds']:>7}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'cpus': os.cpu_count(), 'weights': weights, 'results': results}, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
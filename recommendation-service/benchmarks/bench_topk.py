@@ -0,0 +1,84 @@
+"""
+Benchmark latency per request untuk similar-products: cosine_similarity + full argsort
+(cara lama) vs. CSR ter-normalisasi + argpartition (cara baru), pada beberapa ukuran katalog.
+
+    python benchmarks/bench_topk.py --sizes 1000 10000 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from similarity import l2_normalize_rows, row_scores, top_k_indices  # noqa: E402
+
+BRANDS = ['Connexion', 'Details', 'Nevada', 'Annisa', 'LGS', 'Cardinal', 'Hammer', 'Osella']
+ITEMS = ['Blazer', 'Blouse', 'Kemeja', 'Kaos', 'Celana', 'Rok', 'Dress', 'Jaket', 'Hoodie', 'Sweater']
+DETAILS = ['Lengan Panjang', 'Lengan Pendek', 'Slim Fit', 'Oversized', 'Crop', 'Basic', 'Polo', 'Denim']
+COLORS = ['BLACK', 'WHITE', 'NAVY', 'KHAKI', 'OLIVE', 'PASTEL GREEN', 'MAROON', 'GREY']
+CATEGORIES = ['men', 'women']
+TYPES = ['topwear', 'bottomwear', 'outerwear']
+
+
+def synthetic_corpus(size, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        name = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(DETAILS)} {rng.choice(CATEGORIES)} - {rng.choice(COLORS)} {i % 997}"
+        corpus.append(f"{name} {rng.choice(CATEGORIES)} {rng.choice(TYPES)}")
+    return corpus
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000, q))
+
+
+def run(size, queries, n):
+    corpus = synthetic_corpus(size)
+    tfidf_matrix = TfidfVectorizer(stop_words='english', max_features=1000).fit_transform(corpus)
+    normalized = l2_normalize_rows(tfidf_matrix)
+    rng = random.Random(7)
+    rows = [rng.randrange(size) for _ in range(queries)]
+
+    old, new = [], []
+    for idx in rows:
+        start = time.perf_counter()
+        scores = cosine_similarity(tfidf_matrix[idx:idx + 1], tfidf_matrix).flatten()
+        scores.argsort()[::-1][1:n + 1]
+        old.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        top_k_indices(row_scores(normalized, idx), n, exclude=[idx])
+        new.append(time.perf_counter() - start)
+
+    return {
+        'size': size,
+        'old_p50_ms': percentile(old, 50),
+        'old_p99_ms': percentile(old, 99),
+        'new_p50_ms': percentile(new, 50),
+        'new_p99_ms': percentile(new, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-n', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'products':>10} | {'old p50':>9} {'old p99':>9} | {'new p50':>9} {'new p99':>9} | speedup p50")
+    for size in args.sizes:
+        result = run(size, args.queries, args.n)
+        speedup = result['old_p50_ms'] / max(result['new_p50_ms'], 1e-9)
+        print(f"{size:>10} | {result['old_p50_ms']:>7.3f}ms {result['old_p99_ms']:>7.3f}ms | "
+              f"{result['new_p50_ms']:>7.3f}ms {result['new_p99_ms']:>7.3f}ms | {speedup:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Memory per worker gunicorn: model per worker (SHARED_MODEL_DIR='') vs shared snapshot (mmap).
+
+Katalog sintetis ditulis ke direktori sementara (CATALOG_CSV), gunicorn dijalankan
+dengan beberapa jumlah worker, setiap worker dipanaskan dengan request similar,
+lalu RSS / PSS / USS tiap worker dibaca dari /proc/<pid>/smaps_rollup (Linux).
+
+    python benchmarks/bench_workers.py --size 50000 --workers 1 2 4 8
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_topk import BRANDS, CATEGORIES, COLORS, DETAILS, ITEMS, TYPES  # noqa: E402
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def write_catalog(path, size, seed=42):
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file, delimiter=';')
+        writer.writerow(['id', 'nama_pakaian', 'categories', 'type'])
+        for i in range(size):
+            name = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(DETAILS)} - {rng.choice(COLORS)} {i}"
+            writer.writerow([i, name, rng.choice(CATEGORIES), rng.choice(TYPES)])
+
+
+def memory_kb(pid):
+    """Rss, Pss dan USS (Private_Clean + Private_Dirty) dalam KB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'uss': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children', 'r') as file:
+        return [int(pid) for pid in file.read().split()]
+
+
+def wait_for_workers(port, master_pid, workers, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200 and len(worker_pids(master_pid)) >= workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit('❌ gunicorn did not become ready')
+
+
+def warm_up(port, requests):
+    """Sebar request ke semua worker supaya halaman model benar-benar tersentuh"""
+    for i in range(requests):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        connection.request('POST', '/recommendations/similar', body=json.dumps({'product_name': f' {i}'}),
+                           headers={'Content-Type': 'application/json', 'Connection': 'close'})
+        connection.getresponse().read()
+        connection.close()
+
+
+def run(mode, workers, port, workdir, warm_requests):
+    env = {
+        **os.environ,
+        'CATALOG_CSV': os.path.join(workdir, 'catalog.csv'),
+        'MODEL_BUNDLE_DIR': os.path.join(workdir, 'bundle'),
+        'SHARED_MODEL_DIR': os.path.join(workdir, 'shared') if mode == 'shared' else '',
+        'WEB_CONCURRENCY': str(workers),
+        'BIND': f'127.0.0.1:{port}',
+        'RESULT_CACHE_SIZE': '0'
+    }
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=SERVICE_DIR,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_workers(port, process.pid, workers)
+        ready_seconds = time.perf_counter() - start
+        warm_up(port, warm_requests)
+        samples = [memory_kb(pid) for pid in worker_pids(process.pid)]
+    finally:
+        process.terminate()
+        process.wait()
+
+    mean = lambda key: round(sum(sample[key] for sample in samples) / len(samples) / 1024, 1)
+    return {
+        'mode': mode,
+        'workers': workers,
+        'ready_seconds': round(ready_seconds, 2),
+        'rss_mb': mean('rss'),
+        'pss_mb': mean('pss'),
+        'uss_mb': mean('uss')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--port', type=int, default=5301)
+    parser.add_argument('--warm-requests', type=int, default=200)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        write_catalog(os.path.join(workdir, 'catalog.csv'), args.size)
+        print(f"{'mode':>7} {'workers':>8} {'ready s':>8} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}   (mean per worker)")
+        for mode in ('copy', 'shared'):
+            for workers in args.workers:
+                row = run(mode, workers, args.port, workdir, args.warm_requests)
+                results.append(row)
+                print(f"{row['mode']:>7} {row['workers']:>8} {row['ready_seconds']:>8} "
+                      f"{row['rss_mb']:>8} {row['pss_mb']:>8} {row['uss_mb']:>8}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Load test: Flask dev server (app.run) vs ASGI mode (uvicorn asgi_app:app).
+
+Tiap client thread mengirim request berurutan (keep-alive) ke endpoint
+campuran similar / category selama --duration detik; dicatat throughput,
+p50/p99 latency dan jumlah 429.
+
+    python benchmarks/load_test.py --compare --clients 16 32 64 --duration 10
+    python benchmarks/load_test.py --url http://localhost:5001 --clients 32
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVERS = {
+    'flask': [sys.executable, '-c',
+              "import sys, app; app.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+             '--port', '{port}', '--log-level', 'warning']
+}
+
+
+def request_mix(product_names):
+    """Campuran request yang mirip traffic checkout: mayoritas similar, sisanya category"""
+    mix = [('POST', '/recommendations/similar', {'product_name': name}) for name in product_names]
+    mix += [('GET', f'/recommendations/category/{category}/type/{product_type}?limit=8', None)
+            for category in ('Men', 'Women') for product_type in ('topwear', 'bottomwear')]
+    return mix
+
+
+def client_loop(host, port, mix, offset, deadline, results):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    latencies, statuses = [], {}
+    i = offset
+    while time.perf_counter() < deadline:
+        method, path, body = mix[i % len(mix)]
+        i += 1
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            status = 'error'
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    connection.close()
+    results.append((latencies, statuses))
+
+
+def run_load(url, clients, duration, product_names, mix=None):
+    parts = urlsplit(url)
+    mix = mix or request_mix(product_names)
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client_loop, args=(parts.hostname, parts.port, mix, i, deadline, results))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(result[0]) for result in results]) * 1000
+    statuses = {}
+    for _, counts in results:
+        for status, count in counts.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    return {
+        'clients': clients,
+        'requests': int(latencies.size),
+        'rps': round(latencies.size / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if latencies.size else None,
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2) if latencies.size else None,
+        'statuses': statuses
+    }
+
+
+def wait_until_ready(url, timeout=120, path='/health/ready', interval=0.5):
+    """Poll `path` sampai 200 (readiness: model pertama sudah dipublish); return detik menunggu"""
+    parts = urlsplit(url)
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request('GET', path)
+            if connection.getresponse().status == 200:
+                return time.time() - start
+        except OSError:
+            pass
+        time.sleep(interval)
+    raise SystemExit(f'❌ Server at {url} did not become ready')
+
+
+def sample_product_names(url, count=50):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    names = []
+    for category, product_type in (('Men', 'topwear'), ('Women', 'topwear'), ('Men', 'bottomwear')):
+        connection.request('GET', f'/recommendations/category/{category}/type/{product_type}?limit=50')
+        data = json.loads(connection.getresponse().read())
+        names += [product['nama_pakaian'] for product in data.get('recommendations', [])]
+    connection.close()
+    return names[:count] or ['Blazer']
+
+
+def start_server(name, port, cache, env=None):
+    command = [part.format(port=port) for part in SERVERS[name]]
+    if name == 'flask':
+        command.append(str(port))
+    # Default result cache dimatikan supaya yang diukur adalah jalur scoring, bukan cache hit
+    env = dict(env or os.environ)
+    if not cache:
+        env['RESULT_CACHE_SIZE'] = '0'
+    return subprocess.Popen(command, cwd=SERVICE_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def print_row(label, row):
+    print(f"{label:>6} {row['clients']:>8} {row['requests']:>9} {row['rps']:>9} "
+          f"{row['p50_ms']:>9} {row['p99_ms']:>9}  {row['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Test a running server instead of starting one')
+    parser.add_argument('--compare', action='store_true', help='Start Flask and ASGI servers and compare them')
+    parser.add_argument('--clients', type=int, nargs='+', default=[16, 32, 64])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--cache', action='store_true', help='Keep the result cache enabled on started servers')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    if not args.url and not args.compare:
+        parser.error('use --url or --compare')
+
+    targets = [('url', args.url, None)] if args.url else []
+    if args.compare:
+        targets = [(name, f'http://127.0.0.1:{args.port + i}', name) for i, name in enumerate(SERVERS)]
+
+    report = {}
+    print(f"{'server':>6} {'clients':>8} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9}  statuses")
+    for label, url, server in targets:
+        process = start_server(server, urlsplit(url).port, args.cache) if server else None
+        try:
+            wait_until_ready(url)
+            product_names = sample_product_names(url)
+            report[label] = []
+            for clients in args.clients:
+                row = run_load(url, clients, args.duration, product_names)
+                report[label].append(row)
+                print_row(label, row)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Item-to-item co-purchase ("bought together") dari export order MongoDB.
+
+Input: order dengan bentuk orderModel (JSON array atau NDJSON, satu order per baris):
+    {"_id": "...", "userID": "...", "items": [{"_id": "...", "name": "...", "size": "M", "quantity": 1}],
+     "status": "...", "paymentStatus": "paid", "date": 1718000000000}
+
+Item dikenali dari `name` (lowercase), sama seperti route checkout / personalized
+dan name index engine. Order dengan paymentStatus failed / expired / cancelled dilewati.
+
+Build (NumPy / SciPy, tanpa loop per pasangan):
+    1. basket matrix B (order x item, biner; item yang sama di satu order dihitung sekali)
+    2. co-occurrence C = B^T B, diagonal = jumlah order per item
+    3. skor = cosine biner C_ij / sqrt(n_i n_j), di-shrink dengan C_ij / (C_ij + shrink)
+       supaya pasangan yang baru sekali dibeli bersama tidak langsung bernilai 1.0
+    4. top-K per item (skor turun, index naik untuk tie) -> tabel neighbors / scores / support
+
+Direktori model (np.load mmap):
+    meta.json  items.json  neighbors.npy  scores.npy  support.npy  counts.npy
+
+    python copurchase.py build orders.ndjson --output models/copurchase --k 20
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from scipy import sparse
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+ITEMS_FILE = 'items.json'
+ARRAY_FILES = ('neighbors', 'scores', 'support', 'counts')
+SKIPPED_PAYMENT_STATUSES = {'failed', 'expired', 'cancelled'}
+
+
+def item_key(name):
+    return str(name).strip().lower()
+
+
+def iter_orders(file):
+    """Order dari file object teks: JSON array (`[...]`) atau NDJSON"""
+    first = file.read(1)
+    while first and first.isspace():
+        first = file.read(1)
+    if first == '[':
+        yield from json.loads(first + file.read())
+        return
+    pending = first
+    for line in file:
+        line = pending + line
+        pending = ''
+        if line.strip():
+            yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def order_items(order):
+    """Nama item unik (display name) dalam satu order, urut seperti di order"""
+    if str(order.get('paymentStatus', '')).lower() in SKIPPED_PAYMENT_STATUSES:
+        return []
+    seen = {}
+    for item in order.get('items') or []:
+        name = item.get('name') if isinstance(item, dict) else None
+        if name and item_key(name) not in seen:
+            seen[item_key(name)] = str(name).strip()
+    return list(seen.values())
+
+
+def _top_k_pairs(rows, cols, scores, support, n_rows, k):
+    """Top-k per baris dari pasangan COO (skor turun, kolom naik untuk tie); tabel N x k, padding -1"""
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores, support = rows[order], cols[order], scores[order], support[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, np.arange(n_rows))[rows]
+    keep = rank < k
+    rows, rank = rows[keep], rank[keep]
+
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    top_scores = np.zeros((n_rows, k), dtype=np.float32)
+    top_support = np.zeros((n_rows, k), dtype=np.int32)
+    neighbors[rows, rank] = cols[keep]
+    top_scores[rows, rank] = scores[keep]
+    top_support[rows, rank] = support[keep]
+    return neighbors, top_scores, top_support
+
+
+class CoPurchaseModel:
+    def __init__(self, items, neighbors, scores, support, counts, meta=None):
+        self.items = items
+        self.neighbors = neighbors
+        self.scores = scores
+        self.support = support
+        self.counts = counts
+        self.meta = meta or {}
+        self.positions = {item_key(name): position for position, name in enumerate(items)}
+
+    @classmethod
+    def build(cls, orders, k=20, shrink=1.0, min_support=1):
+        """Build dari iterable order (dict bentuk orderModel)"""
+        start = time.perf_counter()
+        positions, items = {}, []
+        basket_rows, basket_cols = [], []
+        order_count = 0
+        for order in orders:
+            names = order_items(order)
+            if not names:
+                continue
+            for name in names:
+                key = item_key(name)
+                if key not in positions:
+                    positions[key] = len(items)
+                    items.append(name)
+                basket_rows.append(order_count)
+                basket_cols.append(positions[key])
+            order_count += 1
+
+        baskets = sparse.csr_matrix(
+            (np.ones(len(basket_rows), dtype=np.float32),
+             (np.asarray(basket_rows, dtype=np.int64), np.asarray(basket_cols, dtype=np.int64))),
+            shape=(order_count, len(items))
+        )
+        cooccurrence = (baskets.T @ baskets).tocsr()
+        counts = cooccurrence.diagonal().astype(np.int32)
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+        if min_support > 1:
+            cooccurrence.data[cooccurrence.data < min_support] = 0
+            cooccurrence.eliminate_zeros()
+
+        # Cosine biner + shrinkage, dihitung langsung di pasangan COO
+        coo = cooccurrence.tocoo()
+        support = coo.data.astype(np.int32)
+        norms = np.sqrt(counts[coo.row].astype(np.float64) * counts[coo.col])
+        scores = support / norms * (support / (support + shrink))
+        neighbors, top_scores, top_support = _top_k_pairs(coo.row, coo.col, scores, support, len(items), k)
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'orders': int(order_count),
+            'items': len(items),
+            'pairs': int(cooccurrence.nnz // 2),
+            'k': int(k),
+            'shrink': shrink,
+            'min_support': min_support,
+            'build_seconds': round(time.perf_counter() - start, 3),
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        return cls(items, neighbors, top_scores, top_support, counts, meta)
+
+    def save(self, path):
+        """Tulis ke direktori sementara lalu pindahkan ke `path`"""
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in ARRAY_FILES:
+            np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(staging, ITEMS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.items, file, ensure_ascii=False)
+        with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.meta, file, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.replace(staging, path)
+        return self.meta
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load model; None kalau tidak ada atau versinya beda"""
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('version') != FORMAT_VERSION:
+            return None
+        with open(os.path.join(path, ITEMS_FILE), 'r', encoding='utf-8') as file:
+            items = json.load(file)
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        return cls(items, meta=meta, **arrays)
+
+    def neighbors_of(self, name, k=None):
+        """[(nama item, skor, support)] untuk item `name`; list kosong kalau tidak pernah dibeli bersama"""
+        position = self.positions.get(item_key(name))
+        if position is None:
+            return []
+        row = self.neighbors[position][:k]
+        valid = row >= 0
+        return [
+            (self.items[neighbor], float(score), int(support))
+            for neighbor, score, support in zip(row[valid], self.scores[position][:k][valid],
+                                                self.support[position][:k][valid])
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Build the co-purchase table from an order export')
+    build.add_argument('orders', help='JSON array or NDJSON export of the orders collection')
+    build.add_argument('--output', default=os.path.join('models', 'copurchase'))
+    build.add_argument('--k', type=int, default=20)
+    build.add_argument('--shrink', type=float, default=1.0)
+    build.add_argument('--min-support', type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.orders, 'r', encoding='utf-8') as file:
+        model = CoPurchaseModel.build(iter_orders(file), k=args.k, shrink=args.shrink, min_support=args.min_support)
+    meta = model.save(args.output)
+    print(f"✅ Co-purchase table saved to {args.output}: {meta['orders']} orders, {meta['items']} items, "
+          f"{meta['pairs']} pairs ({meta['build_seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Implementasi TF-IDF murni Python untuk container tanpa numpy / scikit-learn.
+
+Perilakunya mengikuti sklearn TfidfVectorizer dengan parameter yang dipakai app.py
+(token pattern default, lowercase, stop words 'english', smooth idf, norm L2), tetapi vektor disimpan sparse: setiap baris adalah pasangan
+array('i') kolom + array('d') bobot. Scoring memakai inverted index
+term -> postings, jadi hanya produk yang berbagi term dengan query yang disentuh.
+"""
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+# Salinan sklearn.feature_extraction.text.ENGLISH_STOP_WORDS
+ENGLISH_STOP_WORDS = frozenset("""
+    a about above across after afterwards again against all almost alone along already also
+    although always am among amongst amoungst amount an and another any anyhow anyone
+    anything anyway anywhere are around as at back be became because become becomes becoming
+    been before beforehand behind being below beside besides between beyond bill both bottom
+    but by call can cannot cant co con could couldnt cry de describe detail do done down due
+    during each eg eight either eleven else elsewhere empty enough etc even ever every
+    everyone everything everywhere except few fifteen fifty fill find fire first five for
+    former formerly forty found four from front full further get give go had has hasnt have
+    he hence her here hereafter hereby herein hereupon hers herself him himself his how
+    however hundred i ie if in inc indeed interest into is it its itself keep last latter
+    latterly least less ltd made many may me meanwhile might mill mine more moreover most
+    mostly move much must my myself name namely neither never nevertheless next nine no
+    nobody none noone nor not nothing now nowhere of off often on once one only onto or
+    other others otherwise our ours ourselves out over own part per perhaps please put
+    rather re same see seem seemed seeming seems serious several she should show side since
+    sincere six sixty so some somehow someone something sometime sometimes somewhere still
+    such system take ten than that the their them themselves then thence there thereafter
+    thereby therefore therein thereupon these they thick thin third this those though three
+    through throughout thru thus to together too top toward towards twelve twenty two un
+    under until up upon us very via was we well were what whatever when whence whenever
+    where whereafter whereas whereby wherein whereupon wherever whether which while whither
+    who whoever whole whom whose why will with within without would yet you your yours
+    yourself yourselves
+""".split())
+
+
+class SparseRow:
+    """Vektor sparse: kolom terurut (array('i')) + bobot (array('d'))"""
+
+    __slots__ = ('indices', 'values')
+
+    def __init__(self, indices, values):
+        self.indices = indices
+        self.values = values
+
+    def items(self):
+        return zip(self.indices, self.values)
+
+    def __len__(self):
+        return len(self.indices)
+
+
+class TfidfVectorizer:
+    def __init__(self, stop_words=None, max_features=None):
+        self.stop_words = ENGLISH_STOP_WORDS if stop_words == 'english' else frozenset(stop_words or ())
+        self.max_features = max_features
+        self.vocabulary_ = {}
+        self.idf_ = array('d')
+
+    def build_analyzer(self):
+        stop_words = self.stop_words
+
+        def analyze(text):
+            return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in stop_words]
+        return analyze
+
+    def fit_transform(self, texts):
+        analyze = self.build_analyzer()
+        documents = [Counter(analyze(text)) for text in texts]
+
+        document_frequency = Counter()
+        term_frequency = Counter()
+        for counts in documents:
+            document_frequency.update(counts.keys())
+            term_frequency.update(counts)
+
+        terms = list(document_frequency)
+        if self.max_features is not None and len(terms) > self.max_features:
+            # Sama seperti sklearn: simpan term dengan frekuensi korpus tertinggi
+            terms = sorted(terms, key=lambda term: (-term_frequency[term], term))[:self.max_features]
+        self.vocabulary_ = {term: column for column, term in enumerate(sorted(terms))}
+
+        total = len(documents)
+        self.idf_ = array('d', [0.0] * len(self.vocabulary_))
+        for term, column in self.vocabulary_.items():
+            self.idf_[column] = math.log((1 + total) / (1 + document_frequency[term])) + 1.0
+
+        return [self._vectorize(counts) for counts in documents]
+
+    def transform(self, texts):
+        analyze = self.build_analyzer()
+        return [self._vectorize(Counter(analyze(text))) for text in texts]
+
+    def _vectorize(self, counts):
+        weights = sorted(
+            (self.vocabulary_[term], count * self.idf_[self.vocabulary_[term]])
+            for term, count in counts.items() if term in self.vocabulary_
+        )
+        norm = math.sqrt(sum(weight * weight for _, weight in weights)) or 1.0
+        return SparseRow(
+            array('i', [column for column, _ in weights]),
+            array('d', [weight / norm for _, weight in weights])
+        )
+
+
+class InvertedIndex:
+    """Postings per kolom: array dokumen + array bobot, dibangun sekali dari baris TF-IDF"""
+
+    def __init__(self, rows):
+        self.size = len(rows)
+        postings = {}
+        for document, row in enumerate(rows):
+            for column, weight in row.items():
+                entry = postings.get(column)
+                if entry is None:
+                    entry = postings[column] = (array('i'), array('d'))
+                entry[0].append(document)
+                entry[1].append(weight)
+        self.postings = postings
+
+    def score(self, query_row):
+        """Cosine similarity query terhadap semua dokumen; hanya dokumen dengan skor > 0 yang dikembalikan"""
+        scores = {}
+        for column, query_weight in query_row.items():
+            entry = self.postings.get(column)
+            if entry is None:
+                continue
+            for document, weight in zip(*entry):
+                scores[document] = scores.get(document, 0.0) + query_weight * weight
+        return scores
+
+
+def top_k(scores, k, total, exclude=()):
+    """
+    k index teratas dari dict skor sparse (skor turun, index naik untuk yang seri);
+    dokumen tanpa skor dianggap 0, sama seperti similarity.top_k_indices.
+    """
+    exclude = set(exclude)
+    ranked = heapq.nsmallest(
+        k, ((-score, document) for document, score in scores.items() if document not in exclude)
+    )
+    result = [document for _, document in ranked]
+    if len(result) < k:
+        for document in range(total):
+            if len(result) >= k:
+                break
+            if document not in exclude and document not in scores:
+                result.append(document)
+    return result
@@ -0,0 +1,166 @@
+"""
+Index posisi produk per (category, type), dibangun sekali saat build model.
+
+Normalisasi kategori memakai alias yang sama dengan
+ClothingRecommendationEngine.normalize_category: kategori kosong -> 'General',
+alias pria/wanita -> 'men'/'women', kategori lain -> 'women'. Produk kids
+dinormalisasi acak ke men/women di normalize_category; di index produk tersebut
+dimasukkan ke kedua grup supaya hasilnya deterministik.
+"""
+
+MEN_ALIASES = ('men', 'man', 'male', 'pria', 'laki', 'laki-laki')
+WOMEN_ALIASES = ('women', 'woman', 'female', 'wanita', 'perempuan', 'cewek')
+KIDS_ALIASES = ('kids', 'children', 'child', 'anak', 'anak-anak', 'kid')
+GROUP_SEPARATOR = '\x1f'
+
+
+def category_keys(category):
+    """Semua key grup untuk satu nilai kategori (lihat docstring modul)"""
+    if not isinstance(category, str) or not category.strip():
+        return ('General',)
+    category_lower = category.lower().strip()
+    if category_lower in MEN_ALIASES:
+        return ('men',)
+    if category_lower in WOMEN_ALIASES:
+        return ('women',)
+    if category_lower in KIDS_ALIASES:
+        return ('men', 'women')
+    return ('women',)
+
+
+def type_key(product_type):
+    return str(product_type).lower().strip() if product_type is not None else ''
+
+
+class GroupIndex:
+    """
+    Map (category_key, type_key) dan category_key -> list posisi baris.
+
+    Setiap grup disimpan dalam urutan katalog dan, kalau skornya tersedia,
+    juga dalam urutan skor menurun, sehingga lookup + paginasi O(1) + O(limit).
+    """
+
+    def __init__(self, categories, types, scores=None):
+        categories = list(categories)
+        self.size = len(categories)
+        self.groups = {}
+        self.categories = {}
+        self.types = {}
+        for position, (category, product_type) in enumerate(zip(categories, types)):
+            product_type = type_key(product_type)
+            self.types.setdefault(product_type, []).append(position)
+            for key in category_keys(category):
+                self.groups.setdefault((key, product_type), []).append(position)
+                self.categories.setdefault(key, []).append(position)
+
+        # Ranking yang tersedia -> {group_key: posisi terurut}
+        self.ranked = {}
+        for name, values in (scores or {}).items():
+            if values is None:
+                continue
+            order = lambda positions: sorted(positions, key=lambda position: -values[position])
+            ranked_all = order(range(self.size))
+            rank_of = [0] * self.size
+            for rank, position in enumerate(ranked_all):
+                rank_of[position] = rank
+            self.ranked[name] = {
+                'groups': {key: order(positions) for key, positions in self.groups.items()},
+                'categories': {key: order(positions) for key, positions in self.categories.items()},
+                'all': ranked_all,
+                'rank_of': rank_of
+            }
+
+    def export(self):
+        """
+        (meta, posisi) untuk shared snapshot: semua list posisi disambung jadi satu array
+        int32, meta (JSON) memetakan tiap grup ke [start, end]; kebalikan from_export
+        """
+        flat = []
+
+        def span(positions):
+            flat.extend(positions)
+            return [len(flat) - len(positions), len(flat)]
+
+        def spans(mapping):
+            return {GROUP_SEPARATOR.join(key) if isinstance(key, tuple) else key: span(positions)
+                    for key, positions in mapping.items()}
+
+        meta = {
+            'size': self.size,
+            'groups': spans(self.groups),
+            'categories': spans(self.categories),
+            'types': spans(self.types),
+            'ranked': {
+                name: {'groups': spans(ranking['groups']), 'categories': spans(ranking['categories']),
+                       'all': span(ranking['all']), 'rank_of': span(ranking['rank_of'])}
+                for name, ranking in self.ranked.items()
+            }
+        }
+        return meta, flat
+
+    @classmethod
+    def from_export(cls, meta, positions):
+        """Index dari export(); list posisi jadi slice `positions` (boleh mmap), tidak di-copy per proses"""
+        def spans(mapping, tuples=False):
+            return {tuple(key.split(GROUP_SEPARATOR)) if tuples else key: positions[start:end]
+                    for key, (start, end) in mapping.items()}
+
+        index = cls([], [])
+        index.size = meta['size']
+        index.groups = spans(meta['groups'], tuples=True)
+        index.categories = spans(meta['categories'])
+        index.types = spans(meta['types'])
+        index.ranked = {
+            name: {'groups': spans(ranking['groups'], tuples=True), 'categories': spans(ranking['categories']),
+                   'all': positions[slice(*ranking['all'])], 'rank_of': positions[slice(*ranking['rank_of'])]}
+            for name, ranking in meta['ranked'].items()
+        }
+        return index
+
+    def available_rankings(self):
+        return ['catalog'] + sorted(self.ranked)
+
+    def lookup(self, category, product_type=None, rank='catalog'):
+        """
+        Posisi produk untuk category (+ type). Return (positions, fallback) dengan
+        fallback None, 'category' (type tidak ditemukan) atau 'all' (category tidak ditemukan).
+        """
+        ranking = self.ranked.get(rank) if rank != 'catalog' else None
+        groups = ranking['groups'] if ranking else self.groups
+        categories = ranking['categories'] if ranking else self.categories
+
+        sort_key = ranking['rank_of'].__getitem__ if ranking else None
+        keys = category_keys(category)
+        if product_type is not None:
+            positions = _merge([groups.get((key, type_key(product_type)), []) for key in keys], sort_key)
+            if len(positions):
+                return positions, None
+
+        positions = _merge([categories.get(key, []) for key in keys], sort_key)
+        if len(positions):
+            return positions, ('category' if product_type is not None else None)
+
+        return (ranking['all'] if ranking else range(self.size)), 'all'
+
+
+    def filter_positions(self, category=None, product_type=None):
+        """
+        Posisi (urut naik) yang cocok persis dengan filter, tanpa fallback seperti lookup();
+        None kalau tidak ada filter sama sekali.
+        """
+        if category is None and product_type is None:
+            return None
+        if category is None:
+            return self.types.get(type_key(product_type), [])
+        keys = category_keys(category)
+        if product_type is None:
+            return _merge([self.categories.get(key, []) for key in keys])
+        return _merge([self.groups.get((key, type_key(product_type)), []) for key in keys])
+
+
+def _merge(lists, sort_key=None):
+    lists = [positions for positions in lists if len(positions)]
+    if len(lists) <= 1:
+        return lists[0] if lists else []
+    # Hanya terjadi untuk kategori kids (men + women): gabung tanpa duplikat, urutan tetap
+    return sorted(set().union(*lists), key=sort_key)
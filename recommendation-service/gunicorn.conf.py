@@ -0,0 +1,39 @@
+"""
+Gunicorn config untuk serving multi-process dengan model shared read-only.
+
+    gunicorn -c gunicorn.conf.py
+
+Master mengekspor snapshot model sekali (di child process, supaya master sendiri
+tetap kecil) sebelum worker di-fork; setiap worker hanya me-mmap snapshot itu.
+Lihat shared_model.py untuk format snapshot dan koordinasi reload.
+"""
+import os
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Diturunkan ke semua worker; SHARED_MODEL_DIR='' mematikan mode shared (model per worker)
+os.environ.setdefault('SHARED_MODEL_DIR', os.path.join(SERVICE_DIR, 'models', 'shared'))
+
+wsgi_app = 'app:app'
+chdir = SERVICE_DIR
+bind = os.environ.get('BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+# Jangan preload: app yang di-import master akan ikut ter-fork dan halaman Python object-nya
+# ter-copy per worker karena refcount; worker import sendiri lalu attach ke snapshot mmap
+preload_app = False
+
+
+def on_starting(server):
+    if not os.environ['SHARED_MODEL_DIR'] or os.environ.get('SHARED_MODEL_EXPORT_ON_START', '1') != '1':
+        return
+    server.log.info('Exporting shared model snapshot to %s', os.environ['SHARED_MODEL_DIR'])
+    subprocess.run(
+        [sys.executable, os.path.join(SERVICE_DIR, 'shared_model.py'), 'export',
+         '--root', os.environ['SHARED_MODEL_DIR']],
+        cwd=SERVICE_DIR, check=True
+    )
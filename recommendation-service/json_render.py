@@ -0,0 +1,77 @@
+"""
+Encoder JSON untuk response API: orjson kalau terpasang (opsional), selain itu stdlib json.
+
+    dumps(payload)                   -> bytes; nilai RawJSON disisipkan apa adanya
+    RawJSON(b'[...]')                -> potongan JSON yang sudah di-render (mis. dari ProductStore)
+    compress(body, accept_encoding)  -> (body, 'br' | 'gzip' | None) sesuai header Accept-Encoding
+
+Fragment per produk di-render sekali saat build (ProductStore.prerender), jadi response
+hasil rekomendasi cukup disambung dari bytes tanpa membangun dict per item.
+"""
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+
+class RawJSON(bytes):
+    """Bytes JSON valid yang disisipkan apa adanya oleh dumps()"""
+
+
+if orjson is not None:
+    def dumps_value(value):
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    def dumps_value(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(payload):
+    """dict / list -> bytes JSON; RawJSON di level atas dict tidak di-encode ulang"""
+    if not isinstance(payload, dict) or not any(isinstance(value, RawJSON) for value in payload.values()):
+        return dumps_value(payload)
+    parts = [
+        dumps_value(str(key)) + b':' + (value if isinstance(value, RawJSON) else dumps_value(value))
+        for key, value in payload.items()
+    ]
+    return b'{' + b','.join(parts) + b'}'
+
+
+def accepted_encodings(header):
+    """Encoding dengan q > 0 dari header Accept-Encoding (lowercase)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(body, accept_encoding, min_bytes=1024, gzip_level=5, brotli_quality=4):
+    """Kompres body kalau cukup besar dan client menerimanya; br diutamakan kalau brotli terpasang"""
+    if len(body) < min_bytes:
+        return body, None
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return brotli.compress(body, quality=brotli_quality), 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0), 'gzip'
+    return body, None
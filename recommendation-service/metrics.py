@@ -0,0 +1,144 @@
+"""
+Metrics in-process dengan format exposition Prometheus (text 0.0.4), tanpa dependency.
+
+    metrics.inc('http_requests_total', {'route': '/health', 'status': '200'})
+    metrics.observe('http_request_duration_seconds', {'route': '/health'}, 0.002)
+    with metrics.stage('similar', 'lookup'):
+        ...
+    metrics.collector(lambda: [('model_rows', 'gauge', 'Rows', {}, 124)])
+
+Counter dan histogram diakumulasi per proses; gauge dari `collector` dihitung saat
+/metrics di-scrape (ukuran model, cache stats), jadi tidak perlu di-update di jalur request.
+Dengan beberapa worker gunicorn setiap worker punya angka sendiri (scrape per worker
+atau agregasi di Prometheus), sama seperti client library Prometheus tanpa multiprocess mode.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket latency (detik): 0.5 ms .. 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = ('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._buckets = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, text, buckets=None):
+        self._help[name] = text
+        if buckets is not None:
+            self._buckets[name] = tuple(buckets)
+
+    def _bounds(self, name):
+        return self._buckets.get(name, self.buckets)
+
+    def inc(self, name, labels=None, value=1):
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, seconds):
+        key = _labels_key(labels)
+        bounds = self._bounds(name)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = [[0] * len(bounds), 0.0, 0]
+            for position, bound in enumerate(bounds):
+                if seconds <= bound:
+                    entry[0][position] += 1
+                    break
+            entry[1] += seconds
+            entry[2] += 1
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, labels, time.perf_counter() - start)
+
+    def stage(self, endpoint, stage):
+        """Timer per tahap di dalam satu request (lookup, score, topk, serialize, ...)"""
+        return self.timer('recommendation_stage_seconds', {'endpoint': endpoint, 'stage': stage})
+
+    def collector(self, callback):
+        """callback() -> [(name, type, help, labels, value)], dipanggil saat render"""
+        self._collectors.append(callback)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: (list(entry[0]), entry[1], entry[2]) for key, entry in series.items()}
+                          for name, series in self._histograms.items()}
+
+        for name in sorted(counters):
+            self._header(lines, name, 'counter')
+            for key, value in sorted(counters[name].items()):
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+
+        for name in sorted(histograms):
+            self._header(lines, name, 'histogram')
+            for key, (counts, total, count) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self._bounds(name), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{_format_labels(key, [("le", _format_value(bound))])} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(key, [("le", "+Inf")])} {count}')
+                lines.append(f'{name}_sum{_format_labels(key)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(key)} {count}')
+
+        collected = {}
+        for callback in self._collectors:
+            try:
+                samples = callback()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+                continue
+            for name, metric_type, text, labels, value in samples:
+                if value is None:
+                    continue
+                entry = collected.setdefault(name, (metric_type, text, []))
+                entry[2].append((_labels_key(labels), value))
+        for name in sorted(collected):
+            metric_type, text, samples = collected[name]
+            self._help.setdefault(name, text)
+            self._header(lines, name, metric_type)
+            for key, value in samples:
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, metric_type):
+        if name in self._help:
+            lines.append(f'# HELP {name} {self._help[name]}')
+        lines.append(f'# TYPE {name} {metric_type}')
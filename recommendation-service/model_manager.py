@@ -0,0 +1,155 @@
+"""
+Double-buffered model serving.
+
+Engine yang sedang dilayani (snapshot) tidak pernah dimutasi setelah dipublish.
+Reload / sync membangun engine baru di background thread, lalu mempublishnya
+dengan satu pergantian reference (`self.current = engine`), jadi request yang
+sedang jalan tetap memakai snapshot lama secara utuh dan reader tidak butuh lock.
+
+Dengan `store` (SharedModelStore), setiap engine hasil build diekspor sebagai
+shared snapshot dan yang dipublish adalah versi mmap-nya (lihat shared_model.py).
+
+Startup bertahap: `start(build)` menjalankan build pertama di builder thread yang sama,
+jadi server sudah bisa bind dan menjawab health check selama state masih 'starting';
+`ready` baru di-set saat snapshot pertama dipublish. Build startup yang gagal (state
+'failed') diulang dengan backoff eksponensial sampai berhasil.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ModelManager:
+    def __init__(self, initial_engine=None, store=None):
+        self.current = None
+        self.store = store
+        # Callback listener(engine) setelah snapshot baru dipublish (mis. invalidasi cache)
+        self.listeners = []
+        self.generation = 0
+        self.last_build = None
+        self.startup = None
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        # Di-set saat snapshot pertama dipublish (readiness probe)
+        self.ready = threading.Event()
+        self.startup_error = None
+        self.startup_attempts = 0
+        self._startup_future = None
+        # Satu builder thread: rebuild berurutan dan selalu berangkat dari snapshot terbaru
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-builder')
+
+        if initial_engine is not None:
+            self.publish(initial_engine, reason='startup',
+                         seconds=initial_engine.startup['seconds'] if initial_engine.startup else None)
+
+    def publish(self, engine, reason, seconds=None):
+        """
+        Beri nomor generation lalu tukar reference snapshot yang dilayani.
+        Engine dari shared snapshot sudah membawa generation-nya sendiri (sama di semua worker).
+        """
+        if engine.generation <= self.generation:
+            engine.generation = self.generation + 1
+        engine.built_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.generation = engine.generation
+        self.last_build = {
+            'reason': reason,
+            'generation': engine.generation,
+            'seconds': round(seconds, 3) if seconds is not None else None,
+            'finished_at': engine.built_at
+        }
+        self.current = engine
+        if reason == 'startup':
+            self.startup = engine.startup
+            self.startup_error = None
+        self.ready.set()
+        for listener in self.listeners:
+            listener(engine)
+        return engine
+
+    def submit(self, reason, build, wait=False, store=True, incremental=False):
+        """
+        Jalankan `build(current_snapshot)` di builder thread.
+
+        `build` mengembalikan (engine_baru, info); engine_baru None berarti tidak
+        ada yang dipublish (mis. validasi gagal). Dengan wait=True hasil (engine, info)
+        ditunggu, selain itu Future langsung dikembalikan. store=False untuk engine
+        yang sudah berasal dari shared store (tidak diekspor ulang). incremental=True
+        untuk perubahan kecil: snapshot diekspor tanpa neighbor table (lihat SharedModelStore.share).
+        """
+        with self._pending_lock:
+            self.pending += 1
+
+        def job():
+            start = time.perf_counter()
+            try:
+                engine, info = build(self.current)
+                if engine is not None and store and self.store is not None:
+                    engine = self.store.share(engine, neighbors=not incremental)
+                if engine is not None:
+                    self.publish(engine, reason, time.perf_counter() - start)
+                return engine, info
+            except Exception as e:
+                print(f"❌ Model build ({reason}) failed: {e}")
+                if reason == 'startup':
+                    self.startup_error = str(e)
+                raise
+            finally:
+                with self._pending_lock:
+                    self.pending -= 1
+
+        future = self._executor.submit(job)
+        return future.result() if wait else future
+
+    def start(self, build, store=True, retry_delay=1.0, max_retry_delay=60.0):
+        """
+        Build snapshot pertama (`build()` -> engine) di background; return Future.
+        Listener sebaiknya sudah terpasang sebelum ini dipanggil supaya ikut menerima snapshot startup.
+        Panggilan berikutnya mengembalikan Future yang sama. Kalau build gagal, percobaan berikutnya
+        dijadwalkan setelah retry_delay detik (dobel tiap gagal, maks max_retry_delay); 0 = tanpa retry.
+        """
+        if self._startup_future is not None:
+            return self._startup_future
+
+        def attempt(delay):
+            self.startup_attempts += 1
+            future = self.submit('startup', lambda current: (build(), None), store=store)
+            if retry_delay:
+                future.add_done_callback(lambda done: schedule_retry(done, delay))
+            return future
+
+        def schedule_retry(done, delay):
+            if done.exception() is None or self.ready.is_set():
+                return
+            print(f"🔁 Retrying startup build in {delay:.1f}s (attempt {self.startup_attempts + 1})")
+
+            def retry():
+                self._startup_future = attempt(min(delay * 2, max_retry_delay))
+
+            timer = threading.Timer(delay, retry)
+            timer.daemon = True
+            timer.start()
+
+        self._startup_future = attempt(retry_delay)
+        return self._startup_future
+
+    @property
+    def state(self):
+        if self.ready.is_set():
+            return 'ready'
+        return 'failed' if self.startup_error else 'starting'
+
+    def wait_ready(self, timeout=None):
+        """Tunggu percobaan startup terakhir (exception-nya diteruskan); return engine aktif"""
+        if not self.ready.is_set() and self._startup_future is not None:
+            self._startup_future.result(timeout)
+        return self.current
+
+    def status(self):
+        return {
+            'state': self.state,
+            'startup_attempts': self.startup_attempts,
+            'generation': self.generation,
+            'pending_builds': self.pending,
+            'last_build': self.last_build,
+            'shared': self.store.status() if self.store is not None else None
+        }
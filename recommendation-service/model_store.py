@@ -0,0 +1,120 @@
+"""
+Versioned artifact bundle untuk model TF-IDF.
+
+Isi bundle (satu direktori):
+    manifest.json   versi bundle, hash CSV sumber, parameter vectorizer, ukuran model
+    vocabulary.json term -> kolom
+    idf.npy         vektor idf
+    tfidf.npz       CSR matrix (scipy.sparse.save_npz)
+    products.csv    metadata produk (sep=';', sama seperti CSV sumber)
+
+Saat startup bundle dipakai kalau hash CSV sumber + parameter masih sama,
+jadi worker tidak perlu fit ulang TfidfVectorizer.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BUNDLE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.json'
+IDF_FILE = 'idf.npy'
+MATRIX_FILE = 'tfidf.npz'
+PRODUCTS_FILE = 'products.csv'
+# id produk dibaca sebagai string (CSV sumber dan bundle): id numerik tidak jadi int64
+# (leading zero / NaN -> float) sehingga lookup /sync/products/changes tetap cocok
+CSV_DTYPES = {'id': str}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 isi file, dibaca per chunk"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_bundle(path, vectorizer, tfidf_matrix, df, source_hash, params):
+    """Tulis bundle ke direktori sementara lalu pindahkan ke `path`"""
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+    with open(os.path.join(staging, VOCABULARY_FILE), 'w', encoding='utf-8') as file:
+        json.dump(vocabulary, file, ensure_ascii=False)
+    np.save(os.path.join(staging, IDF_FILE), vectorizer.idf_)
+    sparse.save_npz(os.path.join(staging, MATRIX_FILE), sparse.csr_matrix(tfidf_matrix))
+    df.to_csv(os.path.join(staging, PRODUCTS_FILE), sep=';', index=False)
+
+    manifest = {
+        'version': BUNDLE_VERSION,
+        'source_hash': source_hash,
+        'params': params,
+        'rows': int(tfidf_matrix.shape[0]),
+        'vocab_size': len(vocabulary),
+        'nnz': int(tfidf_matrix.nnz),
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    os.replace(staging, path)
+    return manifest
+
+
+def read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def restore_vectorizer(vocabulary, idf, params):
+    """TfidfVectorizer siap transform() dari vocabulary + idf yang tersimpan, tanpa fit ulang"""
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+def load_bundle(path, source_hash, params):
+    """
+    Load bundle kalau versi, hash sumber, dan parameter cocok.
+    Return dict (vectorizer, tfidf_matrix, df, manifest) atau None kalau harus refit.
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    if (manifest.get('version') != BUNDLE_VERSION
+            or manifest.get('source_hash') != source_hash
+            or manifest.get('params') != params):
+        return None
+
+    with open(os.path.join(path, VOCABULARY_FILE), 'r', encoding='utf-8') as file:
+        vocabulary = json.load(file)
+
+    vectorizer = restore_vectorizer(vocabulary, np.load(os.path.join(path, IDF_FILE)), params)
+
+    tfidf_matrix = sparse.load_npz(os.path.join(path, MATRIX_FILE)).tocsr()
+    df = pd.read_csv(os.path.join(path, PRODUCTS_FILE), sep=';', dtype=CSV_DTYPES)
+    if tfidf_matrix.shape[0] != len(df):
+        return None
+
+    return {
+        'vectorizer': vectorizer,
+        'tfidf_matrix': tfidf_matrix,
+        'df': df,
+        'manifest': manifest
+    }
@@ -0,0 +1,270 @@
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+NGRAM_SIZE = 3
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name):
+    """Lowercase, buang tanda baca, dan rapikan spasi: 'Blazer  - NAVY!' -> 'blazer navy'"""
+    text = unicodedata.normalize('NFKC', str(name)).lower()
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _ngrams(text, size=NGRAM_SIZE):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _key_hash(key):
+    """Hash 64-bit yang stabil antar proses (hash() bawaan di-seed per proses)"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class Utf8Column:
+    """Sequence str read-only dari blob UTF-8 + offsets (N + 1), boleh di-mmap dari snapshot"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+        self._view = memoryview(blob)
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return str(self._view[self.offsets[position]:self.offsets[position + 1]], 'utf-8')
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+
+class HashedPositions:
+    """
+    Pengganti dict key -> posisi untuk shared snapshot: hash key (uint64, urut) + posisi
+    (int32) dalam array yang bisa di-mmap. Key tidak disimpan; kecocokan diverifikasi
+    dengan `key_of(posisi)`, jadi collision hash tidak menghasilkan posisi yang salah.
+    """
+
+    def __init__(self, hashes, positions, key_of):
+        self.hashes = hashes
+        self.positions = positions
+        self.key_of = key_of
+
+    @staticmethod
+    def arrays(mapping):
+        """dict key -> posisi -> (hashes, positions) terurut untuk disimpan"""
+        hashes = np.fromiter((_key_hash(key) for key in mapping), dtype=np.uint64, count=len(mapping))
+        positions = np.fromiter(mapping.values(), dtype=np.int32, count=len(mapping))
+        order = np.lexsort((positions, hashes))
+        return hashes[order], positions[order]
+
+    def get(self, key, default=None):
+        digest = np.uint64(_key_hash(key))
+        start = np.searchsorted(self.hashes, digest, side='left')
+        end = np.searchsorted(self.hashes, digest, side='right')
+        for position in self.positions[start:end].tolist():
+            if self.key_of(position) == key:
+                return position
+        return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        position = self.get(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+class ProductNameIndex:
+    """
+    Index nama produk yang dibangun sekali saat build_model().
+
+    - exact / normalized: hash lookup nama lengkap -> posisi baris pertama
+    - ngrams: inverted index trigram -> posisi baris (urut naik), dipakai untuk
+      substring / prefix match tanpa scan seluruh katalog
+
+    Posisi yang dikembalikan adalah posisi baris (iloc), bukan label index.
+    """
+
+    def __init__(self, names):
+        self.names = [str(name) for name in names]
+        self.lowered = [name.lower() for name in self.names]
+        self.exact = {}
+        self.normalized = {}
+        self.ngrams = defaultdict(list)
+        self._index_from(0)
+
+    def _index_from(self, start, ngrams=True):
+        for position in range(start, len(self.lowered)):
+            lowered = self.lowered[position]
+            self.exact.setdefault(lowered, position)
+            self.normalized.setdefault(normalize_name(lowered), position)
+            if ngrams:
+                for gram in _ngrams(lowered):
+                    self.ngrams[gram].append(position)
+    
+    @classmethod
+    def from_postings(cls, names, grams, postings):
+        """
+        Index dengan posting list yang sudah jadi (shared snapshot): `grams` gram -> (start, end)
+        ke dalam array `postings` (boleh mmap), jadi posting list tidak di-copy per proses.
+        """
+        index = cls([])
+        index.names = [str(name) for name in names]
+        index.lowered = [name.lower() for name in index.names]
+        index._index_from(0, ngrams=False)
+        index.ngrams = defaultdict(list, {gram: postings[start:end] for gram, (start, end) in grams.items()})
+        return index
+
+    def export(self):
+        """
+        Array untuk shared snapshot (lihat from_arrays): nama lowercase sebagai blob UTF-8
+        + offsets, dan exact / normalized sebagai HashedPositions
+        """
+        if isinstance(self.exact, HashedPositions):
+            return {
+                'lowered_blob': self.lowered.blob, 'lowered_offsets': self.lowered.offsets,
+                'exact_hashes': self.exact.hashes, 'exact_positions': self.exact.positions,
+                'normalized_hashes': self.normalized.hashes, 'normalized_positions': self.normalized.positions
+            }
+        lowered = Utf8Column.from_strings(self.lowered)
+        exact_hashes, exact_positions = HashedPositions.arrays(self.exact)
+        normalized_hashes, normalized_positions = HashedPositions.arrays(self.normalized)
+        return {
+            'lowered_blob': lowered.blob, 'lowered_offsets': lowered.offsets,
+            'exact_hashes': exact_hashes, 'exact_positions': exact_positions,
+            'normalized_hashes': normalized_hashes, 'normalized_positions': normalized_positions
+        }
+
+    @classmethod
+    def from_arrays(cls, names, arrays, grams, postings):
+        """
+        Index dari array export() + posting list (semuanya boleh mmap): tidak ada list nama
+        atau dict per proses, jadi memory per worker tidak tumbuh dengan ukuran katalog.
+        `names` sequence nama asli (mis. Utf8Column dari ProductStore).
+        """
+        index = cls([])
+        index.names = names
+        index.lowered = Utf8Column(arrays['lowered_blob'], arrays['lowered_offsets'])
+        lowered = index.lowered
+        index.exact = HashedPositions(arrays['exact_hashes'], arrays['exact_positions'], lowered.__getitem__)
+        index.normalized = HashedPositions(arrays['normalized_hashes'], arrays['normalized_positions'],
+                                           lambda position: normalize_name(lowered[position]))
+        index.ngrams = defaultdict(list, {gram: postings[start:end] for gram, (start, end) in grams.items()})
+        return index
+    
+    def postings(self):
+        """Kebalikan from_postings: (grams, posting list yang disambung jadi satu list)"""
+        grams, flat = {}, []
+        for gram, posting in self.ngrams.items():
+            grams[gram] = (len(flat), len(flat) + len(posting))
+            flat.extend(posting)
+        return grams, flat
+
+    def copy(self):
+        """Salinan yang aman untuk di-extend tanpa mengubah index aslinya"""
+        if not isinstance(self.exact, dict):
+            # Index dari shared snapshot (read-only array): bangun ulang sebagai index biasa
+            return ProductNameIndex(list(self.names))
+        other = ProductNameIndex([])
+        other.names = list(self.names)
+        other.lowered = list(self.lowered)
+        other.exact = dict(self.exact)
+        other.normalized = dict(self.normalized)
+        other.ngrams = defaultdict(list, {gram: list(posting) for gram, posting in self.ngrams.items()})
+        return other
+
+    def extend(self, names):
+        """Tambah produk baru di akhir katalog; posting list tetap urut naik"""
+        start = len(self.names)
+        new_names = [str(name) for name in names]
+        self.names.extend(new_names)
+        self.lowered.extend(name.lower() for name in new_names)
+        self._index_from(start)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _candidates(self, query):
+        """
+        Posting list paling jarang dari trigram query (urut naik), atau None kalau query terlalu pendek.
+        Tidak di-intersect dengan posting lain: caller memverifikasi substring per kandidat,
+        yang lebih murah daripada membangun set dari posting yang lebih panjang.
+        """
+        grams = _ngrams(query)
+        if not grams:
+            return None
+
+        shortest = None
+        for gram in grams:
+            posting = self.ngrams.get(gram)
+            if posting is None or len(posting) == 0:
+                return []
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        return shortest
+
+    def substring_matches(self, query):
+        """Semua posisi yang namanya mengandung query (case-insensitive), urut naik"""
+        query = str(query).lower()
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = range(len(self.lowered))
+        return [int(position) for position in candidates if query in self.lowered[position]]
+
+    def first_substring_match(self, query):
+        """Posisi pertama yang namanya mengandung query; sama dengan scan linear lama"""
+        query = str(query).lower()
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = range(len(self.lowered))
+        for position in candidates:
+            if query in self.lowered[position]:
+                return int(position)
+        return None
+
+    def lookup(self, query, first_match=True):
+        """
+        Cari posisi produk untuk query.
+
+        first_match=True  -> baris pertama yang mengandung query (semantik lama)
+        first_match=False -> exact name > normalized name > prefix > substring
+        """
+        if first_match:
+            return self.first_substring_match(query)
+
+        lowered = str(query).lower()
+        if lowered in self.exact:
+            return self.exact[lowered]
+
+        normalized = normalize_name(lowered)
+        if normalized in self.normalized:
+            return self.normalized[normalized]
+
+        matches = self.substring_matches(lowered)
+        for position in matches:
+            if self.lowered[position].startswith(lowered):
+                return position
+        if matches:
+            return matches[0]
+
+        # Terakhir: cocokkan versi normalized (mis. tanda baca berlebih di query)
+        if normalized and normalized != lowered:
+            return self.first_substring_match(normalized)
+        return None
@@ -0,0 +1,335 @@
+"""
+Top-K neighbor table: pengganti matrix similarity dense N x N.
+
+Per produk hanya disimpan K tetangga terdekat (index int32 + skor float16/float32)
+dalam dua file .npy, sehingga bisa di-load dengan np.load(mmap_mode='r'). Semua
+worker gunicorn berbagi page yang sama lewat OS page cache, dan satu lookup
+hanyalah slice read satu baris.
+
+    python neighbor_table.py build --output models/neighbors --k 20 --dtype float16
+    python neighbor_table.py build --output models/neighbors --workers 8 --bundle models/tfidf_bundle
+    python neighbor_table.py convert data/clothing_similarity_eval.npy --output models/neighbors \
+        --catalog data/processed_products.csv
+
+Posisi baris table = posisi baris katalog sumbernya; meta.json mencatat `rows` dan
+`source_hash` (SHA-256 CSV katalog) supaya table tidak dipakai untuk katalog lain
+(lihat NeighborTable.mismatch). `build` membaca matrix TF-IDF dari model bundle service
+(model_store.py), tanpa import app (import app langsung menjalankan builder thread).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from similarity import l2_normalize_rows, top_k_indices, transpose_rows
+
+FORMAT_VERSION = 1
+INDICES_FILE = 'indices.npy'
+SCORES_FILE = 'scores.npy'
+META_FILE = 'meta.json'
+
+
+def _block_top_k(block_scores, k, row_offset):
+    """Top-k per baris untuk satu blok skor dense, tanpa produk itu sendiri"""
+    rows = block_scores.shape[0]
+    block_scores[np.arange(rows), row_offset + np.arange(rows)] = -np.inf
+
+    partition = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+    partition.sort(axis=1)  # index naik dulu supaya skor seri urut berdasarkan index
+    values = np.take_along_axis(block_scores, partition, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    indices = np.take_along_axis(partition, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+
+    # argpartition memilih sembarang item yang seri di batas k; baris seperti itu dihitung
+    # ulang dengan top_k_indices supaya tie-break sama dengan scoring online (index naik)
+    tied = np.flatnonzero((block_scores >= values[:, -1:]).sum(axis=1) > k)
+    for row in tied:
+        indices[row] = top_k_indices(block_scores[row], k)
+        values[row] = block_scores[row, indices[row]]
+    return indices, values
+
+
+def build_neighbor_table(normalized_matrix, k=20, block_size=1024, dtype=np.float32, transposed=None):
+    """
+    Hitung top-k tetangga tiap baris dari CSR yang sudah L2-normalized.
+
+    Dikerjakan per blok baris supaya memory puncak O(block_size x N), bukan O(N^2).
+    `transposed`: normalized_matrix.T sebagai CSR (similarity.transpose_rows); dibangun sekali
+    kalau tidak diberikan, supaya product per blok tidak mengonversi matrix lagi.
+    Return (indices int32 [N, k], scores dtype [N, k]).
+    """
+    total = normalized_matrix.shape[0]
+    k = max(0, min(int(k), total - 1))
+    indices = np.empty((total, k), dtype=np.int32)
+    scores = np.empty((total, k), dtype=dtype)
+    if k == 0:
+        return indices, scores
+
+    if transposed is None:
+        transposed = transpose_rows(normalized_matrix)
+    for start in range(0, total, block_size):
+        stop = min(start + block_size, total)
+        block_scores = (normalized_matrix[start:stop] @ transposed).toarray()
+        block_indices, block_values = _block_top_k(block_scores, k, start)
+        indices[start:stop] = block_indices
+        scores[start:stop] = block_values
+    return indices, scores
+
+
+# Array per worker proses, di-attach dari shared memory oleh _attach_shared
+_shared = {}
+
+
+def _share_array(array, segments):
+    """Copy `array` ke segment shared memory baru; return (nama, shape, dtype) untuk worker"""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(segment)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment.name, array.shape, array.dtype.str
+
+
+def _shared_view(spec, segments):
+    """Attach ke segment by name; worker berbagi resource tracker dengan induk, yang juga unlink"""
+    name, shape, dtype = spec
+    segment = shared_memory.SharedMemory(name=name)
+    segments.append(segment)
+    return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _attach_shared(specs, shape, k):
+    """
+    Initializer worker: CSR input, transpose CSR-nya (dibangun sekali di induk) dan array
+    output langsung dari shared memory, tanpa pickle dan tanpa konversi per proses
+    """
+    segments = []
+    arrays = {name: _shared_view(spec, segments) for name, spec in specs.items()}
+    matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape, copy=False)
+    transposed = sparse.csr_matrix((arrays['t_data'], arrays['t_indices'], arrays['t_indptr']),
+                                   shape=shape[::-1], copy=False)
+    _shared.update(matrix=matrix, transposed=transposed, out_indices=arrays['out_indices'],
+                   out_scores=arrays['out_scores'], k=k, segments=segments)
+
+
+def _build_block(bounds):
+    """Top-k untuk baris [start, stop), ditulis langsung ke output shared"""
+    start, stop = bounds
+    block_scores = (_shared['matrix'][start:stop] @ _shared['transposed']).toarray()
+    block_indices, block_values = _block_top_k(block_scores, _shared['k'], start)
+    _shared['out_indices'][start:stop] = block_indices
+    _shared['out_scores'][start:stop] = block_values
+    return stop - start
+
+
+def build_neighbor_table_parallel(normalized_matrix, k=20, block_size=1024, dtype=np.float32, workers=None):
+    """
+    Sama dengan build_neighbor_table, tapi blok baris dikerjakan `workers` proses (default: jumlah CPU).
+
+    CSR (data / indices / indptr), transpose CSR-nya dan array hasil ditaruh di shared memory:
+    worker meng-attach by name, jadi matrix tidak di-pickle per task, transpose tidak dibangun
+    ulang per proses, dan hasil top-k tidak dikirim balik. Pool memakai context 'spawn'
+    (fork dari proses yang punya thread lain bisa deadlock). Hasilnya identik dengan build
+    serial (blok dan tie-break sama).
+    """
+    workers = workers or os.cpu_count() or 1
+    total = normalized_matrix.shape[0]
+    k = max(0, min(int(k), total - 1))
+    if workers <= 1 or k == 0 or total <= block_size:
+        return build_neighbor_table(normalized_matrix, k=k, block_size=block_size, dtype=dtype)
+
+    matrix = sparse.csr_matrix(normalized_matrix)
+    transposed = transpose_rows(matrix)
+    segments = []
+    outputs = []
+    try:
+        specs = {
+            'data': _share_array(matrix.data, segments),
+            'indices': _share_array(matrix.indices, segments),
+            'indptr': _share_array(matrix.indptr, segments),
+            't_data': _share_array(transposed.data, segments),
+            't_indices': _share_array(transposed.indices, segments),
+            't_indptr': _share_array(transposed.indptr, segments),
+            'out_indices': _share_array(np.zeros((total, k), dtype=np.int32), segments),
+            'out_scores': _share_array(np.zeros((total, k), dtype=dtype), segments)
+        }
+        blocks = [(start, min(start + block_size, total)) for start in range(0, total, block_size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_attach_shared, initargs=(specs, matrix.shape, k)) as pool:
+            # chunksize > 1 mengurangi round-trip per blok; urutan selesai tidak penting
+            for _ in pool.map(_build_block, blocks, chunksize=max(1, len(blocks) // (workers * 4))):
+                pass
+        indices = _shared_view(specs['out_indices'], outputs).copy()
+        scores = _shared_view(specs['out_scores'], outputs).copy()
+        return indices, scores
+    finally:
+        for segment in outputs:
+            segment.close()
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+
+def convert_dense_matrix(dense_matrix, k=20, block_size=1024, dtype=np.float32):
+    """Ubah matrix similarity dense (boleh memmap) jadi neighbor table, blok demi blok"""
+    total = dense_matrix.shape[0]
+    k = max(0, min(int(k), total - 1))
+    indices = np.empty((total, k), dtype=np.int32)
+    scores = np.empty((total, k), dtype=dtype)
+    if k == 0:
+        return indices, scores
+
+    for start in range(0, total, block_size):
+        stop = min(start + block_size, total)
+        block_scores = np.array(dense_matrix[start:stop], dtype=np.float64)
+        block_indices, block_values = _block_top_k(block_scores, k, start)
+        indices[start:stop] = block_indices
+        scores[start:stop] = block_values
+    return indices, scores
+
+
+def save_neighbor_table(path, indices, scores, **meta):
+    """Simpan neighbor table ke direktori `path` (indices.npy, scores.npy, meta.json)"""
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, INDICES_FILE), np.ascontiguousarray(indices))
+    np.save(os.path.join(path, SCORES_FILE), np.ascontiguousarray(scores))
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': int(indices.shape[0]),
+        'k': int(indices.shape[1]),
+        'dtype': str(scores.dtype),
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        **meta
+    }
+    with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=2)
+    return meta
+
+
+class NeighborTable:
+    """Read-only neighbor table yang di-memory-map dari disk"""
+
+    def __init__(self, indices, scores, meta=None):
+        self.indices = indices
+        self.scores = scores
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported neighbor table version: {meta.get('version')}")
+
+        mmap_mode = 'r' if mmap else None
+        indices = np.load(os.path.join(path, INDICES_FILE), mmap_mode=mmap_mode)
+        scores = np.load(os.path.join(path, SCORES_FILE), mmap_mode=mmap_mode)
+        if indices.shape != scores.shape or indices.shape[0] != meta['rows']:
+            raise ValueError('Neighbor table files are inconsistent')
+        return cls(indices, scores, meta)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    def mismatch(self, rows, source_hash=None):
+        """Alasan table tidak cocok dengan katalog `rows` baris / `source_hash`; None kalau cocok"""
+        if len(self) != rows:
+            return f'table has {len(self)} rows, catalog has {rows}'
+        expected = self.meta.get('source_hash')
+        if expected and source_hash and expected != source_hash:
+            return 'table was built from a different catalog file'
+        return None
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def neighbors(self, row_idx, n=None):
+        """(indices, scores) untuk satu produk; hanya membaca slice satu baris"""
+        n = self.k if n is None else min(int(n), self.k)
+        return (
+            np.asarray(self.indices[row_idx, :n], dtype=np.int64),
+            np.asarray(self.scores[row_idx, :n], dtype=np.float64)
+        )
+
+
+def _build_from_bundle(args):
+    import model_store
+
+    manifest = model_store.read_manifest(args.bundle)
+    if manifest is None:
+        raise SystemExit(f'❌ No model bundle in {args.bundle}; start the service once to write it')
+    normalized_matrix = l2_normalize_rows(sparse.load_npz(os.path.join(args.bundle, model_store.MATRIX_FILE)))
+    table = build_neighbor_table_parallel(normalized_matrix, k=args.k, block_size=args.block_size,
+                                          dtype=np.dtype(args.dtype), workers=args.workers or None)
+    meta = {
+        'source': 'tfidf',
+        'products': int(normalized_matrix.shape[0]),
+        'source_bundle': os.path.basename(os.path.normpath(args.bundle)),
+        'source_hash': manifest['source_hash']
+    }
+    return table, meta
+
+
+def _build_from_dense(args):
+    dense_matrix = np.load(args.matrix, mmap_mode='r')
+    meta = {'source': os.path.basename(args.matrix)}
+    if args.catalog and os.path.exists(args.catalog):
+        import model_store
+        import pandas as pd
+
+        rows = len(pd.read_csv(args.catalog))
+        if rows != dense_matrix.shape[0]:
+            raise SystemExit(f'❌ {args.catalog} has {rows} rows, similarity matrix has {dense_matrix.shape[0]}')
+        meta['source_catalog'] = os.path.basename(args.catalog)
+        meta['source_hash'] = model_store.file_hash(args.catalog)
+    elif args.catalog:
+        print(f"⚠️ Catalog {args.catalog} not found, table is only checked by row count")
+    return convert_dense_matrix(dense_matrix, k=args.k, block_size=args.block_size,
+                                dtype=np.dtype(args.dtype)), meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Build table from the service's TF-IDF model bundle")
+    convert = subparsers.add_parser('convert', help='Convert an existing dense N x N similarity .npy')
+    convert.add_argument('matrix', help='Path to the dense similarity matrix (.npy)')
+    convert.add_argument('--catalog', default=os.path.join('data', 'processed_products.csv'),
+                         help='Catalog CSV whose rows the matrix follows (hash stored in meta.json)')
+
+    for sub in (build, convert):
+        sub.add_argument('--output', default=os.path.join('models', 'neighbors'))
+        sub.add_argument('--k', type=int, default=20)
+        sub.add_argument('--dtype', choices=['float16', 'float32'], default='float32')
+        sub.add_argument('--block-size', type=int, default=1024)
+    build.add_argument('--workers', type=int, default=0, help='Worker processes (0 = CPU count, 1 = in-process)')
+    build.add_argument('--bundle', default=os.environ.get('MODEL_BUNDLE_DIR', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'models', 'tfidf_bundle')),
+        help='Model bundle written by the service (same default as MODEL_BUNDLE_DIR)')
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.command == 'build':
+        (indices, scores), meta = _build_from_bundle(args)
+    else:
+        (indices, scores), meta = _build_from_dense(args)
+
+    meta = save_neighbor_table(args.output, indices, scores, **meta)
+    size_kb = (indices.nbytes + scores.nbytes) / 1024
+    print(f"✅ Neighbor table saved to {args.output}: {meta['rows']} x {meta['k']} "
+          f"({size_kb:.1f} KB, {time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,11 +4,15 @@ import pandas as pd
 from sklearn.metrics.pairwise import cosine_similarity
 import os
 
+import model_store
+from neighbor_table import NeighborTable
+
 class OptimizedRecommendationEngine:
     def __init__(self, model_path="models/"):
         self.model_path = model_path
         self.vectorizer = None
         self.similarity_matrix = None
+        self.neighbor_table = None
         self.products_df = None
         self.load_models()
     
@@ -21,16 +25,31 @@ class OptimizedRecommendationEngine:
                 with open(vectorizer_path, "rb") as f:
                     self.vectorizer = pickle.load(f)
             
-            # Load similarity matrix
+            # Load top-K neighbor table (memory-mapped, shared lewat page cache)
+            neighbors_path = os.path.join(self.model_path, "neighbors")
+            if NeighborTable.exists(neighbors_path):
+                self.neighbor_table = NeighborTable.load(neighbors_path, mmap=True)
+            
+            # Legacy: dense similarity matrix, di-mmap supaya tidak di-copy penuh ke RAM
             similarity_path = os.path.join(self.model_path, "cosine_similarity_matrix.npy")
-            if os.path.exists(similarity_path):
-                self.similarity_matrix = np.load(similarity_path)
+            if self.neighbor_table is None and os.path.exists(similarity_path):
+                self.similarity_matrix = np.load(similarity_path, mmap_mode='r')
             
             # Load products data
             data_path = os.path.join(self.model_path, "..", "data", "processed_products.csv")
             if os.path.exists(data_path):
                 self.products_df = pd.read_csv(data_path)
             
+            # Posisi di neighbor table harus merujuk ke katalog yang sama dengan products_df
+            if self.neighbor_table is not None:
+                problem = (self.neighbor_table.mismatch(len(self.products_df), model_store.file_hash(data_path))
+                           if self.products_df is not None else 'no product catalog loaded')
+                if problem:
+                    print(f"⚠️ Ignoring neighbor table {neighbors_path}: {problem}")
+                    self.neighbor_table = None
+                    if os.path.exists(similarity_path):
+                        self.similarity_matrix = np.load(similarity_path, mmap_mode='r')
+            
             if self.products_df is not None:
                 print(f"Models loaded successfully! {len(self.products_df)} products ready.")
                 return True
@@ -44,7 +63,9 @@ class OptimizedRecommendationEngine:
     def get_recommendations(self, product_id, num_recommendations=5):
         """Get recommendations using pre-computed similarity matrix or real-time computation"""
         try:
-            if self.similarity_matrix is not None and self.products_df is not None:
+            if self.neighbor_table is not None and self.products_df is not None:
+                return self._get_neighbor_recommendations(product_id, num_recommendations)
+            elif self.similarity_matrix is not None and self.products_df is not None:
                 # Use pre-computed similarity matrix
                 return self._get_precomputed_recommendations(product_id, num_recommendations)
             else:
@@ -54,6 +75,27 @@ class OptimizedRecommendationEngine:
             print(f"Error getting recommendations: {e}")
             return []
     
+    def _get_neighbor_recommendations(self, product_id, num_recommendations):
+        """Get recommendations from the top-K neighbor table (one row slice per lookup)"""
+        product_idx = self.products_df[self.products_df['_id'] == product_id].index
+        if len(product_idx) == 0:
+            return []
+        
+        similar_indices, sim_scores = self.neighbor_table.neighbors(product_idx[0], num_recommendations)
+        
+        recommendations = []
+        for idx, score in zip(similar_indices, sim_scores):
+            product = self.products_df.iloc[idx]
+            recommendations.append({
+                'productId': product['_id'],
+                'name': product['name'],
+                'category': product['category'],
+                'price': product['price'],
+                'similarity_score': float(score)
+            })
+        
+        return recommendations
+    
     def _get_precomputed_recommendations(self, product_id, num_recommendations):
         """Get recommendations using pre-computed similarity matrix"""
         # Find product index
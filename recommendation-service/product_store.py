@@ -0,0 +1,194 @@
+"""
+Metadata produk kolumnar (nama_pakaian, categories, type) untuk membangun hasil rekomendasi.
+
+`df.iloc[idx]` membuat satu pandas Series per baris hasil; di sini metadata disimpan
+sebagai array NumPy yang rapat dan hasil dibangun dengan gather per batch index:
+
+    names       satu blob UTF-8 (uint8) + offsets (int64, N + 1); nama ke-i = blob[offsets[i]:offsets[i + 1]]
+    categories  kode per produk (uint8 / uint16 / ...) ke tabel nilai unik (interned)
+    type        sama seperti categories
+
+Untuk response JSON, prerender() menyiapkan fragment per produk
+(`"nama_pakaian":...,"categories":...,"type":...`, blob + offsets seperti nama) dan
+render_rows() menyambung array hasil langsung dari bytes.
+
+Direktori (np.save, bisa di-load dengan mmap tanpa copy):
+    meta.json  name_blob.npy  name_offsets.npy  category_codes.npy  type_codes.npy
+    fragment_blob.npy  fragment_offsets.npy   (opsional, hasil prerender)
+"""
+import json
+import os
+
+import numpy as np
+
+from json_render import RawJSON, dumps_value
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+ARRAY_FILES = ('name_blob', 'name_offsets', 'category_codes', 'type_codes')
+FRAGMENT_FILES = ('fragment_blob', 'fragment_offsets')
+
+
+def _text(value):
+    """Nilai kolom -> str; None / NaN jadi '' (sama seperti kolom string di shared snapshot)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+def _intern(values):
+    """(kode per nilai, tabel nilai unik urut kemunculan); dtype kode sekecil mungkin"""
+    table = {}
+    codes = np.fromiter((table.setdefault(_text(value), len(table)) for value in values),
+                        dtype=np.int64, count=len(values))
+    return codes.astype(np.min_scalar_type(max(len(table) - 1, 0))), list(table)
+
+
+class ProductStore:
+    def __init__(self, name_blob, name_offsets, category_codes, categories, type_codes, types):
+        self.name_blob = name_blob
+        self.name_offsets = name_offsets
+        self.category_codes = category_codes
+        self.type_codes = type_codes
+        self.categories = categories
+        self.types = types
+        # Tabel nilai sebagai array object supaya gather kode -> str cukup satu indexing
+        self._category_values = np.array(categories, dtype=object)
+        self._type_values = np.array(types, dtype=object)
+        self._blob = memoryview(name_blob)
+        self._category_json = [dumps_value(value) for value in categories]
+        self._type_json = [dumps_value(value) for value in types]
+        self.fragment_blob = None
+        self.fragment_offsets = None
+        self._fragments = None
+
+    @classmethod
+    def from_columns(cls, names, categories, types):
+        encoded = [_text(name).encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        category_codes, category_values = _intern(categories)
+        type_codes, type_values = _intern(types)
+        return cls(blob, offsets, category_codes, category_values, type_codes, type_values)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_columns(df['nama_pakaian'].tolist(), df['categories'].tolist(), df['type'].tolist())
+
+    @classmethod
+    def from_records(cls, records):
+        return cls.from_columns([record['nama_pakaian'] for record in records],
+                                [record['categories'] for record in records],
+                                [record['type'] for record in records])
+
+    def __len__(self):
+        return len(self.name_offsets) - 1
+
+    @property
+    def nbytes(self):
+        tables = sum(len(value.encode('utf-8')) for value in self.categories + self.types)
+        return int(sum(getattr(self, name).nbytes for name in ARRAY_FILES)) + tables
+
+    def name(self, idx):
+        return str(self._blob[self.name_offsets[idx]:self.name_offsets[idx + 1]], 'utf-8')
+
+    def names(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.name_offsets[indices].tolist()
+        ends = self.name_offsets[indices + 1].tolist()
+        blob = self._blob
+        return [str(blob[start:end], 'utf-8') for start, end in zip(starts, ends)]
+
+    def rows(self, indices):
+        """[{'nama_pakaian', 'categories', 'type'}] untuk posisi `indices` (urutan dipertahankan)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size == 0:
+            return []
+        categories = self._category_values[self.category_codes[indices]].tolist()
+        types = self._type_values[self.type_codes[indices]].tolist()
+        return [
+            {'nama_pakaian': name, 'categories': category, 'type': product_type}
+            for name, category, product_type in zip(self.names(indices), categories, types)
+        ]
+
+    def _render_fragments(self, indices):
+        """Fragment JSON (bytes) untuk posisi `indices`, dirender saat itu juga"""
+        category_json, type_json = self._category_json, self._type_json
+        return [
+            b'"nama_pakaian":%s,"categories":%s,"type":%s' % (dumps_value(name), category_json[category],
+                                                               type_json[product_type])
+            for name, category, product_type in zip(self.names(indices), self.category_codes[indices].tolist(),
+                                                     self.type_codes[indices].tolist())
+        ]
+
+    def prerender(self):
+        """Render fragment JSON semua produk sekali (dipanggil saat build model)"""
+        fragments = self._render_fragments(np.arange(len(self)))
+        offsets = np.zeros(len(fragments) + 1, dtype=np.int64)
+        np.cumsum([len(fragment) for fragment in fragments], out=offsets[1:])
+        self._set_fragments(np.frombuffer(b''.join(fragments), dtype=np.uint8), offsets)
+        return self
+
+    def _set_fragments(self, blob, offsets):
+        self.fragment_blob = blob
+        self.fragment_offsets = offsets
+        self._fragments = memoryview(blob)
+
+    def fragments(self, indices):
+        """Fragment per posisi: slice blob hasil prerender, atau dirender kalau belum di-prerender"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if self._fragments is None:
+            return self._render_fragments(indices)
+        view = self._fragments
+        return [view[start:end] for start, end in zip(self.fragment_offsets[indices].tolist(),
+                                                       self.fragment_offsets[indices + 1].tolist())]
+
+    def render_rows(self, indices, scores=None):
+        """
+        RawJSON array hasil untuk posisi `indices`; dengan `scores` tiap item ikut membawa
+        similarity_score (3 desimal) dan match_percentage (1 desimal) seperti rows() + round()
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size == 0:
+            return RawJSON(b'[]')
+        fragments = self.fragments(indices)
+        if scores is None:
+            return RawJSON(b'[{' + b'},{'.join(fragments) + b'}]')
+        # round() per skor (bukan np.round) supaya pembulatannya identik dengan jalur dict
+        items = [
+            b'{%s,"similarity_score":%r,"match_percentage":%r}' % (fragment, round(score, 3), round(score * 100, 1))
+            for fragment, score in zip(fragments, np.asarray(scores, dtype=np.float64).tolist())
+        ]
+        return RawJSON(b'[' + b','.join(items) + b']')
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        names = ARRAY_FILES + (FRAGMENT_FILES if self.fragment_blob is not None else ())
+        for name in names:
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as file:
+            json.dump({'version': FORMAT_VERSION, 'products': len(self),
+                       'categories': self.categories, 'types': self.types}, file, ensure_ascii=False)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load store; None kalau tidak ada atau versinya beda. mmap=True: array dibaca langsung dari file"""
+        if not cls.exists(path):
+            return None
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('version') != FORMAT_VERSION:
+            return None
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        store = cls(arrays['name_blob'], arrays['name_offsets'], arrays['category_codes'], meta['categories'],
+                    arrays['type_codes'], meta['types'])
+        if all(os.path.exists(os.path.join(path, f'{name}.npy')) for name in FRAGMENT_FILES):
+            store._set_fragments(*(np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+                                   for name in FRAGMENT_FILES))
+        return store
@@ -0,0 +1,191 @@
+"""
+Cache hasil rekomendasi: LRU in-process dengan TTL + backend shared opsional.
+
+Key selalu memuat generation model, jadi hasil dari snapshot lama tidak pernah
+terbaca lagi setelah /reload atau /sync; ModelManager juga memanggil clear()
+saat publish supaya memory-nya langsung dilepas.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Nilai bytes (body JSON yang sudah di-render) disimpan apa adanya dengan prefix ini;
+# nilai lain di-encode sebagai JSON (tidak pernah diawali byte NUL)
+RAW_PREFIX = b'\x00'
+
+
+def _dump(value):
+    if isinstance(value, bytes):
+        return RAW_PREFIX + value
+    return json.dumps(value).encode('utf-8')
+
+
+def _load(value):
+    if value[:1] == RAW_PREFIX:
+        return bytes(value[1:])
+    return json.loads(value)
+
+
+class LocalBackend:
+    """
+    Stand-in untuk shared backend (mis. Redis) di dalam proses yang sama.
+    Interface-nya sama: get(key) -> value | None, set(key, value, ttl), clear().
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return _load(value)
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (_dump(value), time.monotonic() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Shared backend di Redis; butuh package `redis` (opsional)"""
+
+    def __init__(self, url, prefix='rec:'):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return _load(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, _dump(value), ex=max(1, int(ttl)))
+
+    def clear(self):
+        # Key lama otomatis tidak terpakai karena generation ada di key; biarkan TTL yang membersihkan
+        pass
+
+
+def create_backend(spec):
+    """'' -> tanpa shared backend, 'local' -> LocalBackend, 'redis://...' -> RedisBackend"""
+    if not spec:
+        return None
+    if spec == 'local':
+        return LocalBackend()
+    if spec.startswith(('redis://', 'rediss://')):
+        try:
+            return RedisBackend(spec)
+        except ImportError:
+            print("⚠️ redis package not installed, using local cache backend")
+            return LocalBackend()
+    raise ValueError(f'Unknown cache backend: {spec}')
+
+
+class ResultCache:
+    def __init__(self, maxsize=1024, ttl=300, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, separators=(',', ':'), default=str)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception as e:
+                print(f"⚠️ Shared cache get failed: {e}")
+                value = None
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, self.ttl)
+            except Exception as e:
+                print(f"⚠️ Shared cache set failed: {e}")
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """Ambil dari cache, atau hitung lalu simpan kalau `cacheable(value)`"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        if cacheable(value):
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'shared_backend': type(self.backend).__name__ if self.backend is not None else None,
+                'shared_hits': self.shared_hits
+            }
@@ -0,0 +1,134 @@
+"""
+Inverted index atas posting TF-IDF untuk free-text search (/search).
+
+Posting list per term diambil dari transpose CSR (= CSC) matrix yang sudah L2-normalized
+(baris urut naik per term). Query di-score term-at-a-time dengan batas atas
+ala MaxScore:
+
+- term diurutkan dari kontribusi maksimum terbesar (q_t x bobot maksimum di posting)
+- selama jumlah batas atas term yang belum diproses masih bisa menembus skor
+  ke-k saat ini, posting diproses penuh (OR: produk baru boleh masuk kandidat)
+- setelah itu produk baru mustahil masuk top-k, jadi term sisanya hanya
+  menambah skor kandidat yang ada (AND: binary search ke posting, posting
+  tidak di-scan) dan kandidat yang tidak bisa lagi mencapai skor ke-k dibuang
+
+Filter category / type didorong ke dalam index: posting dipotong ke posisi yang
+lolos filter sebelum di-score, jadi produk di luar filter tidak pernah di-score.
+Hasilnya exact (sama dengan cosine penuh + filter), termasuk tie-break index naik.
+"""
+import threading
+
+import numpy as np
+
+from similarity import top_k_indices
+
+
+class SearchIndex:
+    def __init__(self, normalized_matrix, transposed=None):
+        """
+        `transposed`: normalized_matrix.T sebagai CSR (similarity.transpose_rows), kalau sudah ada.
+        Array-nya sama dengan CSC normalized_matrix, jadi posting dipakai tanpa konversi ulang.
+        """
+        if transposed is None:
+            transposed = normalized_matrix.T.tocsr()
+        transposed.sort_indices()
+        self.size = transposed.shape[1]
+        self.indptr = transposed.indptr
+        self.rows = transposed.indices.astype(np.int64)
+        self.weights = transposed.data
+        lengths = np.diff(self.indptr)
+        self.max_weight = np.zeros(transposed.shape[0])
+        non_empty = np.flatnonzero(lengths)
+        if len(non_empty):
+            self.max_weight[non_empty] = np.maximum.reduceat(self.weights, self.indptr[non_empty])
+        # Posisi filter (category, type) sebagai array, dibangun sekali per kombinasi;
+        # dibaca / ditulis dari banyak request thread, jadi dijaga lock
+        self.filters = {}
+        self._filters_lock = threading.Lock()
+
+    def allowed(self, key, positions, max_entries=256):
+        """Array posisi untuk filter `key`; `positions()` hanya dipanggil kalau belum di-cache"""
+        with self._filters_lock:
+            allowed = self.filters.get(key)
+        if allowed is not None:
+            return allowed
+        # Dihitung di luar lock; dua thread dengan key yang sama hanya menghitung dua kali
+        allowed = np.asarray(positions(), dtype=np.int64)
+        with self._filters_lock:
+            if key not in self.filters and len(self.filters) >= max_entries:
+                self.filters.pop(next(iter(self.filters)))
+            return self.filters.setdefault(key, allowed)
+
+    def posting(self, term):
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.rows[start:end], self.weights[start:end]
+
+    @staticmethod
+    def _restrict(rows, weights, allowed):
+        """Potong posting ke posisi yang lolos filter: binary search sisi yang lebih kecil ke sisi lainnya"""
+        if len(allowed) < len(rows):
+            positions = np.searchsorted(rows, allowed)
+            valid = positions < len(rows)
+            positions = positions[valid]
+            hit = positions[rows[positions] == allowed[valid]]
+            return rows[hit], weights[hit]
+        positions = np.searchsorted(allowed, rows)
+        positions[positions == len(allowed)] = 0
+        keep = allowed[positions] == rows if len(allowed) else np.zeros(len(rows), dtype=bool)
+        return rows[keep], weights[keep]
+
+    def search(self, query_vector, k=10, allowed=None):
+        """
+        Top-k produk untuk query (baris CSR 1 x V dari vectorizer.transform).
+        `allowed`: posisi produk yang lolos filter (urut naik) atau None.
+        Return (indices, scores, stats).
+        """
+        stats = {'terms': 0, 'postings_scored': 0, 'and_terms': 0, 'candidates': 0}
+        terms, query_weights = query_vector.indices, query_vector.data
+        keep = (query_weights > 0) & (self.max_weight[terms] > 0)
+        terms, query_weights = terms[keep], query_weights[keep]
+        stats['terms'] = int(len(terms))
+
+        if allowed is not None:
+            allowed = np.asarray(allowed, dtype=np.int64)
+
+        if len(terms) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0), stats
+
+        upper_bounds = query_weights * self.max_weight[terms]
+        order = np.argsort(-upper_bounds, kind='stable')
+        terms, query_weights, upper_bounds = terms[order], query_weights[order], upper_bounds[order]
+        # remaining[i] = batas atas skor dari term i dan sesudahnya
+        remaining = np.cumsum(upper_bounds[::-1])[::-1]
+
+        candidates = np.empty(0, dtype=np.int64)
+        scores = np.empty(0)
+        for i, (term, query_weight) in enumerate(zip(terms, query_weights)):
+            threshold = np.partition(scores, len(scores) - k)[len(scores) - k] if len(scores) >= k else -np.inf
+            rows, weights = self.posting(term)
+
+            if remaining[i] < threshold:
+                # AND: produk baru tidak mungkin masuk top-k, update kandidat saja
+                stats['and_terms'] += 1
+                positions = np.searchsorted(rows, candidates)
+                positions[positions == len(rows)] = 0
+                hit = rows[positions] == candidates if len(rows) else np.zeros(len(candidates), dtype=bool)
+                scores[hit] += query_weight * weights[positions[hit]]
+                stats['postings_scored'] += int(hit.sum())
+
+                rest = remaining[i + 1] if i + 1 < len(remaining) else 0.0
+                alive = scores + rest >= threshold
+                candidates, scores = candidates[alive], scores[alive]
+                continue
+
+            if allowed is not None:
+                rows, weights = self._restrict(rows, weights, allowed)
+            stats['postings_scored'] += int(len(rows))
+            merged_rows = np.concatenate([candidates, rows])
+            merged_scores = np.concatenate([scores, query_weight * weights])
+            candidates, inverse = np.unique(merged_rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=merged_scores, minlength=len(candidates))
+
+        stats['candidates'] = int(len(candidates))
+        local = top_k_indices(scores, k)
+        return candidates[local], scores[local], stats
@@ -0,0 +1,399 @@
+"""
+Shared read-only model snapshots untuk serving multi-process (gunicorn).
+
+Model dibangun sekali lalu ditulis sebagai array .npy mentah, sehingga setiap
+worker cukup np.load(mmap_mode='r') dan semua worker berbagi page yang sama
+lewat OS page cache (RSS per worker tidak ikut membengkak per worker):
+
+    SHARED_MODEL_DIR/
+        CURRENT                 nama snapshot aktif (ditulis atomik dengan os.replace)
+        snapshot-000003/
+            manifest.json       generation, ukuran, params, kolom metadata
+            vocabulary.json     term -> kolom (vectorizer direkonstruksi tanpa fit)
+            idf.npy
+            tfidf_{data,indices,indptr}.npy         CSR TF-IDF
+            normalized_{data,indices,indptr}.npy    CSR L2-normalized
+            transposed_{data,indices,indptr}.npy    transpose CSR normalized (V x N)
+            columns/<kolom>.npy metadata produk (string -> unicode fixed-width)
+            products/           metadata hasil kolumnar (format product_store.py)
+            name_grams.json     trigram -> [start, end] ke name_postings.npy
+            name_postings.npy   posting list name index (int32, disambung)
+            name_index/         nama lowercase (blob UTF-8) + hash exact / normalized -> posisi
+            groups.json         grup (category, type) -> [start, end] ke group_positions.npy
+            group_positions.npy posisi per grup / ranking (int32, disambung)
+            neighbors/          top-K neighbor table (format neighbor_table.py)
+            ann/                IVF index (format ann_index.py), kalau engine membawanya
+
+Reload terkoordinasi: worker yang menerima /reload atau /sync membangun model,
+mengekspor snapshot baru dan menukar CURRENT; worker lain memantau CURRENT
+(SHARED_MODEL_POLL detik) dan me-load snapshot baru di builder thread-nya.
+Nomor generation diambil dari snapshot, jadi sama di semua worker.
+
+    python shared_model.py export    # build dari katalog lalu export (dipakai gunicorn.conf.py)
+    python shared_model.py status
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+import model_store
+from ann_index import IVFIndex
+from neighbor_table import NeighborTable, build_neighbor_table, save_neighbor_table
+from product_store import ProductStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: gunicorn juga tidak tersedia, lock tidak diperlukan
+    fcntl = None
+
+SNAPSHOT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.lock'
+MANIFEST_FILE = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.json'
+IDF_FILE = 'idf.npy'
+COLUMNS_DIR = 'columns'
+NAME_GRAMS_FILE = 'name_grams.json'
+NAME_POSTINGS_FILE = 'name_postings.npy'
+NAME_INDEX_DIR = 'name_index'
+GROUPS_FILE = 'groups.json'
+GROUP_POSITIONS_FILE = 'group_positions.npy'
+NEIGHBORS_DIR = 'neighbors'
+ANN_DIR = 'ann'
+PRODUCTS_DIR = 'products'
+SNAPSHOT_PREFIX = 'snapshot-'
+# Snapshot yang digantikan baru dihapus setelah sekian detik; load yang kehilangan file-nya
+# membaca ulang CURRENT dan mencoba lagi dengan backoff
+PRUNE_GRACE_SECONDS = float(os.environ.get('SHARED_MODEL_PRUNE_GRACE', '60'))
+LOAD_ATTEMPTS = 4
+LOAD_BACKOFF_SECONDS = 0.1
+
+
+def _save_csr(path, prefix, matrix):
+    matrix = sparse.csr_matrix(matrix)
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(path, f'{prefix}_{part}.npy'), np.ascontiguousarray(getattr(matrix, part)))
+    return [int(size) for size in matrix.shape]
+
+
+def _load_csr(path, prefix, shape, mmap=True):
+    mmap_mode = 'r' if mmap else None
+    data, indices, indptr = (
+        np.load(os.path.join(path, f'{prefix}_{part}.npy'), mmap_mode=mmap_mode)
+        for part in ('data', 'indices', 'indptr')
+    )
+    # copy=False: array hasil mmap dipakai langsung sebagai buffer CSR
+    return sparse.csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+
+
+def _column_array(values):
+    """Kolom DataFrame -> array yang bisa di-mmap (string jadi unicode fixed-width)"""
+    if values.dtype.kind in 'biuf':
+        return np.ascontiguousarray(values.to_numpy())
+    return np.asarray(values.fillna('').astype(str).to_numpy(), dtype=str)
+
+
+class _DirectoryLock:
+    """Lock antar proses untuk ekspor snapshot (fcntl.flock; no-op kalau tidak tersedia)"""
+
+    def __init__(self, root):
+        self.path = os.path.join(root, LOCK_FILE)
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def read_current(root):
+    """(nama_snapshot, generation) yang aktif, atau None kalau belum ada snapshot"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), 'r', encoding='utf-8') as file:
+            name = file.read().strip()
+    except FileNotFoundError:
+        return None
+    if not name.startswith(SNAPSHOT_PREFIX):
+        return None
+    return name, int(name[len(SNAPSHOT_PREFIX):])
+
+
+def export_snapshot(root, engine, neighbors_k=20, keep=2):
+    """
+    Tulis snapshot baru dari engine lalu tukar CURRENT secara atomik.
+    Return manifest snapshot (berisi 'name' dan 'generation').
+    """
+    os.makedirs(root, exist_ok=True)
+    with _DirectoryLock(root):
+        current = read_current(root)
+        generation = max(current[1] if current else 0, engine.generation) + 1
+        name = f'{SNAPSHOT_PREFIX}{generation:06d}'
+
+        staging = os.path.join(root, f'.{name}.tmp-{os.getpid()}')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(os.path.join(staging, COLUMNS_DIR))
+
+        shape = _save_csr(staging, 'tfidf', engine.tfidf_matrix)
+        _save_csr(staging, 'normalized', engine.normalized_matrix)
+        if engine.transposed_matrix is not None:
+            _save_csr(staging, 'transposed', engine.transposed_matrix)
+        vocabulary = {term: int(column) for term, column in engine.vectorizer.vocabulary_.items()}
+        with open(os.path.join(staging, VOCABULARY_FILE), 'w', encoding='utf-8') as file:
+            json.dump(vocabulary, file, ensure_ascii=False)
+        np.save(os.path.join(staging, IDF_FILE), engine.vectorizer.idf_)
+
+        columns = []
+        for column in engine.df.columns:
+            np.save(os.path.join(staging, COLUMNS_DIR, f'{len(columns)}.npy'), _column_array(engine.df[column]))
+            columns.append(str(column))
+        store = engine.product_store
+        if store is None or len(store) != shape[0]:
+            store = ProductStore.from_frame(engine.df)
+        store.save(os.path.join(staging, PRODUCTS_DIR))
+
+        # Posting list trigram adalah bagian terbesar name index; dibagi lewat mmap juga
+        grams, postings = engine.name_index.postings()
+        with open(os.path.join(staging, NAME_GRAMS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(grams, file, ensure_ascii=False)
+        np.save(os.path.join(staging, NAME_POSTINGS_FILE), np.asarray(postings, dtype=np.int32))
+        os.makedirs(os.path.join(staging, NAME_INDEX_DIR))
+        for part, array in engine.name_index.export().items():
+            np.save(os.path.join(staging, NAME_INDEX_DIR, f'{part}.npy'), np.ascontiguousarray(array))
+
+        groups, group_positions = engine.group_index.export()
+        with open(os.path.join(staging, GROUPS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(groups, file, ensure_ascii=False)
+        np.save(os.path.join(staging, GROUP_POSITIONS_FILE), np.asarray(group_positions, dtype=np.int32))
+
+        neighbors = None
+        if neighbors_k > 0 and shape[0] > 1:
+            indices, scores = build_neighbor_table(engine.normalized_matrix, k=neighbors_k)
+            neighbors = save_neighbor_table(os.path.join(staging, NEIGHBORS_DIR), indices, scores,
+                                            source='tfidf', products=shape[0])['k']
+        # IVF index dibangun sekali di builder (build penuh); worker hanya me-load
+        ann_index = getattr(engine, 'ann_index', None)
+        if ann_index is not None:
+            ann_index.save(os.path.join(staging, ANN_DIR))
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'name': name,
+            'generation': generation,
+            'shape': shape,
+            'columns': columns,
+            'neighbors_k': neighbors,
+            'source_path': engine.source_path,
+            'source_hash': engine.source_hash,
+            'vocab_drift': engine.vocab_drift,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+
+        os.replace(staging, os.path.join(root, name))
+        pointer = os.path.join(root, f'{CURRENT_FILE}.tmp-{os.getpid()}')
+        with open(pointer, 'w', encoding='utf-8') as file:
+            file.write(name)
+        os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+        _prune(root, keep)
+    return manifest
+
+
+def _prune(root, keep, grace=PRUNE_GRACE_SECONDS):
+    """
+    Hapus snapshot lama; CURRENT dan generation sebelumnya selalu disisakan, begitu juga
+    snapshot yang baru digantikan < `grace` detik lalu (worker mungkin baru membaca CURRENT
+    lama dan belum membuka file-nya). Setelah file di-mmap, hapus aman (inode tetap hidup).
+    """
+    snapshots = sorted(entry for entry in os.listdir(root) if entry.startswith(SNAPSHOT_PREFIX))
+    now = time.time()
+    for entry, successor in zip(snapshots[:-max(2, keep)], snapshots[1:]):
+        try:
+            superseded_at = os.path.getmtime(os.path.join(root, successor))
+        except OSError:
+            continue
+        if now - superseded_at >= grace:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def load_snapshot(root, name=None, params=None, mmap=True):
+    """
+    Load snapshot (default: CURRENT). Return dict (manifest, tfidf_matrix,
+    normalized_matrix, transposed, vectorizer, columns, products, name_grams, name_postings, name_index,
+    groups, neighbors, ann) atau None kalau belum ada. name_index / groups / transposed None untuk snapshot lama,
+    ann None kalau snapshot dibuat tanpa IVF index.
+    """
+    if name is None:
+        current = read_current(root)
+        if current is None:
+            return None
+        name = current[0]
+    path = os.path.join(root, name)
+
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+    with open(os.path.join(path, VOCABULARY_FILE), 'r', encoding='utf-8') as file:
+        vocabulary = json.load(file)
+    vectorizer = model_store.restore_vectorizer(vocabulary, np.load(os.path.join(path, IDF_FILE)), params or {})
+
+    mmap_mode = 'r' if mmap else None
+    columns = {
+        column: np.load(os.path.join(path, COLUMNS_DIR, f'{position}.npy'), mmap_mode=mmap_mode)
+        for position, column in enumerate(manifest['columns'])
+    }
+    with open(os.path.join(path, NAME_GRAMS_FILE), 'r', encoding='utf-8') as file:
+        name_grams = json.load(file)
+    name_index = None
+    if os.path.isdir(os.path.join(path, NAME_INDEX_DIR)):
+        name_index = {
+            entry[:-len('.npy')]: np.load(os.path.join(path, NAME_INDEX_DIR, entry), mmap_mode=mmap_mode)
+            for entry in os.listdir(os.path.join(path, NAME_INDEX_DIR)) if entry.endswith('.npy')
+        }
+    groups = None
+    if os.path.exists(os.path.join(path, GROUPS_FILE)):
+        with open(os.path.join(path, GROUPS_FILE), 'r', encoding='utf-8') as file:
+            groups = (json.load(file), np.load(os.path.join(path, GROUP_POSITIONS_FILE), mmap_mode=mmap_mode))
+    neighbors_path = os.path.join(path, NEIGHBORS_DIR)
+    return {
+        'manifest': manifest,
+        'tfidf_matrix': _load_csr(path, 'tfidf', manifest['shape'], mmap),
+        'normalized_matrix': _load_csr(path, 'normalized', manifest['shape'], mmap),
+        'transposed': _load_csr(path, 'transposed', manifest['shape'][::-1], mmap)
+        if os.path.exists(os.path.join(path, 'transposed_indptr.npy')) else None,
+        'vectorizer': vectorizer,
+        'columns': columns,
+        'products': ProductStore.load(os.path.join(path, PRODUCTS_DIR), mmap=mmap),
+        'name_grams': name_grams,
+        'name_postings': np.load(os.path.join(path, NAME_POSTINGS_FILE), mmap_mode=mmap_mode),
+        'name_index': name_index,
+        'groups': groups,
+        'neighbors': NeighborTable.load(neighbors_path, mmap=mmap) if NeighborTable.exists(neighbors_path) else None,
+        'ann': IVFIndex.load(os.path.join(path, ANN_DIR), mmap=mmap)
+    }
+
+
+class SharedModelStore:
+    """
+    Penghubung ModelManager <-> direktori snapshot.
+
+    `engine_factory(snapshot)` mengubah hasil load_snapshot() menjadi engine;
+    share(engine) mengekspor engine hasil build lalu mengembalikan versi mmap-nya.
+    """
+
+    def __init__(self, root, engine_factory, params=None, neighbors_k=20, keep=2, poll_interval=1.0):
+        self.root = root
+        self.engine_factory = engine_factory
+        self.params = params
+        self.neighbors_k = neighbors_k
+        self.keep = keep
+        self.poll_interval = poll_interval
+        self._watcher = None
+
+    def current(self):
+        return read_current(self.root)
+
+    def load(self, name=None, attempts=LOAD_ATTEMPTS, backoff=LOAD_BACKOFF_SECONDS):
+        """
+        Load snapshot `name` (default CURRENT) sebagai engine. Kalau file-nya hilang karena
+        di-prune proses lain, CURRENT dibaca ulang dan load diulang (backoff dobel tiap gagal).
+        """
+        for attempt in range(attempts):
+            try:
+                snapshot = load_snapshot(self.root, name=name, params=self.params)
+                return self.engine_factory(snapshot) if snapshot is not None else None
+            except FileNotFoundError as e:
+                if attempt == attempts - 1:
+                    raise
+                print(f"⚠️ Snapshot {name or 'CURRENT'} disappeared while loading ({e}), re-reading CURRENT")
+                name = None
+                time.sleep(backoff * 2 ** attempt)
+
+    def share(self, engine, neighbors=True):
+        """
+        Ekspor engine lalu load versi mmap-nya. neighbors=False (incremental sync) melewati
+        build_neighbor_table yang O(N^2): snapshot tanpa table melayani /similar lewat
+        row_scores sampai build penuh berikutnya (reload / sync) mengekspor table baru.
+        """
+        neighbors_k = self.neighbors_k if neighbors else 0
+        manifest = export_snapshot(self.root, engine, neighbors_k=neighbors_k, keep=self.keep)
+        print(f"📦 Shared snapshot {manifest['name']} exported ({manifest['shape'][0]} products)")
+        return self.load(manifest['name'])
+
+    def watch(self, manager):
+        """Thread daemon: load snapshot baru yang diekspor proses lain ke `manager`"""
+        if self._watcher is not None:
+            return
+
+        def build_if_newer(current_engine):
+            current = self.current()
+            if current is None or current[1] <= manager.generation:
+                return None, None
+            return self.load(current[0]), None
+
+        def loop():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    current = self.current()
+                    if current is not None and current[1] > manager.generation and manager.pending == 0:
+                        manager.submit('shared', build_if_newer, wait=True, store=False)
+                except Exception as e:
+                    print(f"⚠️ Shared snapshot watcher: {e}")
+
+        self._watcher = threading.Thread(target=loop, name='shared-model-watcher', daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        current = self.current()
+        return {
+            'root': self.root,
+            'current': current[0] if current else None,
+            'generation': current[1] if current else None
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['export', 'status'])
+    parser.add_argument('--root', default=os.environ.get('SHARED_MODEL_DIR') or os.path.join('models', 'shared'))
+    parser.add_argument('--neighbors-k', type=int, default=int(os.environ.get('SHARED_NEIGHBORS_K', '20')))
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        current = read_current(args.root)
+        print(f"📦 {args.root}: {current[0] if current else 'no snapshot'}")
+        return
+
+    # Proses ini yang membangun model, jadi app tidak boleh me-load snapshot lama
+    os.environ['SHARED_MODEL_DIR'] = ''
+    from app import model_manager
+
+    engine = model_manager.wait_ready()
+    if engine.normalized_matrix is None:
+        raise SystemExit('❌ Model not trained, nothing to export')
+
+    start = time.perf_counter()
+    manifest = export_snapshot(args.root, engine, neighbors_k=args.neighbors_k,
+                               keep=int(os.environ.get('SHARED_MODEL_KEEP', '2')))
+    print(f"✅ Shared snapshot {manifest['name']} exported to {args.root}: "
+          f"{manifest['shape'][0]} x {manifest['shape'][1]} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import numpy as np
+from scipy import sparse
+
+# rows_top_k: sparse product dipakai kalau kerjanya < 1 / SPARSE_WORK_RATIO dari satu pass
+# atas matrix per baris; selain itu skor dense per potongan maksimal DENSE_BATCH_CELLS float
+SPARSE_WORK_RATIO = 16
+DENSE_BATCH_CELLS = 1 << 22
+
+
+def l2_normalize_rows(matrix):
+    """
+    Return salinan CSR yang setiap barisnya punya norm L2 = 1 (baris nol tetap nol),
+    sehingga cosine similarity cukup dihitung dengan sparse dot product.
+    """
+    matrix = sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def row_scores(normalized_matrix, row_idx):
+    """Cosine similarity satu baris terhadap semua baris (dense 1-D array)"""
+    # Sparse matrix x dense vector: satu pass atas nnz, tanpa hasil sparse N x 1
+    query = normalized_matrix[row_idx].toarray().ravel()
+    return normalized_matrix @ query
+
+
+def top_k_indices(scores, k, exclude=None):
+    """
+    Ambil k index dengan skor tertinggi tanpa full sort.
+
+    argpartition memilih kandidat dalam O(N), lalu hanya kandidat yang diurutkan
+    (skor turun, index naik untuk skor yang sama). Item di `exclude` dibuang
+    berdasarkan index, bukan dengan membuang posisi pertama hasil sort.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if exclude is not None and len(exclude) > 0:
+        scores = scores.copy()
+        scores[np.asarray(exclude, dtype=np.int64)] = -np.inf
+
+    available = int(np.isfinite(scores).sum())
+    k = min(int(k), available)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < len(scores):
+        partition = np.argpartition(-scores, k - 1)[:k]
+        # Sertakan semua item yang seri dengan skor ke-k supaya tie-break deterministik
+        threshold = scores[partition].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.flatnonzero(np.isfinite(scores))
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def top_k_sparse(indices, scores, k, exclude=None):
+    """
+    top_k_indices untuk satu baris sparse (kolom `indices`, nilai `scores`) tanpa densify.
+    Return (indices, scores), atau None kalau kurang dari k skor positif: hasil dense
+    lalu ikut memuat skor nol (index terkecil dulu), jadi caller memakai jalur dense.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    keep = scores > 0
+    if exclude is not None and len(exclude) > 0:
+        keep &= ~np.isin(indices, np.asarray(exclude, dtype=np.int64))
+    indices, scores = indices[keep], scores[keep]
+    k = int(k)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    if len(indices) < k:
+        return None
+
+    if len(indices) > k:
+        # Seperti top_k_indices: argpartition, lalu semua yang seri dengan skor ke-k
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+        indices, scores = indices[candidates], scores[candidates]
+    order = np.lexsort((indices, -scores))[:k]
+    return indices[order], scores[order]
+
+
+def transpose_rows(normalized_matrix):
+    """
+    normalized_matrix.T sebagai CSR (V x N), dibangun sekali per model. `matrix.T` biasa
+    adalah CSC, dan scipy mengonversinya lagi ke CSR (seluruh matrix) di setiap product.
+    """
+    return normalized_matrix.T.tocsr()
+
+
+def rows_scores(normalized_matrix, row_indices, transposed=None):
+    """
+    Cosine similarity beberapa baris sekaligus: satu sparse product (B x V) @ (V x N) -> dense B x N.
+    `transposed` hasil transpose_rows; tanpa itu transpose dibangun per panggilan.
+    """
+    if transposed is None:
+        transposed = transpose_rows(normalized_matrix)
+    return (normalized_matrix[row_indices] @ transposed).toarray()
+
+
+def rows_top_k(normalized_matrix, rows, ns, transposed=None):
+    """
+    Top-n tetangga untuk beberapa baris sekaligus; hasil sama dengan row_scores + top_k_indices
+    per baris (batch satu baris langsung lewat jalur itu).
+
+    Kalau term baris-baris itu jarang (perkiraan kerja sparse product kecil dibanding satu pass
+    atas matrix), satu sparse product (B x V) @ transposed lalu top-k per baris dari hasil sparse.
+    Kalau term-nya umum, hasil sparse product hampir penuh dan jauh lebih lambat dari
+    matrix @ query dense, jadi baris di-score dense per potongan DENSE_BATCH_CELLS skor.
+    Baris dengan kurang dari n tetangga positif di jalur sparse di-score dense sendirian supaya
+    tie-break skor nol sama. Return list (indices, scores) dengan urutan yang sama dengan rows.
+    """
+    if len(rows) == 1:
+        scores = row_scores(normalized_matrix, rows[0])
+        indices = top_k_indices(scores, ns[0], exclude=[rows[0]])
+        return [(indices, scores[indices])]
+
+    if transposed is None:
+        transposed = transpose_rows(normalized_matrix)
+    queries = normalized_matrix[rows]
+    sparse_work = int(np.diff(transposed.indptr)[queries.indices].sum())
+    if sparse_work * SPARSE_WORK_RATIO > normalized_matrix.nnz * len(rows):
+        return _dense_rows_top_k(normalized_matrix, queries, rows, ns)
+
+    product = (queries @ transposed).tocsr()
+    results = []
+    for position, (row, n) in enumerate(zip(rows, ns)):
+        start, end = product.indptr[position], product.indptr[position + 1]
+        result = top_k_sparse(product.indices[start:end], product.data[start:end], n, exclude=[row])
+        if result is None:
+            scores = row_scores(normalized_matrix, row)
+            indices = top_k_indices(scores, n, exclude=[row])
+            result = (indices, scores[indices])
+        results.append(result)
+    return results
+
+
+def _dense_rows_top_k(normalized_matrix, queries, rows, ns):
+    """matrix @ query dense per potongan baris; memory skor dibatasi DENSE_BATCH_CELLS"""
+    step = max(1, DENSE_BATCH_CELLS // max(normalized_matrix.shape[0], 1))
+    results = []
+    for start in range(0, len(rows), step):
+        block = np.ascontiguousarray((normalized_matrix @ queries[start:start + step].toarray().T).T)
+        for scores, row, n in zip(block, rows[start:start + step], ns[start:start + step]):
+            indices = top_k_indices(scores, n, exclude=[row])
+            results.append((indices, scores[indices]))
+    return results
@@ -0,0 +1,246 @@
+"""
+Streaming ingestion untuk katalog besar: CSV per chunk dan upload NDJSON.
+
+Model dibangun tanpa pernah memegang seluruh text katalog atau vocabulary penuh
+di memory (TfidfVectorizer.fit_transform menyimpan semua token unik, termasuk
+kode / nomor seri di nama produk, sebelum max_features dipotong):
+
+    1. pass 1: setiap chunk di-hash dengan HashingVectorizer (analyzer sama dengan
+       VECTORIZER_PARAMS) -> frekuensi term per bucket, array n_features tetap
+    2. bucket kandidat dipilih: frekuensi terbesar, 2 x max_features
+    3. pass 2: chunk dibaca ulang, hanya token yang jatuh ke bucket kandidat yang
+       dihitung (per token, jadi collision hash tidak mencampur term)
+    4. max_features term dengan frekuensi terbesar (sama seperti sklearn), idf (smooth)
+       + normalisasi L2 -> TfidfVectorizer biasa (vocabulary_ + idf_)
+
+Hasilnya vectorizer sklearn biasa, jadi bundle, shared snapshot, incremental sync
+dan /search tetap jalan. Matrix-nya identik dengan fit penuh kecuali ada tie frekuensi
+di batas max_features (sklearn tidak menjamin urutan tie) atau term yang seharusnya
+masuk tersingkir di pass 1 karena bucket-nya kalah dari 2 x max_features bucket lain.
+
+Memory kerja di luar model akhir: O(chunk_rows) + O(n_features). DataFrame hasil hanya
+memuat SERVING_COLUMNS, diisi per chunk ke kolom yang dialokasikan sekali (jumlah baris
+diketahui dari pass 1), jadi tidak ada daftar chunk + pd.concat yang menggandakan katalog.
+
+    chunks = lambda: csv_chunks('catalog.csv', 20000)
+    df, vectorizer, tfidf_matrix, stats = build_from_chunks(chunks, VECTORIZER_PARAMS)
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+import model_store
+import text_features
+
+REQUIRED_FIELDS = ('nama_pakaian', 'categories', 'type')
+# Kolom yang dipakai product store / serving (id untuk incremental sync, popularity untuk ranking);
+# kolom lain di chunk tidak ikut disimpan
+SERVING_COLUMNS = ('id',) + REQUIRED_FIELDS + ('popularity',)
+DEFAULT_CHUNK_ROWS = 20000
+DEFAULT_HASH_FEATURES = 1 << 20
+
+
+def csv_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """DataFrame per `chunk_rows` baris dari CSV katalog (sep=';')"""
+    return pd.read_csv(path, sep=';', chunksize=chunk_rows, dtype=model_store.CSV_DTYPES)
+
+
+def ndjson_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """DataFrame per `chunk_rows` produk dari file NDJSON (satu object JSON per baris)"""
+    with open(path, 'r', encoding='utf-8') as file:
+        records = []
+        for line in file:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) >= chunk_rows:
+                yield pd.DataFrame(records)
+                records = []
+        if records:
+            yield pd.DataFrame(records)
+
+
+def spool_ndjson(stream, path, block_size=1 << 16):
+    """
+    Salin body NDJSON (boleh chunked transfer) ke `path` baris per baris sambil
+    memvalidasi setiap produk. Return jumlah produk; ValueError dengan nomor
+    baris kalau ada baris yang bukan JSON object lengkap.
+    """
+    count = 0
+    line_number = 0
+    pending = b''
+    with open(path, 'wb') as file:
+        for block in iter(lambda: stream.read(block_size), b''):
+            lines = (pending + block).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                line_number += 1
+                count += _spool_line(file, line, line_number)
+        if pending:
+            count += _spool_line(file, pending, line_number + 1)
+    return count
+
+
+def _spool_line(file, line, line_number):
+    if not line.strip():
+        return 0
+    try:
+        product = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f'Line {line_number}: invalid JSON ({e})')
+    if not isinstance(product, dict) or not all(field in product for field in REQUIRED_FIELDS):
+        raise ValueError(f'Line {line_number}: every product needs nama_pakaian, categories and type')
+    file.write(line.rstrip(b'\r') + b'\n')
+    return 1
+
+
+class StreamingTfidfBuilder:
+    def __init__(self, params, n_features=DEFAULT_HASH_FEATURES, oversample=2):
+        self.params = dict(params)
+        self.max_features = self.params.get('max_features')
+        self.n_features = n_features
+        # Bucket yang dipilih di pass 1 = oversample x max_features, supaya collision
+        # dengan token langka tidak menggeser term yang seharusnya masuk vocabulary
+        self.oversample = oversample
+        self.hasher = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None,
+            **{key: value for key, value in self.params.items() if key != 'max_features'}
+        )
+        self.analyzer = self.hasher.build_analyzer()
+        self.term_freq = np.zeros(n_features)
+        self.selected = None
+        self.terms = {}
+        self.counts = []
+        self.rows = 0
+
+    def count(self, texts):
+        """Pass 1: frekuensi term per bucket hash"""
+        hashed = self.hasher.transform(texts)
+        self.term_freq += np.bincount(hashed.indices, weights=hashed.data, minlength=self.n_features)
+
+    def select(self):
+        """Tandai bucket kandidat: frekuensi term terbesar, oversample x max_features"""
+        used = np.flatnonzero(self.term_freq)
+        if self.max_features is not None and len(used) > self.max_features * self.oversample:
+            used = used[np.argsort(-self.term_freq[used], kind='stable')[:self.max_features * self.oversample]]
+        self.selected = np.zeros(self.n_features, dtype=bool)
+        self.selected[used] = True
+        self.term_freq = None  # tidak dipakai lagi setelah seleksi
+
+    def _bucket(self, token):
+        # Sama dengan sklearn _hashing_fast: abs(murmurhash3 signed) % n_features
+        value = murmurhash3_32(token, seed=0)
+        if value == -2147483648:
+            return (2147483647 - (self.n_features - 1)) % self.n_features
+        return abs(value) % self.n_features
+
+    def add(self, texts):
+        """Pass 2: count per token kandidat (token di bucket terpilih), kolom sementara"""
+        local = {}
+        indices, indptr = [], [0]
+        for text in texts:
+            for token in self.analyzer(text):
+                column = local.get(token)
+                if column is None:
+                    column = self.terms.get(token, -1)
+                    if column < 0 and self.selected[self._bucket(token)]:
+                        column = self.terms[token] = len(self.terms)
+                    local[token] = column
+                if column >= 0:
+                    indices.append(column)
+            indptr.append(len(indices))
+        self.counts.append((np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)))
+        self.rows += len(texts)
+
+    def finish(self):
+        """(vectorizer, tfidf_matrix) dengan kolom urut alfabetis seperti TfidfVectorizer"""
+        width = len(self.terms)
+        term_freq = np.zeros(width)
+        for indices, _ in self.counts:
+            term_freq += np.bincount(indices, minlength=width)
+
+        # max_features seperti sklearn: frekuensi term total, di atas urutan alfabetis
+        tokens = sorted(self.terms)
+        alphabetical = np.asarray([self.terms[token] for token in tokens], dtype=np.int64)
+        if self.max_features is not None and len(tokens) > self.max_features:
+            keep = np.sort(np.argsort(-term_freq[alphabetical], kind='stable')[:self.max_features])
+            tokens = [tokens[position] for position in keep]
+            alphabetical = alphabetical[keep]
+        remap = np.full(width, -1, dtype=np.int32)
+        remap[alphabetical] = np.arange(len(tokens), dtype=np.int32)
+
+        # Count per chunk dipetakan ke kolom akhir lalu dilepas; matrix akhir dirakit sekali
+        parts = []
+        while self.counts:
+            indices, indptr = self.counts.pop(0)
+            columns = remap[indices]
+            kept = columns >= 0
+            kept_before = np.concatenate([[0], np.cumsum(kept)])
+            chunk = sparse.csr_matrix(
+                (np.ones(int(kept.sum())), columns[kept], kept_before[indptr]),
+                shape=(len(indptr) - 1, len(tokens))
+            )
+            chunk.sum_duplicates()
+            parts.append(chunk)
+        tfidf = sparse.vstack(parts, format='csr') if parts else sparse.csr_matrix((0, len(tokens)))
+        del parts
+
+        # idf (smooth) dan normalisasi L2 in-place di data CSR
+        doc_freq = np.bincount(tfidf.indices, minlength=len(tokens))
+        idf = np.log((1 + self.rows) / (1 + doc_freq)) + 1
+        tfidf.data *= idf[tfidf.indices]
+        lengths = np.diff(tfidf.indptr)
+        norms = np.zeros(tfidf.shape[0])
+        non_empty = lengths > 0
+        norms[non_empty] = np.sqrt(np.add.reduceat(tfidf.data ** 2, tfidf.indptr[:-1][non_empty]))
+        norms[norms == 0] = 1.0
+        tfidf.data /= np.repeat(norms, lengths)
+
+        vocabulary = {token: column for column, token in enumerate(tokens)}
+        vectorizer = model_store.restore_vectorizer(vocabulary, idf, self.params)
+        return vectorizer, tfidf
+
+
+def build_from_chunks(chunks, params, n_features=DEFAULT_HASH_FEATURES, weights=text_features.DEFAULT_WEIGHTS):
+    """
+    Build model dari `chunks()` (callable, dipanggil dua kali, setiap panggilan
+    menghasilkan iterator DataFrame). `weights`: bobot field text (text_features.py).
+    Return (df, vectorizer, tfidf_matrix, stats).
+    """
+    start = time.perf_counter()
+    builder = StreamingTfidfBuilder(params, n_features=n_features)
+    chunk_count = 0
+    rows = 0
+    names = []
+    for chunk in chunks():
+        builder.count(text_features.product_texts(chunk, weights))
+        chunk_count += 1
+        rows += len(chunk)
+        names.extend(name for name in SERVING_COLUMNS if name in chunk.columns and name not in names)
+    builder.select()
+
+    # Pass 2 mengisi kolom serving per chunk; chunk itu sendiri langsung dilepas
+    columns = {name: np.full(rows, None, dtype=object) for name in names or REQUIRED_FIELDS}
+    offset = 0
+    for chunk in chunks():
+        builder.add(text_features.product_texts(chunk, weights))
+        for name, values in columns.items():
+            if name in chunk.columns:
+                values[offset:offset + len(chunk)] = chunk[name].to_numpy(dtype=object)
+        offset += len(chunk)
+    df = pd.DataFrame(columns).infer_objects()
+    del columns
+
+    vectorizer, tfidf_matrix = builder.finish()
+    stats = {
+        'rows': int(tfidf_matrix.shape[0]),
+        'chunks': chunk_count,
+        'vocab_size': int(tfidf_matrix.shape[1]),
+        'hash_features': n_features,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+    return df, vectorizer, tfidf_matrix, stats
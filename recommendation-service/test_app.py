@@ -0,0 +1,871 @@
+from app import app, model_manager
+
+engine = model_manager.wait_ready()
+
+
+def client():
+    return app.test_client()
+
+
+def test_batch_merges_and_excludes_seeds():
+    response = client().post('/recommendations/batch', json={
+        'product_names': ['Blazer', 'Kemeja', 'produk-yang-tidak-ada'],
+        'weights': [1.0, 0.8, 1.0],
+        'n': 6
+    })
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['success'] is True
+    assert data['not_found'] == ['produk-yang-tidak-ada']
+    assert len(data['recommendations']) == 6
+
+    seed_names = {seed['reference_product']['nama_pakaian'] for seed in data['seeds']}
+    names = [rec['nama_pakaian'] for rec in data['recommendations']]
+    assert len(names) == len(set(names))
+    assert not seed_names & set(names)
+
+    scores = [rec['similarity_score'] for rec in data['recommendations']]
+    assert scores == sorted(scores, reverse=True)
+    for rec in data['recommendations']:
+        assert rec['based_on'] in ('Blazer', 'Kemeja')
+
+
+def test_batch_single_seed_matches_similar():
+    single = engine.get_recommendations_by_product_name('Blazer', n=5)
+    batch = engine.get_recommendations_batch(['Blazer'], n=5)
+
+    assert [r['nama_pakaian'] for r in batch['recommendations']] == \
+        [r['nama_pakaian'] for r in single['recommendations']]
+
+
+def test_batch_rejects_mismatched_weights():
+    response = client().post('/recommendations/batch', json={
+        'product_names': ['Blazer'],
+        'weights': [1.0, 2.0]
+    })
+    assert response.status_code == 400
+
+
+def test_batch_validates_weights_and_clamps_n():
+    def post(body):
+        return client().post('/recommendations/batch', json={'product_names': ['Blazer', 'Kemeja'], **body})
+
+    for weights in (['1', 0.5], [True, 1.0], [None, 1.0], [1.0, [2]]):
+        response = post({'weights': weights})
+        assert response.status_code == 400 and 'finite' in response.get_json()['error']
+    for text in ('NaN', 'Infinity'):
+        response = client().post('/recommendations/batch', content_type='application/json',
+                                 data=f'{{"product_names": ["Blazer", "Kemeja"], "weights": [1.0, {text}]}}')
+        assert response.status_code == 400
+    assert post({'merge': 'sum'}).status_code == 400
+
+    assert len(post({'n': 10 ** 6}).get_json()['recommendations']) <= 100
+    assert len(post({'n': 0}).get_json()['recommendations']) == 1
+    missing = client().post('/recommendations/batch', json={'product_names': ['produk-yang-tidak-ada']})
+    assert missing.status_code == 404
+
+
+def test_name_index_keeps_first_match_semantics():
+    names = engine.df['nama_pakaian'].tolist()
+    queries = ['Blazer', 'kemeja', 'wanita - k', 'ri', 'a', 'PASTEL GREEN', 'tidak ada', names[17], names[17][5:12]]
+
+    for query in queries:
+        expected = next((i for i, name in enumerate(names) if query.lower() in name.lower()), None)
+        assert engine.name_index.lookup(query) == expected, query
+
+
+def test_name_index_best_match_prefers_exact_name():
+    names = engine.df['nama_pakaian'].tolist()
+    target = names[-1]
+
+    assert engine.name_index.lookup(target.upper(), first_match=False) == len(names) - 1
+    assert engine.name_index.lookup(f'  {target}!! ', first_match=False) == len(names) - 1
+
+
+def test_top_k_excludes_query_by_index_with_ties():
+    from similarity import top_k_indices
+
+    scores = [1.0, 0.2, 1.0, 1.0, 0.5]
+    assert top_k_indices(scores, 3, exclude=[2]).tolist() == [0, 3, 4]
+    assert top_k_indices(scores, 10, exclude=[0, 2, 3]).tolist() == [4, 1]
+
+
+def test_neighbor_table_matches_brute_force(tmp_path):
+    from neighbor_table import NeighborTable, build_neighbor_table, save_neighbor_table
+    from similarity import row_scores, top_k_indices
+
+    indices, scores = build_neighbor_table(engine.normalized_matrix, k=5, block_size=16)
+    save_neighbor_table(str(tmp_path), indices, scores)
+    table = NeighborTable.load(str(tmp_path))
+
+    for row in (0, 7, len(engine.df) - 1):
+        expected_scores = row_scores(engine.normalized_matrix, row)
+        expected = top_k_indices(expected_scores, 5, exclude=[row])
+        neighbor_indices, neighbor_scores = table.neighbors(row)
+        assert row not in neighbor_indices
+        assert neighbor_scores.round(6).tolist() == expected_scores[expected].round(6).tolist()
+
+
+def test_neighbor_table_rejected_for_a_different_catalog(tmp_path):
+    import numpy as np
+    import pandas as pd
+
+    import model_store
+    from neighbor_table import convert_dense_matrix, save_neighbor_table
+    from optimized_engine import OptimizedRecommendationEngine
+
+    catalog = tmp_path / 'data' / 'processed_products.csv'
+    catalog.parent.mkdir()
+    pd.DataFrame({'_id': ['a', 'b', 'c'], 'name': ['A', 'B', 'C'], 'category': ['x'] * 3,
+                  'price': [1, 2, 3]}).to_csv(catalog, index=False)
+    dense = np.array([[1.0, 0.9, 0.1], [0.9, 1.0, 0.2], [0.1, 0.2, 1.0]])
+    indices, scores = convert_dense_matrix(dense, k=2)
+    neighbors = tmp_path / 'models' / 'neighbors'
+    save_neighbor_table(str(neighbors), indices, scores, source_hash=model_store.file_hash(str(catalog)))
+
+    engine = OptimizedRecommendationEngine(model_path=str(tmp_path / 'models'))
+    assert engine.neighbor_table is not None
+    assert engine.get_recommendations('a', 1)[0]['productId'] == 'b'
+
+    save_neighbor_table(str(neighbors), indices, scores, source_hash='hash-of-another-catalog')
+    assert OptimizedRecommendationEngine(model_path=str(tmp_path / 'models')).neighbor_table is None
+    save_neighbor_table(str(neighbors), indices[:2], scores[:2])
+    assert OptimizedRecommendationEngine(model_path=str(tmp_path / 'models')).neighbor_table is None
+
+
+def test_parallel_neighbor_build_matches_serial():
+    from neighbor_table import build_neighbor_table, build_neighbor_table_parallel
+
+    serial = build_neighbor_table(engine.normalized_matrix, k=5, block_size=16)
+    parallel = build_neighbor_table_parallel(engine.normalized_matrix, k=5, block_size=16, workers=2)
+    assert (parallel[0] == serial[0]).all() and (parallel[1] == serial[1]).all()
+
+
+def test_model_bundle_roundtrip(tmp_path):
+    import model_store
+    from app import VECTORIZER_PARAMS
+
+    path = str(tmp_path / 'bundle')
+    model_store.save_bundle(path, engine.vectorizer, engine.tfidf_matrix, engine.df, 'hash-a', VECTORIZER_PARAMS)
+
+    assert model_store.load_bundle(path, 'hash-b', VECTORIZER_PARAMS) is None
+    assert model_store.load_bundle(path, 'hash-a', {**VECTORIZER_PARAMS, 'max_features': 10}) is None
+
+    bundle = model_store.load_bundle(path, 'hash-a', VECTORIZER_PARAMS)
+    assert (bundle['tfidf_matrix'] != engine.tfidf_matrix).nnz == 0
+    assert bundle['df']['nama_pakaian'].tolist() == engine.df['nama_pakaian'].tolist()
+
+    query = ['Blazer Wanita khaki']
+    assert (bundle['vectorizer'].transform(query) != engine.vectorizer.transform(query)).nnz == 0
+
+
+def test_incremental_changes_match_full_transform():
+    from app import ClothingRecommendationEngine
+
+    local = ClothingRecommendationEngine()
+    first_id = str(local.df['id'].iloc[0])
+    second_id = str(local.df['id'].iloc[1])
+    result = local.apply_product_changes(
+        upserts=[
+            {'id': first_id, 'nama_pakaian': 'Kemeja Pria Formal Putih', 'categories': 'men', 'type': 'topwear'},
+            {'id': 'new-1', 'nama_pakaian': 'Blazer Wanita Khaki Crop', 'categories': 'women', 'type': 'topwear'},
+        ],
+        deletes=[second_id]
+    )
+
+    assert result == {'updated': 1, 'added': 1, 'deleted': 1, 'vocab_drift': result['vocab_drift'], 'refit': False}
+    assert len(local.df) == len(engine.df)
+    assert local.df['nama_pakaian'].iloc[0] == 'Kemeja Pria Formal Putih'
+    assert local.df['nama_pakaian'].iloc[-1] == 'Blazer Wanita Khaki Crop'
+
+    expected = local.vectorizer.transform([local.product_text(row) for _, row in local.df.iterrows()])
+    assert abs(local.tfidf_matrix - expected).max() < 1e-12
+    assert local.find_product('Blazer Wanita Khaki Crop')[0] == len(local.df) - 1
+    assert local.get_recommendations_by_product_name('Kemeja Pria Formal Putih')['total'] == 5
+
+
+
+def test_incremental_update_after_warm_start_matches_string_ids(tmp_path, monkeypatch):
+    import app as app_module
+    from app import ClothingRecommendationEngine
+
+    catalog = engine.df[['nama_pakaian', 'categories', 'type']].head(40).copy()
+    catalog.insert(0, 'id', [f'{position:03d}' for position in range(len(catalog))])
+    catalog.to_csv(tmp_path / 'catalog.csv', sep=';', index=False)
+    monkeypatch.setenv('CATALOG_CSV', str(tmp_path / 'catalog.csv'))
+    monkeypatch.setattr(app_module, 'MODEL_BUNDLE_DIR', str(tmp_path / 'bundle'))
+
+    cold = ClothingRecommendationEngine()
+    warm = ClothingRecommendationEngine()
+    assert cold.startup['mode'] == 'cold' and warm.startup['mode'] == 'warm'
+    assert warm.df['id'].tolist() == cold.df['id'].tolist() == catalog['id'].tolist()
+
+    result = warm.apply_product_changes(
+        upserts=[{'id': '007', 'nama_pakaian': 'Kemeja Pria Formal Putih', 'categories': 'men', 'type': 'topwear'}],
+        deletes=['012']
+    )
+    assert {key: result[key] for key in ('updated', 'added', 'deleted')} == {'updated': 1, 'added': 0, 'deleted': 1}
+    assert warm.df.loc[warm.df['id'] == '007', 'nama_pakaian'].tolist() == ['Kemeja Pria Formal Putih']
+
+def test_incremental_changes_refit_on_vocabulary_drift():
+    from app import ClothingRecommendationEngine
+
+    local = ClothingRecommendationEngine()
+    result = local.apply_product_changes(upserts=[
+        {'id': 'new-2', 'nama_pakaian': 'Zxqv Wxyq Qqqz', 'categories': 'unisex', 'type': 'footwear'},
+    ])
+
+    assert result['refit'] is True
+    assert 'zxqv' in local.vectorizer.vocabulary_
+
+
+def test_reload_publishes_new_snapshot_without_mutating_old():
+    before = model_manager.current
+    response = client().post('/reload?wait=1')
+    after = model_manager.current
+
+    assert response.status_code == 200
+    assert response.get_json()['model_generation'] == after.generation == before.generation + 1
+    assert after is not before
+    assert before.get_recommendations_by_product_name('Blazer')['total'] == 5
+
+    health = client().get('/health').get_json()
+    assert health['model']['generation'] == after.generation
+
+    # Semua index sudah dibangun sebelum publish; request tidak mengganti atribut snapshot
+    state = dict(vars(after))
+    assert after.search_index is not None and after.term_names is not None
+    assert client().get('/search?q=blazer&category=women').status_code == 200
+    after.item_terms(0)
+    after.get_recommendations_by_category_type('women', 'topwear')
+    assert all(vars(after)[key] is value for key, value in state.items())
+
+
+def test_result_cache_hits_and_invalidates_on_new_generation():
+    from app import result_cache
+
+    result_cache.clear()
+    before = result_cache.stats()
+    first = client().post('/recommendations/similar', json={'product_name': 'Kemeja'}).get_json()
+    second = client().post('/recommendations/similar', json={'product_name': 'kemeja'}).get_json()
+    stats = client().get('/cache/stats').get_json()['cache']
+
+    assert first == second
+    assert stats['hits'] - before['hits'] == 1
+    assert stats['misses'] - before['misses'] == 1
+    assert stats['size'] == 1
+
+    client().post('/reload?wait=1')
+    assert client().get('/cache/stats').get_json()['cache']['size'] == 0
+
+
+def test_result_cache_lru_ttl_and_shared_backend():
+    from result_cache import LocalBackend, ResultCache
+
+    shared = LocalBackend()
+    cache = ResultCache(maxsize=2, ttl=60, backend=shared)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, {'value': key})
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('a') == {'value': 'a'}
+    assert cache.stats()['shared_hits'] == 1
+
+    expired = ResultCache(maxsize=2, ttl=0)
+    expired.set('a', {'value': 'a'})
+    assert expired.get('a') is None
+    assert expired.stats()['expirations'] == 1
+
+
+def test_category_type_browsing_filters_and_paginates():
+    df = engine.df
+    expected = [
+        name for name, category, product_type in zip(df['nama_pakaian'], df['categories'], df['type'])
+        if category.lower() == 'men' and product_type.lower() == 'bottomwear'
+    ]
+
+    first = client().get('/recommendations/category/Pria/type/bottomwear?limit=3').get_json()
+    second = client().get('/recommendations/category/men/type/BottomWear?offset=3&limit=3').get_json()
+
+    assert first['fallback'] is None
+    assert first['total_matches'] == len(expected)
+    assert [r['nama_pakaian'] for r in first['recommendations'] + second['recommendations']] == expected[:6]
+
+    missing_type = client().get('/recommendations/category/women/type/no-such-type').get_json()
+    assert missing_type['fallback'] == 'category'
+
+    ranked = engine.get_recommendations_by_category_type('women', 'topwear', n=50, rank='centrality')
+    assert ranked['total'] > 0
+    assert 'error' in engine.get_recommendations_by_category_type('women', 'topwear', rank='popularity')
+
+
+def test_asgi_mode_serves_flask_routes_and_rejects_overload():
+    import asyncio
+    import json
+    import threading
+
+    from asgi_app import AsgiService
+
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        return app(environ, start_response)
+
+    async def call(service, method, path, body=b''):
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+                 'headers': [(b'content-type', b'application/json')]}
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        await service(scope, receive, send)
+        headers = dict(sent[0]['headers'])
+        return sent[0]['status'], headers, json.loads(sent[1]['body'])
+
+    async def scenario():
+        status, _, data = await call(AsgiService(app, threads=2), 'POST', '/recommendations/similar',
+                                     json.dumps({'product_name': 'Blazer'}).encode())
+        assert status == 200 and data['success'] is True
+
+        busy = AsgiService(slow_app, threads=1, max_queue=0, retry_after=3)
+        first = asyncio.ensure_future(call(busy, 'GET', '/health'))
+        await asyncio.sleep(0.05)
+        status, headers, _ = await call(busy, 'GET', '/health')
+        assert status == 429 and headers[b'retry-after'] == b'3'
+        release.set()
+        assert (await first)[0] == 200
+        assert busy.stats()['rejected'] == 1 and busy.stats()['completed'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_asgi_streams_sync_body_and_aborts_on_disconnect(tmp_path, monkeypatch):
+    import asyncio
+    import json
+    import tempfile
+
+    from asgi_app import AsgiService
+
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    product = json.dumps({'nama_pakaian': 'Blazer', 'categories': 'women', 'type': 'topwear'}).encode()
+
+    async def call(service, path, messages):
+        scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'headers': []}
+        pending, sent = list(messages), []
+
+        async def receive():
+            return pending.pop(0) if pending else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        await service(scope, receive, send)
+        return sent
+
+    def chunks(*bodies, disconnect=False):
+        messages = [{'type': 'http.request', 'body': body, 'more_body': True} for body in bodies]
+        if disconnect:
+            return messages + [{'type': 'http.disconnect'}]
+        return messages + [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def scenario():
+        service = AsgiService(app, threads=1, max_body=16)
+        # Body streaming melewati ASGI_MAX_BODY dan dibaca per message sampai baris ke-3 yang rusak
+        lines = chunks(product + b'\n', product + b'\n', b'{"nama_pakaian": "x"}')
+        sent = await call(service, '/sync/products/stream', lines)
+        assert sent[0]['status'] == 400 and 'Line 3' in json.loads(sent[1]['body'])['error']
+
+        generation = model_manager.generation
+        assert await call(service, '/sync/products/stream', chunks(product + b'\n', disconnect=True)) == []
+        assert await call(service, '/recommendations/similar', chunks(b'{"product', disconnect=True)) == []
+        assert service.stats()['disconnected'] == 2 and model_manager.generation == generation
+        assert list(tmp_path.iterdir()) == []
+
+        sent = await call(service, '/recommendations/similar', chunks(b'{"product_name": "Blazer"}'))
+        assert sent[0]['status'] == 413
+
+    asyncio.run(scenario())
+
+
+def test_micro_batcher_coalesces_similar_queries(monkeypatch):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    import numpy as np
+
+    from app import score_similar_batch
+    from batcher import MicroBatcher
+
+    batcher = MicroBatcher(score_similar_batch, max_wait_ms=50, max_batch_size=8)
+    names = list(engine.df['nama_pakaian'][:8])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batched = list(pool.map(
+            lambda name: engine.get_recommendations_by_product_name(name, first_match=False, batcher=batcher), names
+        ))
+
+    for name, result in zip(names, batched):
+        assert result == engine.get_recommendations_by_product_name(name, first_match=False)
+
+    stats = batcher.stats()
+    assert stats['items'] == 8
+    assert stats['batches'] < 8
+    assert sum(stats['histogram'].values()) == stats['batches']
+
+    # Request yang datang sendirian tidak menunggu max_wait
+    idle = MicroBatcher(score_similar_batch, max_wait_ms=5000, max_batch_size=8)
+    start = time.perf_counter()
+    idle.submit((engine, 3, 5))
+    assert time.perf_counter() - start < 1.0
+
+    # Jalur sparse dan dense rows_top_k sama dengan top-k per baris, termasuk n > jumlah tetangga positif
+    import similarity
+    rows = list(range(0, len(engine.df), 7))
+    ns = [(5, 20, len(engine.df))[position % 3] for position in range(len(rows))]
+    for ratio in (0, 10 ** 9):
+        monkeypatch.setattr(similarity, 'SPARSE_WORK_RATIO', ratio)
+        monkeypatch.setattr(similarity, 'DENSE_BATCH_CELLS', len(engine.df) * 3)
+        for row, n, (indices, scores) in zip(rows, ns, engine.score_similar_rows(rows, ns)):
+            dense = similarity.row_scores(engine.normalized_matrix, row)
+            assert indices.tolist() == similarity.top_k_indices(dense, n, exclude=[row]).tolist()
+            assert np.allclose(scores, dense[indices])
+
+
+def test_shared_snapshot_is_mmapped_and_matches_engine(tmp_path):
+    import numpy as np
+
+    from app import ClothingRecommendationEngine, VECTORIZER_PARAMS
+    from model_manager import ModelManager
+    from shared_model import SharedModelStore, read_current
+
+    store = SharedModelStore(str(tmp_path), ClothingRecommendationEngine.from_snapshot,
+                             params=VECTORIZER_PARAMS, neighbors_k=10)
+    shared = store.share(engine)
+
+    generation = engine.generation + 1
+    assert read_current(str(tmp_path)) == (f'snapshot-{generation:06d}', generation)
+    assert isinstance(shared.neighbor_table.indices, np.memmap)
+    assert isinstance(shared.name_index.ngrams['bla'], np.memmap)
+    assert (shared.normalized_matrix != engine.normalized_matrix).nnz == 0
+    for name in ('Blazer', 'Kemeja', 'Kaos'):
+        expected = engine.get_recommendations_by_product_name(name)
+        result = shared.get_recommendations_by_product_name(name)
+        assert [r['nama_pakaian'] for r in result['recommendations']] == \
+            [r['nama_pakaian'] for r in expected['recommendations']]
+        assert shared.find_product(name, first_match=False) == engine.find_product(name, first_match=False)
+    exact_name = engine.df['nama_pakaian'].iloc[5]
+    assert shared.find_product(exact_name.upper() + '!!', first_match=False)[0] == \
+        engine.find_product(exact_name.upper() + '!!', first_match=False)[0]
+    for rank in ('catalog', 'centrality'):
+        assert shared.get_recommendations_by_category_type('kids', 'topwear', n=20, rank=rank) == \
+            engine.get_recommendations_by_category_type('kids', 'topwear', n=20, rank=rank)
+    assert shared.search('blazer', category='women')['results'] == engine.search('blazer', category='women')['results']
+
+    # Serving tidak membuat DataFrame / dict per produk di worker: semuanya slice mmap
+    assert shared._df is None and shared.num_products == engine.num_products
+    assert isinstance(shared.name_index.exact.hashes, np.memmap)
+    assert not shared.transposed_matrix.indices.flags.writeable and shared.search_index.indptr is shared.transposed_matrix.indptr
+    assert isinstance(shared.group_index.groups[('women', 'topwear')], np.memmap)
+    assert shared.df['nama_pakaian'].tolist() == engine.df['nama_pakaian'].tolist()
+
+    # Snapshot dari "worker lain" membawa generation-nya sendiri ke manager ini
+    manager = ModelManager(shared, store=store)
+    store.share(engine.clone())
+    manager.submit('shared', lambda current: (store.load(), None), wait=True, store=False)
+    assert manager.generation == manager.current.generation == generation + 1
+    assert manager.status()['shared']['current'] == f'snapshot-{generation + 1:06d}'
+
+    # Incremental sync: snapshot tanpa neighbor table, /similar lewat row_scores dengan hasil sama
+    incremental, _ = manager.submit('changes', lambda current: (engine.clone(), None), wait=True, incremental=True)
+    assert incremental.neighbor_table is None and manager.current is incremental
+    for name in ('Blazer', 'Kemeja'):
+        assert [r['nama_pakaian'] for r in incremental.get_recommendations_by_product_name(name)['recommendations']] == \
+            [r['nama_pakaian'] for r in engine.get_recommendations_by_product_name(name)['recommendations']]
+
+
+
+def test_shared_snapshot_prune_keeps_recent_and_load_retries_from_current(tmp_path):
+    import os
+
+    import shared_model
+    from app import ClothingRecommendationEngine, VECTORIZER_PARAMS
+    from shared_model import SharedModelStore, read_current
+
+    store = SharedModelStore(str(tmp_path), ClothingRecommendationEngine.from_snapshot,
+                             params=VECTORIZER_PARAMS, neighbors_k=0, keep=1)
+    for _ in range(3):
+        store.share(engine)
+    snapshots = sorted(entry for entry in os.listdir(tmp_path) if entry.startswith('snapshot-'))
+    assert len(snapshots) == 3  # digantikan < grace detik lalu: belum dihapus
+
+    # Worker yang membaca CURRENT lama lalu file-nya di-prune: baca ulang CURRENT
+    shared_model._prune(str(tmp_path), keep=1, grace=0)
+    assert sorted(entry for entry in os.listdir(tmp_path) if entry.startswith('snapshot-')) == snapshots[1:]
+    loaded = store.load(snapshots[0], backoff=0)
+    assert loaded.generation == read_current(str(tmp_path))[1] and loaded.num_products == engine.num_products
+
+def test_ann_index_full_probe_matches_exact_and_persists(tmp_path):
+    from ann_index import IVFIndex, matrix_fingerprint
+    from similarity import row_scores, top_k_indices
+
+    index = IVFIndex.build(engine.normalized_matrix, n_lists=8, dim=16)
+    full_space = IVFIndex.build(engine.normalized_matrix, n_lists=8)
+    assert index.offsets[-1] == full_space.offsets[-1] == len(engine.df)
+    assert full_space.components is None
+
+    for row in (0, 5, 42):
+        full_indices, _ = full_space.search_row(engine.normalized_matrix, row, 5, nprobe=8, exclude=[row])
+        indices, scores = index.search_row(engine.normalized_matrix, row, 5, nprobe=index.lists, exclude=[row])
+        expected_scores = row_scores(engine.normalized_matrix, row)
+        assert indices.tolist() == full_indices.tolist() == top_k_indices(expected_scores, 5, exclude=[row]).tolist()
+        assert scores.round(9).tolist() == expected_scores[indices].round(9).tolist()
+
+    index.save(str(tmp_path))
+    loaded = IVFIndex.load(str(tmp_path), fingerprint=matrix_fingerprint(engine.normalized_matrix))
+    assert loaded.lists == 8 and loaded.items.tolist() == index.items.tolist()
+    assert IVFIndex.load(str(tmp_path), fingerprint='other-matrix') is None
+
+
+
+def test_shared_snapshot_ships_ann_index_and_changes_mark_it_stale(tmp_path, monkeypatch):
+    import pytest
+
+    import app as app_module
+    from ann_index import IVFIndex
+    from app import ClothingRecommendationEngine, VECTORIZER_PARAMS
+    from shared_model import SharedModelStore
+
+    built = engine.clone()
+    built.ann_index = IVFIndex.build(engine.normalized_matrix, n_lists=8)
+    monkeypatch.setattr(app_module, 'SIMILARITY_MODE', 'ann')
+    monkeypatch.setattr(IVFIndex, 'build', classmethod(lambda cls, *args, **kwargs: pytest.fail('IVF rebuilt')))
+
+    store = SharedModelStore(str(tmp_path), ClothingRecommendationEngine.from_snapshot,
+                             params=VECTORIZER_PARAMS, neighbors_k=0)
+    shared = store.share(built)
+    assert shared.ann_index.items.tolist() == built.ann_index.items.tolist()
+    assert shared.ann_index.meta['fingerprint'] == built.ann_index.meta['fingerprint']
+
+    result = built.apply_product_changes(upserts=[
+        {'id': str(engine.df['id'].iloc[0]), 'nama_pakaian': 'Kemeja Pria Formal Putih', 'categories': 'men',
+         'type': 'topwear'}
+    ])
+    assert result['refit'] is False and built.ann_index is None
+    assert store.share(built, neighbors=False).ann_index is None
+
+def test_search_index_matches_brute_force_with_filters():
+    import numpy as np
+    from search_index import SearchIndex
+    from similarity import top_k_indices
+
+    index = SearchIndex(engine.normalized_matrix)
+    for query in ('blazer', 'kemeja putih formal', 'celana jeans pria', 'dress'):
+        query_vector = engine.vectorizer.transform([query])
+        expected = np.asarray((engine.normalized_matrix @ query_vector.T).todense()).ravel()
+        for category, product_type in ((None, None), ('women', None), ('men', 'bottomwear'), (None, 'topwear')):
+            allowed = engine.group_index.filter_positions(category, product_type)
+            masked = expected.copy()
+            if allowed is not None:
+                masked[np.setdiff1d(np.arange(len(masked)), allowed)] = 0
+            indices, scores, _ = index.search(query_vector, k=5, allowed=allowed)
+            top = [i for i in top_k_indices(masked, 5).tolist() if masked[i] > 0]
+            assert indices.tolist() == top
+            assert scores.round(9).tolist() == masked[top].round(9).tolist()
+
+    response = client().get('/search?q=blazer&limit=3&category=women')
+    data = response.get_json()
+    assert response.status_code == 200 and data['total'] <= 3
+    assert client().get('/search').status_code == 400
+
+    # Cache filter dipakai bersamaan dari banyak thread dengan eviction
+    from concurrent.futures import ThreadPoolExecutor
+    keys = [(('women',), str(key % 12)) for key in range(400)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        arrays = list(pool.map(lambda key: index.allowed(key, lambda: [int(key[1])], max_entries=8), keys))
+    assert [array.tolist() for array in arrays] == [[int(key[1])] for key in keys]
+    assert len(index.filters) <= 8
+
+
+def test_streaming_build_matches_full_fit_and_ndjson_sync(tmp_path, monkeypatch):
+    import json
+    import tempfile
+
+    import numpy as np
+    import pandas as pd
+    import streaming_ingest
+    from app import VECTORIZER_PARAMS
+
+    current = model_manager.current
+    df, vectorizer, matrix, stats = streaming_ingest.build_from_chunks(
+        lambda: streaming_ingest.csv_chunks(current.source_path, 7), VECTORIZER_PARAMS
+    )
+    assert stats['chunks'] > 1 and len(df) == len(current.df)
+    # Hanya kolom serving yang disimpan (kolom lain dibuang), isi dan dtype sama dengan read_csv penuh
+    full = pd.read_csv(current.source_path, sep=';', dtype={'id': str}).assign(tags='extra')
+    full.to_csv(tmp_path / 'catalog.csv', sep=';', index=False)
+    served, _, _, _ = streaming_ingest.build_from_chunks(
+        lambda: streaming_ingest.csv_chunks(str(tmp_path / 'catalog.csv'), 7), VECTORIZER_PARAMS
+    )
+    assert list(served.columns) == [name for name in streaming_ingest.SERVING_COLUMNS if name in full.columns]
+    assert served.equals(full[list(served.columns)])
+    (tmp_path / 'catalog.csv').unlink()
+    assert vectorizer.vocabulary_ == current.vectorizer.vocabulary_
+    assert abs(matrix - current.tfidf_matrix).max() < 1e-9
+    query = vectorizer.transform(['blazer wanita navy']) - current.vectorizer.transform(['blazer wanita navy'])
+    assert abs(query).max() == 0
+
+    body = '\n'.join(json.dumps(product) for product in current.df.to_dict(orient='records'))
+    response = client().post('/sync/products/stream?wait=1', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200 and response.get_json()['total_products'] == len(current.df)
+    assert np.allclose(model_manager.current.normalized_matrix.toarray(), current.normalized_matrix.toarray())
+
+    bad = client().post('/sync/products/stream', data='{"nama_pakaian": "x"}\n', content_type='application/x-ndjson')
+    assert bad.status_code == 400 and 'Line 1' in bad.get_json()['error']
+
+    # File spool selalu dihapus: setelah build, setelah validasi gagal, dan saat spool error
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    assert client().post('/sync/products/stream?wait=1', data=body).status_code == 200
+    assert client().post('/sync/products/stream', data='{"nama_pakaian": "x"}\n').status_code == 400
+
+    def broken_spool(stream, path):
+        raise OSError('disk full')
+    monkeypatch.setattr(streaming_ingest, 'spool_ndjson', broken_spool)
+    assert client().post('/sync/products/stream', data=body).status_code == 500
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_copurchase_table_and_hybrid_blend(tmp_path, monkeypatch):
+    import json
+    import app as app_module
+    from copurchase import CoPurchaseModel
+
+    names = model_manager.current.df['nama_pakaian'].tolist()
+    orders = [
+        {'items': [{'name': names[0]}, {'name': names[1]}, {'name': names[2]}]},
+        {'items': [{'name': names[0]}, {'name': names[1]}, {'name': names[0]}]},
+        {'items': [{'name': names[0]}, {'name': names[3]}], 'paymentStatus': 'failed'},
+        {'items': [{'name': names[2]}]}
+    ]
+    model = CoPurchaseModel.build(orders, k=5)
+    assert model.meta['orders'] == 3 and model.counts.tolist() == [2, 2, 2]
+    assert [name for name, _, _ in model.neighbors_of(names[0].upper())] == [names[1], names[2]]
+    assert model.neighbors_of(names[0])[0][2] == 2 and model.neighbors_of(names[3]) == []
+
+    monkeypatch.setattr(app_module, 'COPURCHASE_DIR', str(tmp_path))
+    body = '\n'.join(json.dumps(order) for order in orders)
+    assert client().post('/copurchase/orders', data=body).get_json()['copurchase']['pairs'] == 3
+
+    response = client().post('/recommendations/bought-together', json={'product_names': [names[0]], 'n': 4})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['recommendations'][0]['nama_pakaian'] == names[1]
+    assert data['recommendations'][0]['source'] == 'copurchase'
+    assert names[0] not in [rec['nama_pakaian'] for rec in data['recommendations']]
+
+    content_only = client().post('/recommendations/bought-together',
+                                 json={'product_names': [names[0]], 'n': 4, 'alpha': 0}).get_json()
+    similar = model_manager.current.get_recommendations_by_product_name(names[0], n=4, first_match=False)
+    assert [rec['nama_pakaian'] for rec in content_only['recommendations']] == \
+        [rec['nama_pakaian'] for rec in similar['recommendations']]
+
+
+def test_user_profile_events_and_recommendations(tmp_path):
+    import numpy as np
+    from user_profiles import UserProfileStore
+    from similarity import top_k_indices
+
+    current = model_manager.current
+    names = current.df['nama_pakaian'].tolist()
+    response = client().post('/events', json={'user_id': 'u-1', 'events': [
+        {'type': 'purchase', 'product_name': names[0], 'timestamp': 1700000000000},
+        {'type': 'view', 'product_name': names[5], 'timestamp': 1700000000},
+        {'type': 'view', 'product_name': 'produk-yang-tidak-ada'}
+    ]})
+    assert response.get_json()['recorded'] == 2 and response.get_json()['not_found'] == ['produk-yang-tidak-ada']
+
+    data = client().get('/recommendations/user/u-1?limit=5').get_json()
+    assert data['success'] is True and data['excluded_purchased'] == 1
+    first = current.find_product(names[0], first_match=False)[0]
+    fifth = current.find_product(names[5], first_match=False)[0]
+    profile = current.normalized_matrix[first].toarray().ravel() + 0.2 * current.normalized_matrix[fifth].toarray().ravel()
+    expected = top_k_indices(current.normalized_matrix @ (profile / np.linalg.norm(profile)), 5, exclude=[first])
+    assert [rec['nama_pakaian'] for rec in data['recommendations']] == current.df['nama_pakaian'].iloc[expected].tolist()
+    assert client().get('/recommendations/user/unknown').status_code == 404
+
+    # Half-life decay, LRU eviction dan persistence lintas instance (worker lain)
+    store = UserProfileStore(maxsize=1, half_life_days=1, path=str(tmp_path / 'profiles.db'))
+    store.add_events('a', [({'blazer': 1.0}, 1.0, 0.0, 'Blazer')])
+    store.add_events('a', [({'kemeja': 1.0}, 1.0, 86400.0, None)])
+    store.add_events('b', [({'dress': 1.0}, 1.0, 0.0, None)])
+    assert store.stats()['evictions'] == 1
+    other = UserProfileStore(path=str(tmp_path / 'profiles.db'))
+    assert other.get('a')['terms'] == {'blazer': 0.5, 'kemeja': 1.0} and other.get('a')['purchased'] == ['blazer']
+    other.add_events('a', [({'dress': 1.0}, 1.0, 86400.0, None)])
+    assert store.get('a')['terms']['dress'] == 1.0
+
+
+def test_metrics_endpoint_and_sampling_profiler(monkeypatch):
+    import threading
+    import time
+
+    import app as service
+    from metrics import MetricsRegistry
+    from sampling_profiler import SamplingProfiler
+
+    name = model_manager.current.df['nama_pakaian'].iloc[0]
+    client().post('/recommendations/similar', json={'product_name': name, 'match': 'best'})
+    client().get('/recommendations/user/no-such-user')
+    text = client().get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="POST",route="/recommendations/similar",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/recommendations/user/<user_id>",status="404"}' in text
+    assert 'recommendation_stage_seconds_count{endpoint="similar",stage="lookup"}' in text
+    assert f'model_rows {len(model_manager.current.df)}' in text
+    assert 'model_build_seconds_count{reason="startup"} 1' in text
+    assert '# TYPE result_cache_hits_total counter' in text
+    assert client().get('/health').get_json()['timestamp'] != '2025-01-24 12:30:00'
+
+    # Histogram kumulatif, label di-escape
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe('latency', {'route': 'a"b'}, 0.05)
+    registry.observe('latency', {'route': 'a"b'}, 5.0)
+    rendered = registry.render()
+    assert 'latency_bucket{route="a\\"b",le="0.1"} 1' in rendered
+    assert 'latency_bucket{route="a\\"b",le="1.0"} 1' in rendered
+    assert 'latency_bucket{route="a\\"b",le="+Inf"} 2' in rendered
+
+    assert client().get('/debug/profiler').status_code == 404
+    monkeypatch.setattr(service, 'PROFILER_ENABLED', True)
+    monkeypatch.setattr(service, 'profiler', SamplingProfiler())
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+
+    busy = threading.Thread(target=spin, name='busy-worker')
+    busy.start()
+    try:
+        assert client().post('/debug/profiler', json={'action': 'start', 'interval_ms': 1}).status_code == 200
+        assert client().post('/debug/profiler', json={'action': 'start'}).status_code == 409
+        time.sleep(0.1)
+        status = client().post('/debug/profiler', json={'action': 'stop'}).get_json()['profiler']
+    finally:
+        stop.set()
+        busy.join()
+    assert status['running'] is False and status['samples'] > 0
+    folded = client().get('/debug/profiler?format=folded').get_data(as_text=True)
+    assert any(line.startswith('busy-worker;') for line in folded.splitlines())
+
+
+def test_staged_startup_serves_health_before_model_is_ready(monkeypatch):
+    import threading
+
+    import pytest
+
+    import app as service
+    from model_manager import ModelManager
+
+    release = threading.Event()
+    starting = ModelManager()
+    future = starting.start(lambda: release.wait(5) and engine)
+    monkeypatch.setattr(service, 'model_manager', starting)
+
+    assert starting.state == 'starting' and starting.current is None
+    assert client().get('/health').get_json()['status'] == 'starting'
+    assert client().get('/').status_code == 200
+    assert client().get('/health/ready').status_code == 503
+    response = client().post('/recommendations/similar', json={'product_name': 'Kemeja'})
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+
+    release.set()
+    assert starting.wait_ready(timeout=5) is engine and future.done()
+    assert starting.state == 'ready' and starting.startup == engine.startup
+    assert client().get('/health/ready').get_json()['ready'] is True
+    assert client().post('/recommendations/similar', json={'product_name': 'Kemeja'}).status_code == 200
+
+    failing = ModelManager()
+    failing.start(lambda: 1 / 0, retry_delay=0)
+    with pytest.raises(ZeroDivisionError):
+        failing.wait_ready(timeout=5)
+    assert failing.state == 'failed'
+
+    # Startup gagal diulang dengan backoff sampai berhasil
+    attempts = []
+    retrying = ModelManager()
+    retrying.start(lambda: engine if attempts.append(1) or len(attempts) > 2 else 1 / 0, retry_delay=0.01)
+    assert retrying.ready.wait(5) and retrying.current is engine
+    assert retrying.state == 'ready' and retrying.startup_error is None and retrying.startup_attempts == 3
+
+
+def test_product_store_matches_dataframe_rows(tmp_path):
+    import numpy as np
+
+    from product_store import ProductStore
+
+    df = engine.df
+    store = ProductStore.from_frame(df)
+    indices = np.random.default_rng(0).integers(0, len(df), 25)
+    expected = [{column: df.iloc[idx][column] for column in ('nama_pakaian', 'categories', 'type')} for idx in indices]
+    assert store.rows(indices) == expected
+    assert store.category_codes.dtype == np.uint8 and store.nbytes < df.memory_usage(deep=True).sum()
+
+    store.save(str(tmp_path / 'products'))
+    loaded = ProductStore.load(str(tmp_path / 'products'))
+    assert isinstance(loaded.name_blob, np.memmap) and loaded.rows(indices) == expected
+    assert ProductStore.from_columns(['Kaos ñ', None], ['men', float('nan')], ['topwear', 'topwear']).rows([0, 1]) == [
+        {'nama_pakaian': 'Kaos ñ', 'categories': 'men', 'type': 'topwear'},
+        {'nama_pakaian': '', 'categories': '', 'type': 'topwear'}
+    ]
+
+
+def test_rendered_json_responses_match_dict_results():
+    import gzip
+    import json
+
+    import json_render
+
+    current = model_manager.current
+    name = current.df['nama_pakaian'].iloc[3]
+    expected = current.get_recommendations_by_product_name(name, first_match=False)
+    rendered = current.get_recommendations_by_product_name(name, first_match=False, render=True)
+    assert isinstance(rendered['recommendations'], json_render.RawJSON)
+    assert json.loads(json_render.dumps(rendered)) == expected
+
+    response = client().post('/recommendations/similar', json={'product_name': name, 'match': 'best'})
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.get_json() == {'success': True, **expected, 'model_generation': current.generation}
+
+    url = '/recommendations/category/women/type/topwear?limit=50'
+    plain = client().get(url)
+    compressed = client().get(url, headers={'Accept-Encoding': 'gzip, br;q=0'})
+    assert compressed.headers['Content-Encoding'] == 'gzip' and compressed.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    assert plain.get_json()['recommendations'] == current.get_recommendations_by_category_type(
+        'women', 'topwear', n=50)['recommendations']
+    assert 'Content-Encoding' not in client().get(url, headers={'Accept-Encoding': 'identity'}).headers
+
+
+def test_text_features_match_row_texts_with_field_weights():
+    import numpy as np
+    import pytest
+
+    import text_features
+
+    df = engine.df.head(50).copy()
+    df.loc[df.index[1], 'categories'] = np.nan
+    expected = [f"{row['nama_pakaian']} {row['categories']} {row['type']}" for _, row in df.iterrows()]
+    assert text_features.product_texts(df) == expected
+    assert text_features.product_texts(df.to_dict('records')) == expected
+
+    weights = text_features.parse_weights('type=2, categories=0')
+    row = df.iloc[0]
+    assert text_features.product_texts(df, weights)[0] == f"{row['nama_pakaian']} {row['type']} {row['type']}"
+    assert text_features.product_text(row, weights) == text_features.product_texts(df, weights)[0]
+    assert text_features.weights_key(text_features.parse_weights('')) == ''
+    with pytest.raises(ValueError):
+        text_features.parse_weights('price=2')
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import app
+import fallback_tfidf
+from similarity import l2_normalize_rows, row_scores, top_k_indices
+
+sklearn_text = pytest.importorskip('sklearn.feature_extraction.text')
+
+
+def catalog_texts():
+    engine = app.model_manager.wait_ready()
+    return [engine.product_text(row) for _, row in engine.df.iterrows()]
+
+
+def test_fallback_vectorizer_matches_sklearn():
+    texts = catalog_texts()
+    reference = sklearn_text.TfidfVectorizer(**app.VECTORIZER_PARAMS)
+    expected = reference.fit_transform(texts).toarray()
+
+    fallback = fallback_tfidf.TfidfVectorizer(**app.VECTORIZER_PARAMS)
+    rows = fallback.fit_transform(texts)
+
+    assert fallback.vocabulary_ == reference.vocabulary_
+    assert np.allclose(np.asarray(fallback.idf_), reference.idf_)
+
+    dense = np.zeros_like(expected)
+    for position, row in enumerate(rows):
+        for column, weight in row.items():
+            dense[position, column] = weight
+    assert np.allclose(dense, expected)
+
+
+def test_fallback_rankings_match_sklearn_path():
+    texts = catalog_texts()
+    normalized = l2_normalize_rows(sklearn_text.TfidfVectorizer(**app.VECTORIZER_PARAMS).fit_transform(texts))
+
+    rows = fallback_tfidf.TfidfVectorizer(**app.VECTORIZER_PARAMS).fit_transform(texts)
+    index = fallback_tfidf.InvertedIndex(rows)
+
+    for position in range(len(texts)):
+        scores = index.score(rows[position])
+        actual = fallback_tfidf.top_k(scores, 5, len(texts), exclude=[position])
+
+        expected_scores = row_scores(normalized, position)
+        expected = top_k_indices(expected_scores, 5, exclude=[position]).tolist()
+
+        assert np.allclose([scores.get(i, 0.0) for i in actual], expected_scores[expected]), position
+        assert actual == expected, position
+
+
+def test_engine_fallback_mode_serves_recommendations(monkeypatch):
+    monkeypatch.setattr(app, 'ML_AVAILABLE', False)
+    engine = app.ClothingRecommendationEngine()
+
+    assert isinstance(engine.df, list)
+    result = engine.get_recommendations_by_product_name('Blazer')
+    assert result['total'] == 5
+    assert result['recommendations'][0]['similarity_score'] > 0
+
+    batch = engine.get_recommendations_batch(['Blazer', 'Kemeja'], n=4)
+    assert batch['total'] == 4
+    assert engine.get_recommendations_by_category_type('men', 'bottomwear')['total'] > 0
+
+
+def test_fallback_search_returns_only_matching_products(monkeypatch):
+    ml_engine = app.model_manager.wait_ready()
+    expected = ml_engine.search('blazer', n=10)
+
+    monkeypatch.setattr(app, 'ML_AVAILABLE', False)
+    engine = app.ClothingRecommendationEngine()
+    monkeypatch.setattr(app.model_manager, 'current', engine)
+    response = app.app.test_client().get('/search?q=blazer&limit=10')
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert 0 < data['total'] <= 10
+    assert all(result['similarity_score'] > 0 for result in data['results'])
+    assert [r['nama_pakaian'] for r in data['results']] == [r['nama_pakaian'] for r in expected['results']]
+    assert app.app.test_client().get('/search?q=zzzqqq').get_json()['total'] == 0
@@ -0,0 +1,70 @@
+"""
+Text TF-IDF per produk dari kolom nama_pakaian, categories dan type.
+
+Bobot per field (TEXT_FIELD_WEIGHTS, mis. "nama_pakaian=1,categories=1,type=2") diterapkan
+dengan mengulang text field itu, jadi term frequency token-nya ikut dikali; bobot 0
+menghilangkan field dari text. Default semua 1 = text lama "nama categories type".
+
+    product_text(product, weights)   satu produk (dict / Series), untuk incremental sync
+    product_texts(frame, weights)    seluruh DataFrame / list dict, concat per kolom
+"""
+
+FIELDS = ('nama_pakaian', 'categories', 'type')
+DEFAULT_WEIGHTS = {field: 1 for field in FIELDS}
+
+
+def parse_weights(spec):
+    """'type=2,nama_pakaian=1' -> {'nama_pakaian': 1, 'categories': 1, 'type': 2}; field lain tetap 1"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        field, _, value = part.partition('=')
+        field = field.strip()
+        if field not in weights:
+            raise ValueError(f'Unknown text field "{field}" (expected one of {", ".join(FIELDS)})')
+        weights[field] = int(value)
+        if weights[field] < 0:
+            raise ValueError(f'Weight for "{field}" must be >= 0')
+    if not any(weights.values()):
+        raise ValueError('At least one text field needs a weight > 0')
+    return weights
+
+
+def weights_key(weights):
+    """'' untuk bobot default, selain itu ':nama_pakaian=1,categories=1,type=2' (untuk key bundle)"""
+    if weights == DEFAULT_WEIGHTS:
+        return ''
+    return ':' + ','.join(f'{field}={weights[field]}' for field in FIELDS)
+
+
+def _repeated(weights):
+    """Urutan field di text, field dengan bobot w muncul w kali"""
+    return [field for field in FIELDS for _ in range(weights.get(field, 1))]
+
+
+def product_text(product, weights=DEFAULT_WEIGHTS):
+    return ' '.join(f'{product[field]}' for field in _repeated(weights))
+
+
+def _field_text(column):
+    """Kolom -> array object str; nilai kosong jadi str(nilai) ('nan', 'None') seperti f-string"""
+    text = column.astype(str)
+    missing = text.isna()
+    if missing.any():
+        text = text.astype(object)
+        text[missing] = [str(value) for value in column[missing]]
+    return text.to_numpy(dtype=object)
+
+
+def product_texts(frame, weights=DEFAULT_WEIGHTS):
+    """Text per baris; DataFrame digabung per kolom (tanpa iterrows), list dict per item"""
+    if isinstance(frame, list):
+        return [product_text(product, weights) for product in frame]
+    columns = {field: _field_text(frame[field]) for field in FIELDS if weights.get(field, 1)}
+    fields = _repeated(weights)
+    text = columns[fields[0]]
+    for field in fields[1:]:
+        text = text + ' ' + columns[field]
+    return text.tolist()
+
@@ -0,0 +1,164 @@
+"""
+Profil TF-IDF per user untuk /recommendations/user/<id>.
+
+Profil = jumlah vektor TF-IDF item yang dibeli / dimasukkan cart / dilihat user,
+diberi bobot per jenis event dan recency decay eksponensial (half-life):
+
+    profil(t) = sum_i bobot_i * 0.5 ** ((t - t_i) / half_life) * vektor_i
+
+Disimpan incremental relatif ke waktu event terakhir (`updated_at`): event baru
+cukup mengalikan profil dengan faktor decay lalu menambah vektornya, tanpa
+menyimpan riwayat event. Profil disimpan per term (bukan kolom), jadi tetap valid
+setelah vocabulary berubah karena refit / reload.
+
+Store-nya LRU in-process (USER_PROFILE_CACHE_SIZE). Dengan `path` (USER_PROFILE_DB)
+profil juga ditulis ke SQLite: update dikerjakan read-modify-write dalam satu
+transaksi dan versi di cache dicek ulang saat dibaca, jadi semua worker gunicorn
+melihat profil yang sama dan profil yang ter-evict bisa dimuat lagi.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+EVENT_WEIGHTS = {'purchase': 1.0, 'cart': 0.5, 'view': 0.2}
+
+
+def event_time(timestamp):
+    """Epoch detik dari timestamp event (detik atau milidetik seperti Date.now()); None = sekarang"""
+    if timestamp is None:
+        return time.time()
+    timestamp = float(timestamp)
+    return timestamp / 1000.0 if timestamp > 1e11 else timestamp
+
+
+def empty_profile():
+    return {'terms': {}, 'updated_at': None, 'purchased': [], 'events': 0, 'version': 0}
+
+
+class UserProfileStore:
+    def __init__(self, maxsize=100000, half_life_days=30.0, path=None, max_terms=200, max_purchased=500):
+        self.maxsize = maxsize
+        self.half_life = half_life_days * 86400.0
+        self.max_terms = max_terms
+        self.max_purchased = max_purchased
+        self.path = path
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = None
+        if path:
+            # Satu koneksi per proses, dipakai di bawah self._lock (autocommit, transaksi eksplisit)
+            self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS profiles (user_id TEXT PRIMARY KEY, version INTEGER, data TEXT)'
+            )
+
+    def _remember(self, user_id, profile):
+        self._profiles[user_id] = profile
+        self._profiles.move_to_end(user_id)
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, user_id):
+        """Profil user (dict) atau None kalau belum pernah ada event"""
+        user_id = str(user_id)
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if self._connection is not None:
+                row = self._connection.execute(
+                    'SELECT version, data FROM profiles WHERE user_id = ?', (user_id,)
+                ).fetchone()
+                if row is not None and (profile is None or row[0] != profile['version']):
+                    profile = json.loads(row[1])
+                    profile['version'] = row[0]
+            if profile is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(user_id, profile)
+            return profile
+
+    def add_events(self, user_id, events):
+        """
+        Tambahkan event [(terms, weight, timestamp, purchased_name | None)] ke profil user.
+        `terms` = {term: bobot} vektor TF-IDF item. Return profil yang sudah di-update.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            if self._connection is None:
+                profile = self._apply(self._profiles.get(user_id) or empty_profile(), events)
+                self._remember(user_id, profile)
+                return profile
+
+            # BEGIN IMMEDIATE: update dari worker lain menunggu, tidak ada update yang hilang
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    'SELECT version, data FROM profiles WHERE user_id = ?', (user_id,)
+                ).fetchone()
+                profile = empty_profile()
+                if row is not None:
+                    profile = json.loads(row[1])
+                    profile['version'] = row[0]
+                profile = self._apply(profile, events)
+                connection.execute(
+                    'INSERT OR REPLACE INTO profiles (user_id, version, data) VALUES (?, ?, ?)',
+                    (user_id, profile['version'], json.dumps(profile))
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            self._remember(user_id, profile)
+            return profile
+
+    def _apply(self, profile, events):
+        terms = dict(profile['terms'])
+        updated_at = profile['updated_at']
+        purchased = list(profile['purchased'])
+        for item_terms, weight, timestamp, purchased_name in sorted(events, key=lambda event: event[2]):
+            if updated_at is None or timestamp >= updated_at:
+                # Event terbaru: decay profil ke waktu event ini
+                if updated_at is not None:
+                    decay = 0.5 ** ((timestamp - updated_at) / self.half_life)
+                    terms = {term: value * decay for term, value in terms.items()}
+                updated_at = timestamp
+            else:
+                # Event terlambat (out of order): bobotnya yang di-decay ke updated_at
+                weight *= 0.5 ** ((updated_at - timestamp) / self.half_life)
+            for term, value in item_terms.items():
+                terms[term] = terms.get(term, 0.0) + weight * value
+            if purchased_name is not None:
+                key = purchased_name.lower()
+                if key in purchased:
+                    purchased.remove(key)
+                purchased.append(key)
+
+        if len(terms) > self.max_terms:
+            terms = dict(sorted(terms.items(), key=lambda item: -item[1])[:self.max_terms])
+        return {
+            'terms': terms,
+            'updated_at': updated_at,
+            'purchased': purchased[-self.max_purchased:],
+            'events': profile['events'] + len(events),
+            'version': profile['version'] + 1
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._profiles),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'persistent': bool(self.path),
+                'half_life_days': self.half_life / 86400.0
+            }